@@ -80,6 +80,95 @@ DATABASES = {
     }
 }
 
+# Processes serving requests (gunicorn reads the same variable). With more
+# than one, the default cache must be shared: course versions, job state
+# and the quiz buffer live there, and `manage.py check` fails on LocMem.
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+# Cache - LocMem by default, which only works for a single process. Point
+# CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached in production so all
+# workers share fragments and versions
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='learnhub-default'),
+    },
+    # Highlighted code blocks, content addressed and shared by all workers
+    'highlight': {
+        'BACKEND': config('HIGHLIGHT_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('HIGHLIGHT_CACHE_LOCATION', default=str(BASE_DIR / '.cache' / 'highlight')),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    # Results of deterministic code runs, keyed by (code, inputs, interpreter)
+    'code_results': {
+        'BACKEND': config('CODE_RESULT_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CODE_RESULT_CACHE_LOCATION', default=str(BASE_DIR / '.cache' / 'code-results')),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': config('CODE_RESULT_CACHE_ENTRIES', default=20000, cast=int)},
+    },
+}
+HIGHLIGHT_MEMORY_ENTRIES = config('HIGHLIGHT_MEMORY_ENTRIES', default=2048, cast=int)
+
+# Rendered course fragments are keyed by course version, so they can live long
+COURSE_FRAGMENT_CACHE_TIMEOUT = config('COURSE_FRAGMENT_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# HTTP caching of anonymous course pages. Bump RELEASE_VERSION on deploy so
+# pages rendered by old templates stop validating.
+RELEASE_VERSION = config('RELEASE_VERSION', default='dev')
+PUBLIC_PAGE_MAX_AGE = config('PUBLIC_PAGE_MAX_AGE', default=60, cast=int)
+PUBLIC_PAGE_SHARED_MAX_AGE = config('PUBLIC_PAGE_SHARED_MAX_AGE', default=300, cast=int)
+
+# Server-side cache of the anonymous course preview page (keyed by course
+# version), and how long one worker may hold the render lock on a miss
+PREVIEW_PAGE_CACHE_TIMEOUT = config('PREVIEW_PAGE_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+PREVIEW_RENDER_LOCK_TIMEOUT = config('PREVIEW_RENDER_LOCK_TIMEOUT', default=10, cast=int)
+
+# Write-behind buffer of quiz saves (core.quiz_buffer), kept in the default
+# cache. Only used when that cache is Redis, which doesn't evict keys; on any
+# other backend, or with 0, every save goes straight to the database.
+QUIZ_BUFFER_FLUSH_INTERVAL = config('QUIZ_BUFFER_FLUSH_INTERVAL', default=0, cast=float)
+QUIZ_BUFFER_MAX_PENDING = config('QUIZ_BUFFER_MAX_PENDING', default=200, cast=int)
+QUIZ_BUFFER_TIMEOUT = config('QUIZ_BUFFER_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Warm interpreters per web process for execute_python_code (core.runner),
+# each retired after CODE_RUNNER_MAX_JOBS runs. 0 spawns one per run.
+CODE_RUNNER_POOL_SIZE = config('CODE_RUNNER_POOL_SIZE', default=4, cast=int)
+CODE_RUNNER_MAX_JOBS = config('CODE_RUNNER_MAX_JOBS', default=100, cast=int)
+# Sandbox of every program run (core.runner_worker): CPU seconds, address
+# space, processes a program may start (counted per OS user, 0 allows
+# none), largest file it may write, and stdout/stderr bytes kept before it
+# is stopped. Each running program holds at most CODE_SANDBOX_MEMORY_MB.
+# The kernel doesn't apply the process limit to root, so a server running
+# as root starts programs as CODE_SANDBOX_USER, and refuses to run them if
+# that user doesn't exist.
+CODE_SANDBOX_CPU_SECONDS = config('CODE_SANDBOX_CPU_SECONDS', default=5, cast=int)
+CODE_SANDBOX_MEMORY_MB = config('CODE_SANDBOX_MEMORY_MB', default=256, cast=int)
+CODE_SANDBOX_MAX_PROCESSES = config('CODE_SANDBOX_MAX_PROCESSES', default=0, cast=int)
+CODE_SANDBOX_MAX_FILE_MB = config('CODE_SANDBOX_MAX_FILE_MB', default=1, cast=int)
+CODE_SANDBOX_MAX_OUTPUT_BYTES = config('CODE_SANDBOX_MAX_OUTPUT_BYTES', default=64 * 1024, cast=int)
+CODE_SANDBOX_USER = config('CODE_SANDBOX_USER', default='nobody')
+# Code execution job queue (core.jobs): jobs running at once across all
+# processes, dispatcher threads and queued jobs per process, jobs queued or
+# running per user, how long results stay fetchable and the longest ?wait=
+# long-poll. A waiting poll holds a sync worker, so it is off (0) by default
+# and the browser polls briefly with backoff; raise it only for async serving
+CODE_JOBS_CONCURRENCY = config('CODE_JOBS_CONCURRENCY', default=8, cast=int)
+CODE_JOBS_WORKERS = config('CODE_JOBS_WORKERS', default=CODE_RUNNER_POOL_SIZE or 4, cast=int)
+CODE_JOBS_MAX_QUEUED = config('CODE_JOBS_MAX_QUEUED', default=100, cast=int)
+CODE_JOBS_PER_USER = config('CODE_JOBS_PER_USER', default=2, cast=int)
+CODE_JOBS_RESULT_TIMEOUT = config('CODE_JOBS_RESULT_TIMEOUT', default=300, cast=int)
+CODE_JOBS_LONG_POLL = config('CODE_JOBS_LONG_POLL', default=0, cast=int)
+# Larger outputs are not kept in the code_results cache
+CODE_RESULT_MAX_BYTES = config('CODE_RESULT_MAX_BYTES', default=64 * 1024, cast=int)
+
+# Run core.warmup in wsgi.py/asgi.py before the first request
+WARMUP_ON_STARTUP = config('WARMUP_ON_STARTUP', default=False, cast=bool)
+
+# Co-enrollment recommendations, rebuilt in the background when older than this
+RECOMMENDATIONS_TOP_N = config('RECOMMENDATIONS_TOP_N', default=6, cast=int)
+RECOMMENDATIONS_REFRESH_SECONDS = config('RECOMMENDATIONS_REFRESH_SECONDS', default=900, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -105,6 +194,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resized WebP/JPEG variants of course thumbnails and module images
+RESPONSIVE_IMAGE_WIDTHS = (160, 320, 640, 960, 1280)
+RESPONSIVE_IMAGE_QUALITY = config('RESPONSIVE_IMAGE_QUALITY', default=78, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
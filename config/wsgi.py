@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Pay for template compilation, Markdown, ReportLab etc. here rather than
+# on the first requests (WARMUP_ON_STARTUP; with --preload, before forking)
+from core.warmup import warmup_on_startup  # noqa: E402
+
+warmup_on_startup()
@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from unfold.admin import ModelAdmin
 from unfold.components import BaseComponent, register_component
-from .models import Course, Module, Enrollment, Assessment, AssessmentResult, Certificate, User, Commission, CommissionRate, Question, Choice
+from .models import Course, Module, Enrollment, Assessment, AssessmentResult, Certificate, User, Commission, CommissionRate, Question, Choice, CourseStats, ModuleCompletion
+from .stats import top_courses as top_course_stats
 import json
 
 
@@ -42,16 +43,10 @@ class CoursePerformanceChart(BaseComponent):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        courses = Course.objects.all()
-        course_data = []
-        for c in courses:
-            enrollment_count = Enrollment.objects.filter(course=c, payment_status='completed').count()
-            course_data.append({
-                'title': c.title,
-                'count': enrollment_count
-            })
-
-        top_courses = sorted(course_data, key=lambda x: x['count'], reverse=True)[:5]
+        top_courses = [
+            {'title': stats.course.title, 'count': stats.enrollment_count}
+            for stats in top_course_stats(5)
+        ]
 
         context.update({
             "height": 300,
@@ -92,12 +87,29 @@ class ModuleAdmin(ModelAdmin):
     ordering = ('course', 'order')
 
 
+@admin.register(CourseStats)
+class CourseStatsAdmin(ModelAdmin):
+    list_display = ('course', 'enrollment_count', 'completed_count', 'revenue', 'certificate_count', 'updated_at')
+    ordering = ('-enrollment_count',)
+    readonly_fields = ('course', 'enrollment_count', 'completed_count', 'revenue', 'assessment_attempts',
+                       'assessment_score_total', 'certificate_count', 'updated_at')
+
+
+class ModuleCompletionInline(admin.TabularInline):
+    model = ModuleCompletion
+    extra = 0
+    fields = ('module', 'completed_at')
+    readonly_fields = ('module', 'completed_at')
+    can_delete = False
+
+
 @admin.register(Enrollment)
 class EnrollmentAdmin(ModelAdmin):
     list_display = ('user', 'course', 'access_key', 'payment_status', 'completed', 'enrolled_at')
     list_filter = ('payment_status', 'completed', 'enrolled_at')
     search_fields = ('user__username', 'course__title', 'access_key')
     readonly_fields = ('access_key', 'enrolled_at')
+    inlines = [ModuleCompletionInline]
 
 
 class ChoiceInline(admin.TabularInline):
@@ -0,0 +1,356 @@
+"""
+JSON API (v1) for the mobile client.
+
+Every read endpoint runs a fixed number of queries whatever the page or
+batch size. Responses support sparse fieldsets (?fields[courses]=id,title),
+list endpoints are keyset paginated with the same cursors as the catalog,
+and each response carries an ETag of its body so unchanged data comes back
+as a bodyless 304. The one write endpoint takes batches of progress events,
+see core.progress_events.
+"""
+import hashlib
+import json
+from collections import defaultdict
+from functools import wraps
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET, require_POST
+from .conditional import cache_for_anonymous
+from .forms import CatalogFilterForm
+from .models import Course, Enrollment, Module
+from .pagination import keyset_paginate
+from .progress_events import ProgressEventError, apply_progress_events
+from .quiz_buffer import quiz_buffer
+
+API_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_BATCH_SIZE = 50
+
+
+class ApiError(Exception):
+    """Raised inside an API view to answer with a JSON error"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def api_view(view_func):
+    """GET only, ApiError -> JSON error, public/private caching like the HTML pages"""
+    @cache_for_anonymous
+    @require_GET
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'error': e.message}, status=e.status)
+    return _wrapped_view
+
+
+def api_write_view(view_func):
+    """POST only, ApiError -> JSON error"""
+    @require_POST
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'error': e.message}, status=e.status)
+    return _wrapped_view
+
+
+def api_login_required(view_func):
+    """401 JSON instead of a redirect to the login page"""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            raise ApiError('Authentication required', status=401)
+        return view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+def _json(request, payload):
+    """JsonResponse with a body ETag, or 304 if the client already has it"""
+    response = JsonResponse(payload, json_dumps_params={'separators': (',', ':')})
+    etag = quote_etag(hashlib.md5(response.content, usedforsecurity=False).hexdigest())
+    response['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+# -- Fields -------------------------------------------------------------------
+# name -> (getter, model columns it needs); columns feed .only() so sparse
+# requests also read less from the database.
+
+def _mentor(course):
+    mentor = course.mentor
+    if mentor is None:
+        return None
+    return {'id': mentor.id, 'name': mentor.get_full_name() or mentor.username}
+
+
+COURSE_FIELDS = {
+    'id': (lambda c: c.id, ('id',)),
+    'title': (lambda c: c.title, ('title',)),
+    'description': (lambda c: c.description, ('description',)),
+    'level': (lambda c: c.level, ('level',)),
+    'price': (lambda c: c.price, ('price',)),
+    'duration_hours': (lambda c: c.duration_hours, ('duration_hours',)),
+    'is_active': (lambda c: c.is_active, ('is_active',)),
+    'thumbnail': (lambda c: c.thumbnail.url if c.thumbnail else None, ('thumbnail',)),
+    'mentor': (_mentor, ('mentor', 'mentor__username', 'mentor__first_name', 'mentor__last_name')),
+    'module_count': (lambda c: c.module_count, ()),
+    'enrollment_count': (lambda c: c.enrollment_count, ()),
+    'created_at': (lambda c: c.created_at, ('created_at',)),
+    'updated_at': (lambda c: c.updated_at, ('updated_at',)),
+}
+COURSE_COUNT_FIELDS = {'module_count', 'enrollment_count'}
+
+MODULE_FIELDS = {
+    'id': (lambda m: m.id, ('id',)),
+    'title': (lambda m: m.title, ('title',)),
+    'content_type': (lambda m: m.content_type, ('content_type',)),
+    'order': (lambda m: m.order, ('order',)),
+    'language': (lambda m: m.language, ('language',)),
+    'has_quiz': (lambda m: bool(m.quiz_data), ('quiz_data',)),
+}
+# Only meaningful inside a progress payload
+MODULE_PROGRESS_FIELDS = ('completed', 'locked', 'quiz_score')
+
+ENROLLMENT_FIELDS = {
+    'id': (lambda e: e.id, ('id',)),
+    'course': (lambda e: {'id': e.course.id, 'title': e.course.title}, ('course',)),
+    'payment_status': (lambda e: e.payment_status, ('payment_status',)),
+    'enrolled_at': (lambda e: e.enrolled_at, ('enrolled_at',)),
+    'completed': (lambda e: e.completed, ('completed',)),
+    'progress_percent': (lambda e: e.progress_percent, ('progress_percent',)),
+    'completed_count': (lambda e: e.completed_count, ('completed_count',)),
+    'next_module_id': (lambda e: e.next_module_id, ('next_module',)),
+    'last_activity_at': (lambda e: e.last_activity_at, ('last_activity_at',)),
+}
+
+PROGRESS_FIELDS = (
+    'id', 'course', 'completed', 'completed_count', 'module_count',
+    'progress_percent', 'next_module_id', 'modules',
+)
+
+
+def _fieldset(request, resource, available):
+    """Requested fields of a resource type, in request order; id is always included"""
+    raw = request.GET.get(f'fields[{resource}]')
+    if not raw:
+        return list(available)
+    fields = list(dict.fromkeys(['id'] + [f.strip() for f in raw.split(',') if f.strip()]))
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise ApiError(f"Unknown {resource} field(s): {', '.join(unknown)}")
+    return fields
+
+
+def _columns(spec, fields, *extra):
+    return {column for field in fields if field in spec for column in spec[field][1]} | set(extra)
+
+
+def _serialize(obj, spec, fields):
+    return {field: spec[field][0](obj) for field in fields}
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('page_size', API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('page_size must be an integer')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _page_meta(page):
+    return {
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'count': len(page),
+    }
+
+
+def _course_queryset(fields):
+    """Courses reading only the columns (and counts) the fieldset needs"""
+    courses = Course.objects.only(*_columns(COURSE_FIELDS, fields, 'id', 'created_at'))
+    if 'mentor' in fields:
+        courses = courses.select_related('mentor')
+    if COURSE_COUNT_FIELDS.intersection(fields):
+        courses = courses.with_counts()
+    return courses
+
+
+def _outlines(course_ids, fields):
+    """course id -> ordered modules for several courses, in one query"""
+    outlines = defaultdict(list)
+    modules = (
+        Module.objects.filter(course_id__in=course_ids)
+        .only(*_columns(MODULE_FIELDS, fields, 'id', 'course_id', 'order', 'progress_bit'))
+        .order_by('course_id', 'order', 'id')
+    )
+    for module in modules:
+        outlines[module.course_id].append(module)
+    return outlines
+
+
+def _progress(enrollment, outline, fields, module_fields):
+    """Outline of one enrollment with completion and lock state, as in course_viewer"""
+    completed = enrollment.completion_bitmap
+    quiz_data = quiz_buffer.quiz_data(enrollment, [m.id for m in outline]) if 'quiz_score' in module_fields else {}
+    next_module_id = next((m.id for m in outline if m.progress_bit not in completed), None)
+    done = sum(1 for m in outline if m.progress_bit in completed)
+
+    modules = []
+    for module in outline:
+        item = _serialize(module, MODULE_FIELDS, [f for f in module_fields if f in MODULE_FIELDS])
+        status = {
+            'completed': module.progress_bit in completed,
+            # Sequential unlocking: completed modules plus the next one
+            'locked': module.progress_bit not in completed and module.id != next_module_id,
+            'quiz_score': quiz_data.get(str(module.id), {}).get('score'),
+        }
+        item.update((f, status[f]) for f in module_fields if f in status)
+        modules.append(item)
+
+    payload = {
+        'id': enrollment.id,
+        'course': {'id': enrollment.course.id, 'title': enrollment.course.title},
+        'completed': enrollment.completed,
+        'completed_count': done,
+        'module_count': len(outline),
+        'progress_percent': int(done / len(outline) * 100) if outline else 0,
+        'next_module_id': next_module_id,
+        'modules': modules,
+    }
+    return {field: payload[field] for field in fields}
+
+
+def _progress_payloads(request, enrollment_ids):
+    """Progress of the user's enrollments among enrollment_ids: 3 queries"""
+    fields = _fieldset(request, 'progress', dict.fromkeys(PROGRESS_FIELDS))
+    module_fields = _fieldset(request, 'modules', {**MODULE_FIELDS, **dict.fromkeys(MODULE_PROGRESS_FIELDS)})
+
+    enrollments = Enrollment.objects.filter(user_id=request.user.id, id__in=enrollment_ids).select_related('course').only(
+        'id', 'progress', 'completed', 'course__id', 'course__title'
+    ).with_completions().in_bulk()
+    outlines = _outlines({e.course_id for e in enrollments.values()}, module_fields)
+
+    data = [
+        _progress(enrollments[eid], outlines.get(enrollments[eid].course_id, []), fields, module_fields)
+        for eid in enrollment_ids if eid in enrollments
+    ]
+    missing = [eid for eid in enrollment_ids if eid not in enrollments]
+    return data, missing
+
+
+# -- Endpoints ----------------------------------------------------------------
+
+@api_view
+def courses(request):
+    """Catalog: filters as on the catalog page, keyset paginated (1 query)"""
+    form = CatalogFilterForm(request.GET or None)
+    if request.GET and not form.is_valid():
+        raise ApiError(form.errors.get_json_data())
+    fields = _fieldset(request, 'courses', COURSE_FIELDS)
+    filters = form.cleaned_data if form.is_bound else {}
+
+    page = keyset_paginate(
+        form.filter_queryset(_course_queryset(fields), request.user),
+        after=filters.get('after'),
+        before=filters.get('before'),
+        page_size=_page_size(request)
+    )
+    return _json(request, {
+        'data': [_serialize(course, COURSE_FIELDS, fields) for course in page],
+        'meta': _page_meta(page),
+    })
+
+
+@api_view
+def course_outline(request, course_id):
+    """One course with its ordered module outline (2 queries)"""
+    fields = _fieldset(request, 'courses', COURSE_FIELDS)
+    module_fields = _fieldset(request, 'modules', MODULE_FIELDS)
+
+    course = _course_queryset(fields).filter(id=course_id).first()
+    if course is None:
+        raise ApiError('Course not found', status=404)
+
+    data = _serialize(course, COURSE_FIELDS, fields)
+    data['modules'] = [
+        _serialize(module, MODULE_FIELDS, module_fields)
+        for module in _outlines([course.id], module_fields)[course.id]
+    ]
+    return _json(request, {'data': data})
+
+
+@api_view
+@api_login_required
+def enrollments(request):
+    """The user's enrollments, newest first, keyset paginated (2 queries)"""
+    fields = _fieldset(request, 'enrollments', ENROLLMENT_FIELDS)
+    page = keyset_paginate(
+        Enrollment.objects.filter(user_id=request.user.id)
+        .only(*_columns(ENROLLMENT_FIELDS, fields, 'id', 'course', 'enrolled_at'))
+        .with_course_counts(),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        page_size=_page_size(request),
+        field='enrolled_at'
+    )
+    return _json(request, {
+        'data': [_serialize(enrollment, ENROLLMENT_FIELDS, fields) for enrollment in page],
+        'meta': _page_meta(page),
+    })
+
+
+@api_view
+@api_login_required
+def enrollment_progress(request, enrollment_id):
+    """Outline and progress of one enrollment (3 queries)"""
+    data, missing = _progress_payloads(request, [enrollment_id])
+    if missing:
+        raise ApiError('Enrollment not found', status=404)
+    return _json(request, {'data': data[0]})
+
+
+@api_view
+@api_login_required
+def progress_batch(request):
+    """Outline and progress of several enrollments, ?ids=1,2,3 (3 queries)"""
+    try:
+        ids = list(dict.fromkeys(int(i) for i in request.GET.get('ids', '').split(',') if i.strip()))
+    except ValueError:
+        raise ApiError('ids must be a comma separated list of enrollment ids')
+    if not ids:
+        raise ApiError('ids is required')
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ApiError(f'At most {MAX_BATCH_SIZE} enrollments per request')
+
+    data, missing = _progress_payloads(request, ids)
+    return _json(request, {'data': data, 'meta': {'missing': missing}})
+
+
+@api_write_view
+@api_login_required
+def progress_events(request, enrollment_id):
+    """Apply a batch of progress events in one transaction, answer with the new progress"""
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        raise ApiError('Request body must be JSON')
+    if not isinstance(body, dict):
+        raise ApiError('Request body must be an object with an events list')
+
+    try:
+        summary = apply_progress_events(enrollment_id, request.user.id, body.get('events'))
+    except Enrollment.DoesNotExist:
+        raise ApiError('Enrollment not found', status=404)
+    except ProgressEventError as e:
+        raise ApiError(e.errors)
+
+    data, _ = _progress_payloads(request, [enrollment_id])
+    return JsonResponse({'data': data[0], 'meta': summary})
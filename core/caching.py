@@ -0,0 +1,73 @@
+"""
+Versioned cache keys for shared, user-independent course fragments.
+
+Every course has a version token in the cache. Rendered fragments embed the
+token in their key, so bumping the token (on Course/Module save or delete)
+makes all old fragments unreachable without having to find and delete them.
+"""
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'course:version:{}'
+# Backends whose entries only the process that wrote them can see
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+# Shared backends that never drop a live key to make room, as long as the
+# Redis server keeps its default maxmemory-policy of noeviction. LocMem,
+# file, database and Memcached caches all cull entries when full.
+NON_EVICTING_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django_redis.cache.RedisCache',
+)
+
+
+def is_shared_cache(alias='default'):
+    """True if every worker process sees what the others write to the cache"""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def is_durable_cache(alias='default'):
+    """True if the cache is shared and keeps keys until they expire or are deleted"""
+    return settings.CACHES[alias]['BACKEND'] in NON_EVICTING_BACKENDS
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def get_course_versions(course_ids):
+    """Return {course_id: version} for the given ids in one cache round trip"""
+    course_ids = list(course_ids)
+    keys = {VERSION_KEY.format(cid): cid for cid in course_ids}
+    found = cache.get_many(keys.keys())
+
+    versions = {keys[key]: value for key, value in found.items()}
+    missing = {key: _new_version() for key, cid in keys.items() if cid not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update({keys[key]: value for key, value in missing.items()})
+    return versions
+
+
+def get_course_version(course_id):
+    """Return the current version token for a single course"""
+    return get_course_versions([course_id])[course_id]
+
+
+def bump_course_version(course_id):
+    """Invalidate every cached fragment of a course"""
+    cache.set(VERSION_KEY.format(course_id), _new_version(), timeout=None)
+
+
+def attach_course_versions(courses):
+    """Set course.cache_version on each course, returns the courses as a list"""
+    courses = list(courses)
+    versions = get_course_versions(c.id for c in courses)
+    for course in courses:
+        course.cache_version = versions[course.id]
+    return courses
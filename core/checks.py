@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from .caching import is_durable_cache, is_shared_cache
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Several workers on a process-local cache would serve each other stale fragments"""
+    if settings.WEB_CONCURRENCY > 1 and not is_shared_cache():
+        return [Error(
+            f"WEB_CONCURRENCY is {settings.WEB_CONCURRENCY}, but the default cache "
+            f"({settings.CACHES['default']['BACKEND']}) is local to each process.",
+            hint="Set CACHE_BACKEND/CACHE_LOCATION to Redis or Memcached, shared by all workers.",
+            id='core.E001',
+        )]
+    return []
+
+
+@register(Tags.caches)
+def check_quiz_buffer_cache(app_configs, **kwargs):
+    """The quiz buffer holds acknowledged saves in the cache, which must not evict them"""
+    if settings.QUIZ_BUFFER_FLUSH_INTERVAL > 0 and not is_durable_cache():
+        return [Warning(
+            f"QUIZ_BUFFER_FLUSH_INTERVAL is set, but the default cache "
+            f"({settings.CACHES['default']['BACKEND']}) may evict buffered saves; "
+            f"quiz saves are written straight to the database instead.",
+            hint="Use Redis (maxmemory-policy noeviction) as the default cache, or set QUIZ_BUFFER_FLUSH_INTERVAL=0.",
+            id='core.W001',
+        )]
+    return []
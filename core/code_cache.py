@@ -0,0 +1,157 @@
+"""
+Content-addressed cache of code runner results.
+
+Most "Run" clicks execute a module's starter code or a sample solution
+unchanged, with the same inputs. A program whose output depends only on its
+source and inputs runs once per (code, inputs, timeout, interpreter) and is
+answered from the 'code_results' cache after that. The cache is shared by
+all workers and bounded by its MAX_ENTRIES.
+
+Only programs that look deterministic are cached. Every import must be in
+DETERMINISTIC_MODULES, and the code must not name builtins that reach the
+clock, files or other code (open, eval, ...), the helpers that look up
+attributes by a computed name, or any dunder attribute (print.__self__ is
+the builtins module). Runs stopped by a sandbox limit, that crash or that
+find the pool busy are never stored, and neither is output over
+CODE_RESULT_MAX_BYTES. Hits, misses and the CPU seconds the hits saved are
+counted in the default cache, so the numbers cover every worker.
+"""
+import ast
+import hashlib
+import json
+import sys
+from django.conf import settings
+from django.core.cache import cache, caches
+
+CACHE_KEY = 'coderesult:{}'
+COUNTER_KEY = 'coderesult:stats:{}'
+# Bump when the runner changes what a program's output looks like
+RESULT_FORMAT = 2
+COUNTERS = ('hits', 'misses', 'uncacheable', 'saved_cpu_us')
+
+DETERMINISTIC_MODULES = frozenset({
+    'abc', 'array', 'bisect', 'cmath', 'collections', 'copy', 'dataclasses', 'decimal', 'enum',
+    'fractions', 'functools', 'heapq', 'itertools', 'json', 'math', 'numbers', 'operator', 'pprint',
+    're', 'statistics', 'string', 'textwrap', 'typing', 'unicodedata',
+})
+UNSAFE_NAMES = frozenset({
+    '__builtins__', '__import__', 'breakpoint', 'compile', 'delattr', 'eval', 'exec', 'getattr',
+    'globals', 'hash', 'id', 'locals', 'open', 'setattr', 'vars',
+})
+# Reach any attribute or evaluate a string: operator.attrgetter('__self__'),
+# typing.get_type_hints on a string annotation, string.Formatter().get_field
+UNSAFE_ATTRIBUTES = frozenset({'ForwardRef', 'Formatter', 'attrgetter', 'get_type_hints', 'methodcaller'})
+# Module globals of __main__ that are plain strings
+SAFE_DUNDER_NAMES = frozenset({'__doc__', '__file__', '__name__'})
+
+
+def _is_dunder(name):
+    return len(name) > 4 and name.startswith('__') and name.endswith('__')
+
+
+def _unsafe_name(name):
+    return name in UNSAFE_NAMES or name in UNSAFE_ATTRIBUTES or (_is_dunder(name) and name not in SAFE_DUNDER_NAMES)
+
+
+def is_deterministic(code):
+    """True if the program can only depend on its source and stdin"""
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        # Fails to compile the same way every time
+        return True
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            # from collections import __builtins__ as b binds a plain name
+            if any(_unsafe_name(alias.name) for alias in node.names):
+                return False
+            modules = [node.module or ''] if not node.level else ['']
+        elif isinstance(node, ast.Name):
+            if _unsafe_name(node.id):
+                return False
+            continue
+        elif isinstance(node, ast.Attribute):
+            if _is_dunder(node.attr) or node.attr in UNSAFE_ATTRIBUTES:
+                return False
+            continue
+        elif isinstance(node, ast.MatchClass):
+            # case object(__self__=b) reads the attribute too
+            if any(_is_dunder(attr) or attr in UNSAFE_ATTRIBUTES for attr in node.kwd_attrs):
+                return False
+            continue
+        else:
+            continue
+        if any(module.split('.')[0] not in DETERMINISTIC_MODULES for module in modules):
+            return False
+    return True
+
+
+class CodeResultCache:
+    """Results of deterministic runs in a Django cache, with shared counters"""
+
+    def __init__(self, alias='code_results', max_bytes=64 * 1024):
+        self.alias = alias
+        self.max_bytes = max_bytes
+
+    @property
+    def store(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def key(code, inputs, timeout):
+        digest = hashlib.sha256(json.dumps([RESULT_FORMAT, sys.version, timeout]).encode())
+        for part in (code, inputs):
+            digest.update(b'\0')
+            digest.update(part.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def _count(self, name, delta=1):
+        key = COUNTER_KEY.format(name)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, None)
+
+    def lookup(self, code, inputs, timeout):
+        """(key, cached (success, output, error) or None); key is None for programs not to cache"""
+        if not is_deterministic(code):
+            self._count('uncacheable')
+            return None, None
+        key = self.key(code, inputs, timeout)
+        entry = self.store.get(CACHE_KEY.format(key))
+        if entry is None:
+            self._count('misses')
+            return key, None
+        success, output, error, cpu_time = entry
+        self._count('hits')
+        self._count('saved_cpu_us', round(cpu_time * 1000000))
+        return key, (success, output, error)
+
+    def store_result(self, key, result):
+        """Keep a RunResult of a program lookup() gave a key for, if it finished on its own"""
+        if key is None or result.status not in ('ok', 'error'):
+            return
+        if len(result.output) + len(result.error) > self.max_bytes:
+            return
+        self.store.set(CACHE_KEY.format(key), (result.success, result.output, result.error, result.cpu_time), None)
+
+    @property
+    def stats(self):
+        found = cache.get_many([COUNTER_KEY.format(name) for name in COUNTERS])
+        counts = {name: found.get(COUNTER_KEY.format(name), 0) for name in COUNTERS}
+        lookups = counts['hits'] + counts['misses']
+        return {
+            'hits': counts['hits'],
+            'misses': counts['misses'],
+            'uncacheable': counts['uncacheable'],
+            'hit_ratio': counts['hits'] / lookups if lookups else 0.0,
+            'saved_cpu_seconds': counts['saved_cpu_us'] / 1000000,
+        }
+
+    def reset_stats(self):
+        cache.delete_many([COUNTER_KEY.format(name) for name in COUNTERS])
+
+
+code_result_cache = CodeResultCache(max_bytes=settings.CODE_RESULT_MAX_BYTES)
@@ -0,0 +1,185 @@
+"""
+Conditional GET and cache headers for course pages.
+
+Anonymous pages get an ETag/Last-Modified derived from Course.updated_at
+(which module saves and deletes also touch), so repeat visits are answered
+with a 304 after one indexed lookup, and public Cache-Control so a reverse
+proxy can serve them without reaching Django. Authenticated, personalised
+responses are always marked private.
+
+The anonymous course preview, the landing page of marketing links, is also
+kept rendered in the cache under the course version, with a render lock so
+a burst of misses costs one render rather than one per worker.
+"""
+import hashlib
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from .caching import get_course_version
+from .models import Course
+
+PREVIEW_PAGE_KEY = 'preview:page:{}:{}:{}'
+PREVIEW_STALE_KEY = 'preview:stale:{}:{}'
+PREVIEW_LOCK_KEY = 'preview:lock:{}:{}'
+PREVIEW_POLL_INTERVAL = 0.05
+
+
+def _is_public(request):
+    return not request.user.is_authenticated
+
+
+def _make_etag(*parts):
+    raw = '|'.join(str(p) for p in (settings.RELEASE_VERSION,) + parts)
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def _course_updated_at(request, course_id):
+    """Course.updated_at, looked up once per request"""
+    if not hasattr(request, '_course_updated_at'):
+        try:
+            course_id = int(course_id)
+        except (TypeError, ValueError):
+            course_id = None
+        request._course_updated_at = (
+            Course.objects.filter(id=course_id).values_list('updated_at', flat=True).first()
+            if course_id else None
+        )
+    return request._course_updated_at
+
+
+def _catalog_state(request):
+    """(latest updated_at, course count) over all courses, once per request"""
+    if not hasattr(request, '_catalog_state'):
+        state = Course.objects.aggregate(updated=Max('updated_at'), total=Count('id'))
+        request._catalog_state = (state['updated'], state['total'])
+    return request._catalog_state
+
+
+def _preview_course_id(request, enrollment_id):
+    """Course id when course_viewer is in anonymous preview mode, else None"""
+    if enrollment_id == 0 and request.GET.get('preview') == 'true' and _is_public(request):
+        return request.GET.get('course_id')
+    return None
+
+
+# -- condition() callbacks ----------------------------------------------------
+
+def course_detail_etag(request, course_id):
+    updated_at = _course_updated_at(request, course_id) if _is_public(request) else None
+    return _make_etag('course_detail', course_id, updated_at.isoformat()) if updated_at else None
+
+
+def course_detail_last_modified(request, course_id):
+    return _course_updated_at(request, course_id) if _is_public(request) else None
+
+
+def course_preview_etag(request, enrollment_id):
+    course_id = _preview_course_id(request, enrollment_id)
+    updated_at = _course_updated_at(request, course_id) if course_id else None
+    return _make_etag('course_preview', course_id, updated_at.isoformat()) if updated_at else None
+
+
+def course_preview_last_modified(request, enrollment_id):
+    course_id = _preview_course_id(request, enrollment_id)
+    return _course_updated_at(request, course_id) if course_id else None
+
+
+def catalog_etag(request):
+    if not _is_public(request):
+        return None
+    updated_at, total = _catalog_state(request)
+    return _make_etag('catalog', request.get_full_path(), updated_at and updated_at.isoformat(), total)
+
+
+def catalog_last_modified(request):
+    return _catalog_state(request)[0] if _is_public(request) else None
+
+
+# -- Response headers ---------------------------------------------------------
+
+def cache_for_anonymous(view_func):
+    """Public Cache-Control for anonymous 200/304 responses, private otherwise"""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        # Responses differ between anonymous and logged-in visitors
+        patch_vary_headers(response, ('Cookie',))
+
+        # Anything that sets a cookie (messages, session, CSRF) is per-visitor
+        if _is_public(request) and response.status_code in (200, 304) and not response.cookies:
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=settings.PUBLIC_PAGE_MAX_AGE,
+                s_maxage=settings.PUBLIC_PAGE_SHARED_MAX_AGE
+            )
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return _wrapped_view
+
+
+# -- Anonymous preview page cache ---------------------------------------------
+
+def _cached_response(entry):
+    content, content_type = entry
+    return HttpResponse(content, content_type=content_type)
+
+
+def _wait_for_render(key, timeout):
+    """Poll for the page another worker is rendering, None if it doesn't show up"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(PREVIEW_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def cache_anonymous_preview(view_func):
+    """
+    Serve course_viewer's anonymous preview from the cache. The key holds the
+    course version, which every Course/Module save or delete bumps. On a miss
+    one worker takes a lock and renders; the others answer with the previous
+    version of the page if there is one, or wait for the render.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, enrollment_id, *args, **kwargs):
+        try:
+            course_id = int(_preview_course_id(request, enrollment_id))
+        except (TypeError, ValueError):
+            return view_func(request, enrollment_id, *args, **kwargs)
+
+        version = get_course_version(course_id)
+        key = PREVIEW_PAGE_KEY.format(course_id, version, settings.RELEASE_VERSION)
+        entry = cache.get(key)
+        if entry is not None:
+            return _cached_response(entry)
+
+        lock = PREVIEW_LOCK_KEY.format(course_id, version)
+        if not cache.add(lock, 1, settings.PREVIEW_RENDER_LOCK_TIMEOUT):
+            # Previous version of the page, only for as long as the render takes
+            entry = cache.get(PREVIEW_STALE_KEY.format(course_id, settings.RELEASE_VERSION))
+            entry = entry or _wait_for_render(key, settings.PREVIEW_RENDER_LOCK_TIMEOUT)
+            if entry is not None:
+                return _cached_response(entry)
+            # The lock holder died or is slow: render without caching
+            return view_func(request, enrollment_id, *args, **kwargs)
+
+        try:
+            response = view_func(request, enrollment_id, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies and not response.streaming:
+                entry = (response.content, response['Content-Type'])
+                cache.set_many({
+                    key: entry,
+                    PREVIEW_STALE_KEY.format(course_id, settings.RELEASE_VERSION): entry,
+                }, settings.PREVIEW_PAGE_CACHE_TIMEOUT)
+            return response
+        finally:
+            cache.delete(lock)
+    return _wrapped_view
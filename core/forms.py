@@ -99,3 +99,46 @@ class AssessmentForm(forms.ModelForm):
             'title': forms.TextInput(attrs={'class': 'form-input', 'placeholder': 'e.g., Final Course Exam'}),
             'passing_score': forms.NumberInput(attrs={'class': 'form-input', 'min': 0, 'max': 100}),
         }
+
+
+class CatalogFilterForm(forms.Form):
+    """Catalog filters and keyset cursors, read from the query string"""
+    ACTIVE_CHOICES = [
+        ('', 'Active only'),
+        ('all', 'All courses'),
+        ('inactive', 'Inactive only'),
+    ]
+
+    level = forms.ChoiceField(
+        choices=[('', 'All levels')] + Course._meta.get_field('level').choices,
+        required=False
+    )
+    min_price = forms.DecimalField(required=False, min_value=0, decimal_places=2)
+    max_price = forms.DecimalField(required=False, min_value=0, decimal_places=2)
+    # Only honoured for staff, students always see active courses
+    is_active = forms.ChoiceField(choices=ACTIVE_CHOICES, required=False)
+    after = forms.CharField(required=False, widget=forms.HiddenInput)
+    before = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            field.widget.attrs.update({'class': 'form-input'})
+
+    def filter_queryset(self, courses, user):
+        """Apply the valid filters to a Course queryset, students only see active courses"""
+        filters = self.cleaned_data if self.is_valid() else {}
+
+        active = filters.get('is_active') if user.is_staff else ''
+        if active == 'inactive':
+            courses = courses.filter(is_active=False)
+        elif active != 'all':
+            courses = courses.filter(is_active=True)
+
+        if filters.get('level'):
+            courses = courses.filter(level=filters['level'])
+        if filters.get('min_price') is not None:
+            courses = courses.filter(price__gte=filters['min_price'])
+        if filters.get('max_price') is not None:
+            courses = courses.filter(price__lte=filters['max_price'])
+        return courses
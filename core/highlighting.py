@@ -0,0 +1,158 @@
+"""
+Shared syntax-highlighting cache for fenced code blocks.
+
+The same snippets show up in many modules and courses, and Pygments
+tokenizing is the expensive part of rendering a lesson. This Markdown
+extension runs just before fenced_code and answers every fenced block from
+a cache keyed by (language, source, highlighter config): first a bounded
+in-process LRU, then the persistent 'highlight' cache shared by all
+workers. Only misses reach CodeHilite, and the HTML is identical to what
+fenced_code + codehilite would have produced. Blocks with attributes
+({.python hl_lines="2"}) are left to fenced_code.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from markdown.extensions import Extension
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+from markdown.preprocessors import Preprocessor
+
+CACHE_KEY = 'hl:{}'
+
+
+class HighlightCache:
+    """Bounded LRU in front of a Django cache backend, with hit counters"""
+
+    def __init__(self, max_entries=2048, alias='highlight', store=None):
+        self.max_entries = max_entries
+        self.alias = alias
+        self._store = store
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = self.store_hits = self.misses = 0
+
+    @property
+    def store(self):
+        return self._store if self._store is not None else caches[self.alias]
+
+    @staticmethod
+    def key(lang, source, config):
+        digest = hashlib.sha256(json.dumps([lang, config], sort_keys=True, default=str).encode())
+        digest.update(b'\0')
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return html
+
+        html = self.store.get(CACHE_KEY.format(key))
+        if html is not None:
+            self._remember(key, html)
+            self.store_hits += 1
+        return html
+
+    def set(self, key, html):
+        self.misses += 1
+        self._remember(key, html)
+        self.store.set(CACHE_KEY.format(key), html, None)
+
+    def _remember(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear_memory(self):
+        with self._lock:
+            self._entries.clear()
+            self.memory_hits = self.store_hits = self.misses = 0
+
+    @property
+    def stats(self):
+        lookups = self.memory_hits + self.store_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'store_hits': self.store_hits,
+            'misses': self.misses,
+            'hit_ratio': (self.memory_hits + self.store_hits) / lookups if lookups else 0.0,
+        }
+
+
+highlight_cache = HighlightCache(max_entries=settings.HIGHLIGHT_MEMORY_ENTRIES)
+
+
+class CachedFencedBlockPreprocessor(Preprocessor):
+    """Highlight plain ```lang fences through highlight_cache and stash the HTML"""
+
+    FENCED_BLOCK_RE = FencedBlockPreprocessor.FENCED_BLOCK_RE
+
+    def __init__(self, md, cache):
+        super().__init__(md)
+        self.cache = cache
+        self.codehilite_conf = None
+
+    def _config(self):
+        if self.codehilite_conf is None:
+            self.codehilite_conf = {}
+            for ext in self.md.registeredExtensions:
+                if isinstance(ext, CodeHiliteExtension):
+                    self.codehilite_conf = ext.getConfigs()
+        return self.codehilite_conf
+
+    def highlight(self, source, lang):
+        config = self._config()
+        key = self.cache.key(lang, source, config)
+        html = self.cache.get(key)
+        if html is None:
+            local_config = config.copy()
+            html = CodeHilite(
+                source,
+                lang=lang,
+                style=local_config.pop('pygments_style', 'default'),
+                **local_config
+            ).hilite(shebang=False)
+            self.cache.set(key, html)
+        return html
+
+    def run(self, lines):
+        config = self._config()
+        if not config or not config['use_pygments']:
+            return lines
+
+        text = '\n'.join(lines)
+        index = 0
+        while True:
+            m = self.FENCED_BLOCK_RE.search(text, index)
+            if not m:
+                break
+            if m.group('attrs') or m.group('hl_lines'):
+                # Attribute lists and line highlights stay with fenced_code
+                index = m.end()
+                continue
+            placeholder = self.md.htmlStash.store(self.highlight(m.group('code'), m.group('lang')))
+            text = f'{text[:m.start()]}\n{placeholder}\n{text[m.end():]}'
+            index = m.start() + 1 + len(placeholder)
+        return text.split('\n')
+
+
+class CachedHighlightExtension(Extension):
+    """Add after codehilite and fenced_code in the extension list"""
+
+    def __init__(self, cache=None, **kwargs):
+        self.cache = cache or highlight_cache
+        super().__init__(**kwargs)
+
+    def extendMarkdown(self, md):
+        md.registerExtension(self)
+        # fenced_code_block runs at 25, take the blocks just before it
+        md.preprocessors.register(CachedFencedBlockPreprocessor(md, self.cache), 'cached_fenced_code', 26)
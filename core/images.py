@@ -0,0 +1,200 @@
+"""
+Responsive image derivatives for course thumbnails and module images.
+
+Each uploaded image is resized once to the widths in RESPONSIVE_IMAGE_WIDTHS
+and stored next to the media files as WebP and JPEG, e.g.
+
+    derivatives/courses/thumbnails/python.640w.webp
+
+Derivatives are generated once the upload is committed, or for files that
+predate this with generate_image_derivatives, never while rendering. What
+exists for an image (its size and available widths, or that it could not
+be decoded) is written to a small JSON manifest next to the derivatives and
+remembered in the cache, so rendering a srcset does not decode anything and
+reads the disk at most once per image after a restart or eviction. Images
+without a manifest yet render the original file.
+"""
+import hashlib
+import json
+import logging
+import posixpath
+from io import BytesIO
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_ROOT = 'derivatives'
+META_KEY = 'image:meta:{}'
+# Cached in place of metadata: the original can't be decoded, or it has no
+# manifest yet (checked again after PENDING_TIMEOUT seconds)
+UNREADABLE = 'unreadable'
+PENDING = 'pending'
+PENDING_TIMEOUT = 60
+FORMATS = {
+    'webp': {'format': 'WEBP', 'method': 4},
+    'jpeg': {'format': 'JPEG', 'optimize': True, 'progressive': True},
+}
+
+
+def derivative_name(name, width, fmt):
+    """Storage name of one derivative of an original image"""
+    stem = posixpath.splitext(name)[0]
+    return f'{DERIVATIVE_ROOT}/{stem}.{width}w.{fmt}'
+
+
+def manifest_name(name):
+    """Storage name of the JSON manifest describing an image's derivatives"""
+    stem = posixpath.splitext(name)[0]
+    return f'{DERIVATIVE_ROOT}/{stem}.json'
+
+
+def _meta_key(name):
+    return META_KEY.format(hashlib.md5(name.encode(), usedforsecurity=False).hexdigest())
+
+
+def _target_widths(original_width):
+    """Configured widths below the original, plus the original if it is not upscaled past"""
+    widths = [w for w in settings.RESPONSIVE_IMAGE_WIDTHS if w < original_width]
+    if original_width <= max(settings.RESPONSIVE_IMAGE_WIDTHS):
+        widths.append(original_width)
+    return widths
+
+
+def _encode(image, fmt):
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        # JPEG has no alpha channel: flatten onto white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    elif fmt == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    buffer = BytesIO()
+    image.save(buffer, quality=settings.RESPONSIVE_IMAGE_QUALITY, **FORMATS[fmt])
+    return buffer.getvalue()
+
+
+def _save_manifest(field_file, meta):
+    storage = field_file.storage
+    name = manifest_name(field_file.name)
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(json.dumps(meta).encode()))
+    cache.set(_meta_key(field_file.name), UNREADABLE if meta.get(UNREADABLE) else meta, None)
+
+
+def _stored_metadata(field_file):
+    """Metadata from the cache or the manifest: a dict, UNREADABLE, or PENDING if there is none"""
+    key = _meta_key(field_file.name)
+    meta = cache.get(key)
+    if meta is not None:
+        return meta
+    storage = field_file.storage
+    name = manifest_name(field_file.name)
+    try:
+        with storage.open(name, 'rb') as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        cache.set(key, PENDING, PENDING_TIMEOUT)
+        return PENDING
+    meta = UNREADABLE if meta.get(UNREADABLE) else meta
+    cache.set(key, meta, None)
+    return meta
+
+
+def generate_derivatives(field_file, force=False):
+    """
+    Write all missing derivatives of an image and its manifest, and return
+    its metadata: {'width', 'height', 'widths'}. Returns None if the file
+    can't be decoded, which is recorded so renders don't retry it.
+    """
+    storage = field_file.storage
+    name = field_file.name
+    try:
+        with storage.open(name, 'rb') as fh:
+            image = ImageOps.exif_transpose(Image.open(fh))
+            image.load()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning("Could not read image %s for derivatives", name, exc_info=True)
+        _save_manifest(field_file, {UNREADABLE: True})
+        return None
+
+    if image.mode == 'P':
+        image = image.convert('RGBA')
+    width, height = image.size
+    widths = _target_widths(width)
+
+    for target in widths:
+        resized = None
+        for fmt in FORMATS:
+            out_name = derivative_name(name, target, fmt)
+            if not force and storage.exists(out_name):
+                continue
+            if resized is None:
+                resized = image if target == width else image.resize(
+                    (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS
+                )
+            if storage.exists(out_name):
+                storage.delete(out_name)
+            storage.save(out_name, ContentFile(_encode(resized, fmt)))
+
+    meta = {'width': width, 'height': height, 'widths': widths}
+    _save_manifest(field_file, meta)
+    return meta
+
+
+def ensure_derivatives(field_file):
+    """Generate derivatives unless the image already has a manifest; for the commit hook"""
+    if _stored_metadata(field_file) == PENDING:
+        generate_derivatives(field_file)
+
+
+def delete_derivatives(field_file):
+    """Remove every derivative of an image, e.g. after its owner is deleted"""
+    storage = field_file.storage
+    meta = _stored_metadata(field_file)
+    widths = meta['widths'] if isinstance(meta, dict) else settings.RESPONSIVE_IMAGE_WIDTHS
+    for width in widths:
+        for fmt in FORMATS:
+            out_name = derivative_name(field_file.name, width, fmt)
+            if storage.exists(out_name):
+                storage.delete(out_name)
+    if storage.exists(manifest_name(field_file.name)):
+        storage.delete(manifest_name(field_file.name))
+    cache.delete(_meta_key(field_file.name))
+
+
+def image_metadata(field_file):
+    """Metadata of an image for rendering, None until it has usable derivatives"""
+    if not field_file:
+        return None
+    meta = _stored_metadata(field_file)
+    return meta if isinstance(meta, dict) else None
+
+
+def responsive_sources(field_file):
+    """
+    Everything a <picture> needs for an image: {'src', 'width', 'height',
+    'srcsets': {fmt: 'url 320w, ...'}}. Falls back to the original file when
+    no derivatives could be made.
+    """
+    meta = image_metadata(field_file)
+    if meta is None:
+        return {'src': field_file.url, 'width': None, 'height': None, 'srcsets': {}}
+
+    storage = field_file.storage
+    srcsets = {
+        fmt: ', '.join(f'{storage.url(derivative_name(field_file.name, w, fmt))} {w}w' for w in meta['widths'])
+        for fmt in FORMATS
+    }
+    # Middle width is a reasonable default for browsers without srcset support
+    fallback = meta['widths'][len(meta['widths']) // 2]
+    return {
+        'src': storage.url(derivative_name(field_file.name, fallback, 'jpeg')),
+        'width': meta['width'],
+        'height': meta['height'],
+        'srcsets': srcsets,
+    }
@@ -0,0 +1,222 @@
+"""
+Queue of code execution jobs, so "Run" never holds a web worker.
+
+execute_code only validates and queues the program and answers with a job
+id. The result is fetched from execute_code_result by short polls; ?wait=
+long-polls only up to CODE_JOBS_LONG_POLL seconds (0 by default), since a
+waiting poll holds a sync web worker. Dispatcher threads in each web process take
+queued jobs round-robin across their owners, so one student's burst can't
+starve the rest of the class. They run the jobs through run_python_code
+(the warm pool and the result cache); a result names the sandbox limit
+that stopped the program, if one did.
+
+Limits, all answered with a fast 429 instead of piling up requests:
+
+- CODE_JOBS_CONCURRENCY jobs run at once across all processes. A
+  dispatcher claims one of that many slot keys in the default cache before
+  running; slots expire on their own if a process dies mid-job.
+- CODE_JOBS_MAX_QUEUED jobs wait per process.
+- CODE_JOBS_PER_USER jobs per owner (user, or address when anonymous),
+  queued or running, counted in the cache.
+
+Job state lives in the default cache for CODE_JOBS_RESULT_TIMEOUT seconds,
+so any worker can answer a poll. That, the slots and the per-user counts
+only hold across processes on a shared cache: with WEB_CONCURRENCY above 1
+and a process-local one, the queue refuses jobs (and `check` fails, see
+core.checks). Queued jobs are in memory and are lost if the process dies.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from .caching import is_shared_cache
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY = 'codejob:{}'
+SLOT_KEY = 'codejob:slot:{}'
+OWNER_KEY = 'codejob:owner:{}'
+# How often a dispatcher retries for a free slot and a poller re-reads a job
+POLL_INTERVAL = 0.05
+
+
+class QueueFull(Exception):
+    """Backpressure: the job was not queued, retry after retry_after seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ('id', 'owner', 'code', 'inputs', 'done')
+
+    def __init__(self, owner, code, inputs):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.code = code
+        self.inputs = inputs
+        self.done = threading.Event()
+
+
+class CodeJobQueue:
+    """Fair in-process queue with cache-backed limits and results"""
+
+    def __init__(self, concurrency=8, workers=4, max_queued=100, per_user=2, result_timeout=300, run_timeout=5):
+        self.concurrency = concurrency
+        self.workers = workers
+        self.max_queued = max_queued
+        self.per_user = per_user
+        self.result_timeout = result_timeout
+        self.run_timeout = run_timeout
+        self._cond = threading.Condition()
+        self._owners = OrderedDict()   # owner -> deque of queued jobs, in round-robin order
+        self._queued = 0
+        self._local = {}               # job id -> _Job, while this process has it
+        self._pid = None
+
+    # -- Submitting ---------------------------------------------------------
+
+    def submit(self, owner, code, inputs=''):
+        """Queue a program and return its job id; raises QueueFull instead of waiting"""
+        self._ensure_started()
+        with self._cond:
+            if self._queued >= self.max_queued:
+                raise QueueFull('The code runner is busy, try again in a moment', retry_after=2)
+
+        owner_key = OWNER_KEY.format(owner)
+        # Expires on its own if a process dies before giving its jobs back
+        if cache.add(owner_key, 1, self.result_timeout):
+            running = 1
+        else:
+            try:
+                running = cache.incr(owner_key)
+            except ValueError:
+                # Expired since add(); this job starts a new count
+                cache.set(owner_key, 1, self.result_timeout)
+                running = 1
+        if running > self.per_user:
+            try:
+                cache.decr(owner_key)
+            except ValueError:
+                pass
+            raise QueueFull('Wait for your previous run to finish', retry_after=1)
+
+        job = _Job(owner, code, inputs)
+        cache.set(JOB_KEY.format(job.id), {'owner': owner, 'status': 'queued'}, self.result_timeout)
+        with self._cond:
+            self._owners.setdefault(owner, deque()).append(job)
+            self._queued += 1
+            self._local[job.id] = job
+            self._cond.notify()
+        return job.id
+
+    # -- Results ------------------------------------------------------------
+
+    def get(self, job_id, owner, wait=0):
+        """
+        State of the owner's job, {'status', and 'result' once done}; waits up
+        to `wait` seconds for it to finish. None for unknown or foreign jobs.
+        """
+        deadline = time.monotonic() + wait
+        job = self._local.get(job_id)
+        if job is not None:
+            job.done.wait(wait)
+        while True:
+            state = cache.get(JOB_KEY.format(job_id))
+            if state is None or state['owner'] != owner:
+                return None
+            if state['status'] == 'done' or time.monotonic() >= deadline:
+                return state
+            # Taken by another process: nothing to wait on but the cache
+            time.sleep(POLL_INTERVAL)
+
+    # -- Dispatching --------------------------------------------------------
+
+    def _next_job(self):
+        """Oldest job of the owner whose turn it is"""
+        with self._cond:
+            while not self._owners:
+                self._cond.wait()
+            owner, jobs = next(iter(self._owners.items()))
+            job = jobs.popleft()
+            del self._owners[owner]
+            if jobs:
+                # Back of the line until every other owner had a turn
+                self._owners[owner] = jobs
+            self._queued -= 1
+            return job
+
+    def _claim_slot(self, job_id):
+        """Block until one of the global execution slots is ours, return its key"""
+        while True:
+            for i in range(self.concurrency):
+                key = SLOT_KEY.format(i)
+                # Waiting for a pool worker and running can each take run_timeout
+                if cache.add(key, job_id, 2 * self.run_timeout + 5):
+                    return key
+            time.sleep(POLL_INTERVAL)
+
+    def _run(self, job):
+        from .utils import run_python_code
+
+        job_key = JOB_KEY.format(job.id)
+        slot = self._claim_slot(job.id)
+        try:
+            cache.set(job_key, {'owner': job.owner, 'status': 'running'}, self.result_timeout)
+            result = run_python_code(job.code, job.inputs, self.run_timeout)
+            success, output, error, limit = result.success, result.output, result.error, result.limit
+        except Exception as e:
+            logger.exception("Code job %s failed", job.id)
+            success, output, error, limit = False, "", str(e), None
+        finally:
+            cache.delete(slot)
+
+        cache.set(job_key, {
+            'owner': job.owner,
+            'status': 'done',
+            'result': {'success': success, 'output': output, 'error': error, 'limit': limit},
+        }, self.result_timeout)
+        try:
+            cache.decr(OWNER_KEY.format(job.owner))
+        except ValueError:
+            pass
+        job.done.set()
+        with self._cond:
+            self._local.pop(job.id, None)
+
+    def _dispatch(self):
+        while True:
+            self._run(self._next_job())
+
+    def _ensure_started(self):
+        """Start this process's dispatcher threads (again after a fork)"""
+        if self._pid == os.getpid():
+            return
+        if settings.WEB_CONCURRENCY > 1 and not is_shared_cache():
+            # Polls on other workers would 404 and every process would run its own slots
+            raise ImproperlyConfigured(
+                f"Code jobs need a cache shared by all {settings.WEB_CONCURRENCY} workers (see core.E001)"
+            )
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            # Jobs queued before a fork belong to the parent
+            self._owners, self._queued, self._local = OrderedDict(), 0, {}
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._dispatch, name=f'code-job-{i}', daemon=True).start()
+
+
+code_jobs = CodeJobQueue(
+    concurrency=settings.CODE_JOBS_CONCURRENCY,
+    workers=settings.CODE_JOBS_WORKERS,
+    max_queued=settings.CODE_JOBS_MAX_QUEUED,
+    per_user=settings.CODE_JOBS_PER_USER,
+    result_timeout=settings.CODE_JOBS_RESULT_TIMEOUT,
+)
@@ -0,0 +1,73 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from core.models import Module
+from core.runner import CodeRunnerPool
+from core.utils import spawn_python_code
+
+SAMPLES = [
+    ('print("Hello, World!")', ''),
+    ('name = input()\nprint(f"Halo, {name}!")', 'Budi\n'),
+    ('total = sum(i * i for i in range(10000))\nprint(total)', ''),
+    ('import json, re\nprint(json.dumps(re.findall(r"\\d+", "a1b22c333")))', ''),
+    ('def f(n):\n    return 1 / n\nprint(f(0))', ''),
+]
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Compares p50/p99 latency of the warm code runner pool with spawning an interpreter per run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=200, help='Programs run per path')
+        parser.add_argument('--concurrency', type=int, default=8, help='Runs in flight at once, like a class clicking Run')
+        parser.add_argument('--pool-size', type=int, default=4, help='Workers in the pool under test')
+        parser.add_argument('--max-jobs', type=int, default=100, help='Jobs before a worker is recycled')
+
+    def _measure(self, run, programs, concurrency):
+        def timed(program):
+            started = time.perf_counter()
+            result = run(*program)
+            return time.perf_counter() - started, result
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            timings = list(executor.map(timed, programs))
+        return time.perf_counter() - started, [t for t, _ in timings], [r for _, r in timings]
+
+    def handle(self, *args, **options):
+        samples = SAMPLES + [(code, '') for code in Module.objects.exclude(starter_code='').values_list('starter_code', flat=True)[:20]]
+        programs = [samples[i % len(samples)] for i in range(max(1, options['runs']))]
+        concurrency = max(1, options['concurrency'])
+        self.stdout.write(f'Running {len(programs)} programs ({len(samples)} distinct), {concurrency} at a time...')
+
+        # Private pool, so the benchmark doesn't share workers with the app
+        pool = CodeRunnerPool(size=options['pool_size'], max_jobs=options['max_jobs'])
+        pool.run('pass', '', 5)
+        time.sleep(0.5)  # let every worker finish booting
+
+        spawn_total, spawn, expected = self._measure(lambda code, inputs: spawn_python_code(code, inputs), programs, concurrency)
+        pool_total, pooled, results = self._measure(lambda code, inputs: pool.run(code, inputs, 5), programs, concurrency)
+        pool.shutdown()
+
+        # Tracebacks name a different file, compare what the student sees otherwise
+        differing = sum(1 for a, b in zip(expected, results) if a[:2] != b[:2])
+        if differing:
+            self.stdout.write(self.style.ERROR(f'  ✗ {differing} results differ between the two paths'))
+            return
+
+        for label, total, timings in (('spawn per run', spawn_total, spawn), (f"pool of {options['pool_size']}", pool_total, pooled)):
+            self.stdout.write(
+                f'  {label:<16} p50 {_percentile(timings, 50) * 1000:7.1f} ms  '
+                f'p99 {_percentile(timings, 99) * 1000:7.1f} ms  '
+                f'mean {statistics.mean(timings) * 1000:7.1f} ms  {len(timings) / total:7.0f} runs/s'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'  ✓ Pool p50 is {_percentile(spawn, 50) / _percentile(pooled, 50):.1f}x, '
+            f'p99 {_percentile(spawn, 99) / _percentile(pooled, 99):.1f}x faster than spawning'
+        ))
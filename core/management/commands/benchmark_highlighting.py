@@ -0,0 +1,125 @@
+import random
+import time
+import markdown
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+from core.highlighting import CachedHighlightExtension, HighlightCache
+from core.models import Module
+from core.rendering import MARKDOWN_EXTENSION_CONFIGS, MARKDOWN_EXTENSIONS
+
+# Building blocks of the synthetic corpus: lessons reuse the same setup and
+# example snippets, and each also has code of its own
+SHARED_SNIPPETS = [
+    ('python', 'name = input("Nama: ")\nprint(f"Halo, {name}!")'),
+    ('python', 'def faktorial(n):\n    if n <= 1:\n        return 1\n    return n * faktorial(n - 1)\n\nprint(faktorial(5))'),
+    ('python', 'angka = [3, 1, 4, 1, 5, 9, 2, 6]\nangka.sort()\nfor i, x in enumerate(angka):\n    print(i, x)'),
+    ('javascript', 'const items = [1, 2, 3];\nconst doubled = items.map((x) => x * 2);\nconsole.log(doubled);'),
+    ('sql', 'SELECT c.title, COUNT(e.id) AS students\nFROM course c\nLEFT JOIN enrollment e ON e.course_id = c.id\nGROUP BY c.id;'),
+    ('bash', 'python -m venv venv\nsource venv/bin/activate\npip install -r requirements.txt'),
+]
+
+
+def synthetic_contents(modules=200, seed=0):
+    """Module Markdown with shared and unique fenced blocks, the same on every run"""
+    rng = random.Random(seed)
+    contents = []
+    for i in range(modules):
+        parts = [f'# Materi {i + 1}', 'Penjelasan singkat sebelum contoh kode. ' * 5]
+        for lang, code in rng.sample(SHARED_SNIPPETS, 3):
+            parts.append(f'```{lang}\n{code}\n```')
+        parts.append('Latihan untuk materi ini:')
+        parts.append(
+            f'```python\ndef latihan_{i}(data):\n    total = 0\n    for x in data:\n'
+            f'        total += x * {i + 1}\n    return total\n\nprint(latihan_{i}(range({rng.randint(5, 50)})))\n```'
+        )
+        contents.append('\n\n'.join(parts))
+    return contents
+
+
+def count_blocks(contents):
+    return sum(len(FencedBlockPreprocessor.FENCED_BLOCK_RE.findall(c)) for c in contents)
+
+
+class Command(BaseCommand):
+    help = 'Measures Markdown rendering of all module content with and without the highlight cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=3, help='Warm passes over the content')
+        parser.add_argument('--memory-entries', type=int, default=2048, help='LRU size of the cache under test')
+        parser.add_argument(
+            '--synthetic', type=int, metavar='MODULES', default=0,
+            help='Render this many generated modules instead of the database content'
+        )
+
+    def _run(self, contents, make_md):
+        md = make_md()
+        started = time.perf_counter()
+        html = [md.reset().convert(content) for content in contents]
+        return time.perf_counter() - started, html
+
+    def handle(self, *args, **options):
+        if options['synthetic']:
+            contents = synthetic_contents(options['synthetic'])
+            source = 'generated'
+        else:
+            contents = [c for c in Module.objects.values_list('content', flat=True) if c]
+            source = 'database'
+        blocks = count_blocks(contents)
+        if not blocks:
+            # Nothing for the cache to do, any speedup would be noise
+            raise CommandError(
+                f'No fenced code blocks in {len(contents)} {source} modules; '
+                'use --synthetic 200 to benchmark on a generated corpus'
+            )
+        self.stdout.write(f'Rendering {len(contents)} {source} modules ({blocks} fenced blocks)...')
+
+        # Private store, so the benchmark neither reads nor fills the real cache
+        cache = HighlightCache(
+            max_entries=options['memory_entries'],
+            store=LocMemCache('highlight-benchmark', {'TIMEOUT': None, 'OPTIONS': {'MAX_ENTRIES': 100000}})
+        )
+
+        def plain():
+            return markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, extension_configs=MARKDOWN_EXTENSION_CONFIGS)
+
+        def cached():
+            return markdown.Markdown(
+                extensions=MARKDOWN_EXTENSIONS + [CachedHighlightExtension(cache=cache)],
+                extension_configs=MARKDOWN_EXTENSION_CONFIGS
+            )
+
+        rounds = range(max(1, options['rounds']))
+        # First pass loads Pygments lexers, keep it out of the baseline
+        _, expected = self._run(contents, plain)
+        baseline = min(self._run(contents, plain)[0] for _ in rounds)
+
+        cold, html = self._run(contents, cached)
+        if html != expected:
+            self.stdout.write(self.style.ERROR('  ✗ Cached output differs from plain Markdown'))
+            return
+        cold_stats = cache.stats
+
+        store_only = []
+        for _ in rounds:
+            cache.clear_memory()
+            store_only.append(self._run(contents, cached)[0])
+        store_only = min(store_only)
+        warm = min(self._run(contents, cached)[0] for _ in rounds)
+
+        rows = [
+            ('codehilite (no cache)', baseline),
+            ('cached, cold', cold),
+            ('cached, empty LRU + store', store_only),
+            ('cached, warm LRU', warm),
+        ]
+        for label, seconds in rows:
+            self.stdout.write(
+                f'  {label:<32} {seconds * 1000:9.1f} ms  '
+                f'{len(contents) / seconds:9.0f} modules/s  {blocks / seconds:9.0f} blocks/s'
+            )
+        self.stdout.write(
+            f"  cold pass: {cold_stats['misses']} unique blocks highlighted, "
+            f"{cold_stats['hit_ratio']:.1%} of lookups already shared across modules"
+        )
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Warm cache is {baseline / warm:.1f}x faster than no cache'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from core.models import Enrollment
+from core.progress import SUMMARY_FIELDS, check_progress_summary, refresh_progress_summary
+
+
+class Command(BaseCommand):
+    help = 'Checks the denormalized progress summary of enrollments against module_completions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help='Only check enrollments of this course')
+        parser.add_argument('--fix', action='store_true', help='Recompute the rows that are out of date')
+
+    def handle(self, *args, **options):
+        enrollments = Enrollment.objects.all()
+        if options['course']:
+            enrollments = enrollments.filter(course_id=options['course'])
+
+        self.stdout.write('Checking progress summaries...')
+        fields = ', '.join(SUMMARY_FIELDS[:3])
+        mismatched = []
+        for enrollment_id, stored, expected in check_progress_summary(enrollments):
+            mismatched.append(enrollment_id)
+            self.stdout.write(self.style.WARNING(f'  ✗ Enrollment {enrollment_id}: ({fields}) is {stored}, expected {expected}'))
+
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS(f'  ✓ {enrollments.count()} enrollments up to date'))
+            return
+
+        if options['fix']:
+            fixed = refresh_progress_summary(Enrollment.objects.filter(id__in=mismatched))
+            self.stdout.write(self.style.SUCCESS(f'  ✓ Recomputed {fixed} enrollments'))
+        else:
+            self.stdout.write(f'  {len(mismatched)} out of date, run with --fix to recompute them')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from core.code_cache import code_result_cache
+
+
+class Command(BaseCommand):
+    help = 'Shows the hit ratio and saved CPU time of the code execution result cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = code_result_cache.stats
+        self.stdout.write('Code result cache:')
+        self.stdout.write(f"  hits:              {stats['hits']}")
+        self.stdout.write(f"  misses:            {stats['misses']}")
+        self.stdout.write(f"  not cacheable:     {stats['uncacheable']}")
+        self.stdout.write(f"  saved CPU:         {stats['saved_cpu_seconds']:.2f} s")
+        self.stdout.write(self.style.SUCCESS(f"  ✓ Hit ratio {stats['hit_ratio']:.1%}"))
+
+        if options['reset']:
+            code_result_cache.reset_stats()
+            self.stdout.write('  Counters reset')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core.quiz_buffer import quiz_buffer
+
+
+class Command(BaseCommand):
+    help = 'Writes the quiz saves waiting in the write-behind buffer to the database'
+
+    def handle(self, *args, **options):
+        if not quiz_buffer.enabled:
+            self.stdout.write('Quiz buffer is disabled (QUIZ_BUFFER_FLUSH_INTERVAL=0 or the default cache is not Redis), nothing to flush')
+            return
+
+        self.stdout.write('Flushing quiz buffer...')
+        written = quiz_buffer.flush()
+        self.stdout.write(self.style.SUCCESS(f'  ✓ {written} enrollments written'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from core.images import generate_derivatives
+from core.models import Course, Module
+
+
+class Command(BaseCommand):
+    help = 'Generates resized WebP/JPEG variants of course thumbnails and module images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-encode derivatives that already exist')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Generating image derivatives...')
+
+        sources = (
+            (Course.objects.exclude(thumbnail='').exclude(thumbnail__isnull=True).only('id', 'thumbnail'), 'thumbnail'),
+            (Module.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image'), 'image'),
+        )
+        done = failed = 0
+        for queryset, field in sources:
+            for obj in queryset.iterator(chunk_size=200):
+                if generate_derivatives(getattr(obj, field), force=options['force']) is None:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'  ! {obj._meta.model_name} {obj.pk}: unreadable image'))
+                else:
+                    done += 1
+
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Processed {done} images ({failed} skipped)'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from core.models import CourseStats
+from core.stats import COUNTER_FIELDS, compute_course_stats
+
+
+class Command(BaseCommand):
+    help = 'Reconciles the CourseStats projection with enrollments, results and certificates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconciling course stats...')
+        fields = COUNTER_FIELDS + ('revenue',)
+
+        with transaction.atomic():
+            expected = compute_course_stats()
+            current = {row['course_id']: row for row in CourseStats.objects.values('course_id', *fields)}
+
+            drifted = [
+                course_id for course_id, values in expected.items()
+                if course_id not in current or any(current[course_id][f] != values[f] for f in fields)
+            ]
+            for course_id in drifted:
+                self.stdout.write(f'  - course {course_id}: {current.get(course_id)} -> {expected[course_id]}')
+
+            if not options['dry_run'] and drifted:
+                # MySQL upserts on any unique key and rejects an explicit target
+                target = ['course'] if connection.features.supports_update_conflicts_with_target else None
+                CourseStats.objects.bulk_create(
+                    [CourseStats(**expected[course_id]) for course_id in drifted],
+                    update_conflicts=True,
+                    unique_fields=target,
+                    update_fields=list(fields),
+                    batch_size=500
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'  ✓ {len(expected)} courses checked, {len(drifted)} corrected'))
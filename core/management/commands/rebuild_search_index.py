@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import Course, Module, SearchPosting
+from core.search import course_postings, module_postings
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the course/module search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows read and postings written per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write('Rebuilding search index...')
+
+        with transaction.atomic():
+            SearchPosting.objects.all().delete()
+
+            total = 0
+            pending = []
+            courses = Course.objects.only('id', 'title', 'description').order_by('id')
+            modules = Module.objects.only('id', 'course_id', 'title', 'content').order_by('id')
+
+            for queryset, build in ((courses, course_postings), (modules, module_postings)):
+                for obj in queryset.iterator(chunk_size=batch_size):
+                    pending.extend(build(obj))
+                    if len(pending) >= batch_size:
+                        SearchPosting.objects.bulk_create(pending, batch_size=batch_size)
+                        total += len(pending)
+                        pending = []
+
+            SearchPosting.objects.bulk_create(pending, batch_size=batch_size)
+            total += len(pending)
+
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Indexed {total} postings'))
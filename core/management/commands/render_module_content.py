@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from core.models import Module
+from core.rendering import prerender
+
+
+class Command(BaseCommand):
+    help = 'Pre-renders the Markdown content of modules whose cached HTML is stale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-render every module, even if up to date')
+        parser.add_argument('--batch-size', type=int, default=200, help='Modules written per UPDATE batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write('Rendering module content...')
+
+        total = rendered = 0
+        pending = []
+        modules = Module.objects.only('id', 'content', 'content_html', 'content_html_key').order_by('id')
+        for module in modules.iterator(chunk_size=batch_size):
+            total += 1
+            if prerender(module, force=options['force']):
+                pending.append(module)
+            if len(pending) >= batch_size:
+                Module.objects.bulk_update(pending, ['content_html', 'content_html_key'])
+                rendered += len(pending)
+                pending = []
+
+        Module.objects.bulk_update(pending, ['content_html', 'content_html_key'])
+        rendered += len(pending)
+
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Rendered {rendered} of {total} modules'))
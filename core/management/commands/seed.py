@@ -6,8 +6,9 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from core.models import (
     Course, Module, Enrollment, Assessment, Question, Choice,
-    AssessmentResult, Certificate, Commission, CommissionRate
+    AssessmentResult, Certificate, Commission, CommissionRate, ModuleCompletion
 )
+from core.progress import refresh_progress_summary
 from decimal import Decimal
 import random
 
@@ -349,11 +350,14 @@ class Command(BaseCommand):
                     user=student,
                     course=course,
                     payment_status='completed',
-                    progress={'completed_modules': completed},
                     completed=len(completed) == len(all_modules),
                 )
+                ModuleCompletion.objects.bulk_create(
+                    ModuleCompletion(enrollment=enrollment, module_id=module_id) for module_id in completed
+                )
                 enrollments.append(enrollment)
-        
+
+        refresh_progress_summary(Enrollment.objects.filter(id__in=[e.id for e in enrollments]))
         return enrollments
 
     def create_commission_rates(self, courses):
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from core.warmup import STAGES, warm
+
+
+class Command(BaseCommand):
+    help = 'Warms templates, URL resolvers, Markdown, ReportLab fonts and office imports after a deploy'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stage', action='append', choices=[name for name, _ in STAGES],
+            help='Only run this stage (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Warming up...')
+
+        report = warm(options['stage'])
+        for name, seconds, result, error in report:
+            if error is None:
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {name}: {seconds * 1000:.1f} ms ({result})'))
+            else:
+                self.stdout.write(self.style.ERROR(f'  ✗ {name}: {seconds * 1000:.1f} ms ({error})'))
+
+        total = sum(seconds for _, seconds, _, _ in report)
+        self.stdout.write(f'  Total: {total * 1000:.1f} ms')
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.11 on 2026-10-17 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_remove_assessment_questions_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='courses_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_active', 'level', 'created_at', 'id'], name='courses_active_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_active', 'price', 'created_at', 'id'], name='courses_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_active', 'level', 'price', 'created_at', 'id'], name='courses_active_lvl_price_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-17 06:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_course_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='core.course')),
+                ('module', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='core.module')),
+            ],
+            options={
+                'db_table': 'search_postings',
+                'indexes': [models.Index(fields=['term', 'course', 'weight'], name='search_term_course_idx'), models.Index(fields=['course', 'term', 'module', 'weight'], name='search_course_term_idx')],
+            },
+        ),
+    ]
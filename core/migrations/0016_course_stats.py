@@ -0,0 +1,60 @@
+# Generated by Django 5.2.11 on 2026-10-17 06:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_course_stats(apps, schema_editor):
+    """Initial fill, later drift is fixed with `manage.py rebuild_course_stats`"""
+    Course = apps.get_model('core', 'Course')
+    CourseStats = apps.get_model('core', 'CourseStats')
+    Enrollment = apps.get_model('core', 'Enrollment')
+    AssessmentResult = apps.get_model('core', 'AssessmentResult')
+    Certificate = apps.get_model('core', 'Certificate')
+
+    stats = {cid: CourseStats(course_id=cid) for cid in Course.objects.values_list('id', flat=True)}
+    prices = dict(Course.objects.values_list('id', 'price'))
+
+    paid = Enrollment.objects.filter(payment_status='completed').values('course_id')
+    for row in paid.annotate(n=Count('id'), done=Count('id', filter=Q(completed=True))):
+        row_stats = stats[row['course_id']]
+        row_stats.enrollment_count = row['n']
+        row_stats.completed_count = row['done']
+        row_stats.revenue = prices[row['course_id']] * row['n']
+    for row in AssessmentResult.objects.values('assessment__course_id').annotate(n=Count('id'), total=Sum('score')):
+        row_stats = stats[row['assessment__course_id']]
+        row_stats.assessment_attempts = row['n']
+        row_stats.assessment_score_total = row['total'] or 0
+    for row in Certificate.objects.values('course_id').annotate(n=Count('id')):
+        stats[row['course_id']].certificate_count = row['n']
+
+    CourseStats.objects.bulk_create(stats.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_search_postings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.course')),
+                ('enrollment_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('assessment_attempts', models.IntegerField(default=0)),
+                ('assessment_score_total', models.BigIntegerField(default=0)),
+                ('certificate_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'course_stats',
+                'indexes': [models.Index(fields=['-enrollment_count'], name='course_stats_enrollments_idx')],
+            },
+        ),
+        migrations.RunPython(populate_course_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-17 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_module_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='module',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='content_html_key',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
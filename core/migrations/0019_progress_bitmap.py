@@ -0,0 +1,108 @@
+# Generated by Django 5.2.11 on 2026-10-17 06:40
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def _to_bytes(bits):
+    value = 0
+    for bit in bits:
+        value |= 1 << bit
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def assign_progress_bits(apps, schema_editor):
+    """Number each course's modules 0..n-1 in outline order"""
+    Module = apps.get_model('core', 'Module')
+    changed = []
+    bit, course_id = 0, None
+    for module in Module.objects.order_by('course_id', 'order', 'id').only('id', 'course_id').iterator(chunk_size=BATCH_SIZE):
+        if module.course_id != course_id:
+            bit, course_id = 0, module.course_id
+        module.progress_bit = bit
+        bit += 1
+        changed.append(module)
+        if len(changed) >= BATCH_SIZE:
+            Module.objects.bulk_update(changed, ['progress_bit'])
+            changed = []
+    Module.objects.bulk_update(changed, ['progress_bit'])
+
+
+def completed_modules_to_bits(apps, schema_editor):
+    """progress['completed_modules'] (module ids) -> completed_bits"""
+    Module = apps.get_model('core', 'Module')
+    Enrollment = apps.get_model('core', 'Enrollment')
+    bits = dict(Module.objects.values_list('id', 'progress_bit'))
+    course_of = dict(Module.objects.values_list('id', 'course_id'))
+
+    changed = []
+    for enrollment in Enrollment.objects.only('id', 'course_id', 'progress').iterator(chunk_size=BATCH_SIZE):
+        progress = enrollment.progress if isinstance(enrollment.progress, dict) else {}
+        completed = progress.pop('completed_modules', None)
+        if completed is None:
+            continue
+        enrollment.completed_bits = _to_bytes(
+            bits[module_id] for module_id in completed
+            # Ids of deleted modules or of other courses are dropped
+            if module_id in bits and course_of[module_id] == enrollment.course_id
+        )
+        enrollment.progress = progress
+        changed.append(enrollment)
+        if len(changed) >= BATCH_SIZE:
+            Enrollment.objects.bulk_update(changed, ['completed_bits', 'progress'])
+            changed = []
+    Enrollment.objects.bulk_update(changed, ['completed_bits', 'progress'])
+
+
+def bits_to_completed_modules(apps, schema_editor):
+    Module = apps.get_model('core', 'Module')
+    Enrollment = apps.get_model('core', 'Enrollment')
+    by_bit = {(course_id, bit): module_id for module_id, course_id, bit in Module.objects.values_list('id', 'course_id', 'progress_bit')}
+
+    changed = []
+    for enrollment in Enrollment.objects.only('id', 'course_id', 'progress', 'completed_bits').iterator(chunk_size=BATCH_SIZE):
+        value = int.from_bytes(bytes(enrollment.completed_bits or b''), 'little')
+        progress = enrollment.progress if isinstance(enrollment.progress, dict) else {}
+        progress['completed_modules'] = [
+            by_bit[(enrollment.course_id, bit)]
+            for bit in range(value.bit_length())
+            if value >> bit & 1 and (enrollment.course_id, bit) in by_bit
+        ]
+        enrollment.progress = progress
+        changed.append(enrollment)
+        if len(changed) >= BATCH_SIZE:
+            Enrollment.objects.bulk_update(changed, ['progress'])
+            changed = []
+    Enrollment.objects.bulk_update(changed, ['progress'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_module_content_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='module',
+            name='progress_bit',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_bits',
+            field=models.BinaryField(blank=True, default=bytes),
+        ),
+        migrations.RunPython(assign_progress_bits, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='module',
+            name='progress_bit',
+            field=models.PositiveIntegerField(editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name='module',
+            constraint=models.UniqueConstraint(fields=('course', 'progress_bit'), name='modules_course_progress_bit_uniq'),
+        ),
+        migrations.RunPython(completed_modules_to_bits, bits_to_completed_modules),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.11 on 2026-10-17 06:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from datetime import datetime
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+
+def _completed_at(enrollment, module_id):
+    """The saved quiz time of the module if there is one, else the enrollment date"""
+    quiz = (enrollment.progress or {}).get('quiz_data', {}).get(str(module_id)) or {}
+    try:
+        value = datetime.fromisoformat(quiz['completed_at'])
+    except (KeyError, TypeError, ValueError):
+        return enrollment.enrolled_at
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def bits_to_completions(apps, schema_editor):
+    """completed_bits -> one ModuleCompletion row per set bit"""
+    Module = apps.get_model('core', 'Module')
+    Enrollment = apps.get_model('core', 'Enrollment')
+    ModuleCompletion = apps.get_model('core', 'ModuleCompletion')
+    by_bit = {(course_id, bit): module_id for module_id, course_id, bit in Module.objects.values_list('id', 'course_id', 'progress_bit')}
+
+    rows = []
+    enrollments = Enrollment.objects.only('id', 'course_id', 'enrolled_at', 'progress', 'completed_bits')
+    for enrollment in enrollments.iterator(chunk_size=BATCH_SIZE):
+        value = int.from_bytes(bytes(enrollment.completed_bits or b''), 'little')
+        for bit in range(value.bit_length()):
+            module_id = by_bit.get((enrollment.course_id, bit))
+            if value >> bit & 1 and module_id is not None:
+                rows.append(ModuleCompletion(
+                    enrollment_id=enrollment.id,
+                    module_id=module_id,
+                    completed_at=_completed_at(enrollment, module_id)
+                ))
+        if len(rows) >= BATCH_SIZE:
+            ModuleCompletion.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    ModuleCompletion.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def completions_to_bits(apps, schema_editor):
+    Enrollment = apps.get_model('core', 'Enrollment')
+    ModuleCompletion = apps.get_model('core', 'ModuleCompletion')
+
+    changed = []
+    enrollment_id, value = None, 0
+    rows = ModuleCompletion.objects.order_by('enrollment_id').values_list('enrollment_id', 'module__progress_bit')
+    for row_enrollment_id, bit in rows.iterator(chunk_size=BATCH_SIZE):
+        if row_enrollment_id != enrollment_id:
+            if enrollment_id is not None:
+                changed.append(Enrollment(id=enrollment_id, completed_bits=value.to_bytes((value.bit_length() + 7) // 8, 'little')))
+            enrollment_id, value = row_enrollment_id, 0
+        value |= 1 << bit
+        if len(changed) >= BATCH_SIZE:
+            Enrollment.objects.bulk_update(changed, ['completed_bits'])
+            changed = []
+    if enrollment_id is not None:
+        changed.append(Enrollment(id=enrollment_id, completed_bits=value.to_bytes((value.bit_length() + 7) // 8, 'little')))
+    Enrollment.objects.bulk_update(changed, ['completed_bits'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_progress_bitmap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModuleCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='core.enrollment')),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='core.module')),
+            ],
+            options={
+                'db_table': 'module_completions',
+                'constraints': [models.UniqueConstraint(fields=('enrollment', 'module'), name='module_completions_enrollment_module_uniq')],
+            },
+        ),
+        migrations.RunPython(bits_to_completions, completions_to_bits),
+        migrations.RemoveField(
+            model_name='enrollment',
+            name='completed_bits',
+        ),
+    ]
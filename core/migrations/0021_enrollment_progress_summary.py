@@ -0,0 +1,76 @@
+# Generated by Django 5.2.11 on 2026-10-17 06:28
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def fill_progress_summary(apps, schema_editor):
+    """Summary columns of every enrollment, from module_completions"""
+    Module = apps.get_model('core', 'Module')
+    Enrollment = apps.get_model('core', 'Enrollment')
+    ModuleCompletion = apps.get_model('core', 'ModuleCompletion')
+
+    outlines = defaultdict(list)
+    for module_id, course_id in Module.objects.order_by('order', 'id').values_list('id', 'course_id'):
+        outlines[course_id].append(module_id)
+
+    changed = []
+    for enrollment in Enrollment.objects.only('id', 'course_id').iterator(chunk_size=BATCH_SIZE):
+        changed.append(enrollment)
+        if len(changed) >= BATCH_SIZE:
+            _fill(changed, outlines, Enrollment, ModuleCompletion)
+            changed = []
+    _fill(changed, outlines, Enrollment, ModuleCompletion)
+
+
+def _fill(enrollments, outlines, Enrollment, ModuleCompletion):
+    done, last = defaultdict(set), {}
+    rows = ModuleCompletion.objects.filter(enrollment_id__in=[e.id for e in enrollments])
+    for enrollment_id, module_id, completed_at in rows.values_list('enrollment_id', 'module_id', 'completed_at'):
+        done[enrollment_id].add(module_id)
+        last[enrollment_id] = max(last.get(enrollment_id, completed_at), completed_at)
+
+    for enrollment in enrollments:
+        outline = outlines.get(enrollment.course_id, [])
+        completed = done[enrollment.id]
+        enrollment.completed_count = len(completed)
+        enrollment.progress_percent = len(completed) * 100 // len(outline) if outline else 0
+        enrollment.next_module_id = next((m for m in outline if m not in completed), None)
+        enrollment.last_activity_at = last.get(enrollment.id)
+    Enrollment.objects.bulk_update(
+        enrollments, ['completed_count', 'progress_percent', 'next_module', 'last_activity_at']
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_module_completions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='next_module',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.module'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='progress_percent',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_progress_summary, migrations.RunPython.noop),
+    ]
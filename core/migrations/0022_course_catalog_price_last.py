@@ -0,0 +1,38 @@
+# Generated by Django 5.2.11 on 2026-10-17 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_enrollment_progress_summary'),
+    ]
+
+    # New indexes first, so the catalog is never without one
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_active', 'created_at', 'id', 'price'], name='courses_active_created_prc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_active', 'level', 'created_at', 'id', 'price'], name='courses_active_level_prc_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='course',
+            name='courses_active_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='course',
+            name='courses_active_level_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='course',
+            name='courses_active_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='course',
+            name='courses_active_lvl_price_idx',
+        ),
+    ]
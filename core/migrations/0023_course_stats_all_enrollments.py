@@ -0,0 +1,37 @@
+# Generated by Django 5.2.11 on 2026-10-17 07:13
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_all_enrollment_counts(apps, schema_editor):
+    """Counts over every enrollment, whatever its payment status"""
+    CourseStats = apps.get_model('core', 'CourseStats')
+    Enrollment = apps.get_model('core', 'Enrollment')
+
+    rows = Enrollment.objects.values('course_id').annotate(n=Count('id'), done=Count('id', filter=Q(completed=True)))
+    for row in rows.order_by():
+        CourseStats.objects.filter(course_id=row['course_id']).update(
+            all_enrollment_count=row['n'], all_completed_count=row['done']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_course_catalog_price_last'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='all_completed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='all_enrollment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_all_enrollment_counts, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,46 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 import secrets
 import string
 
 
+class LoadedStateMixin:
+    """Remember selected field values as loaded from the database, so
+    post_save handlers can tell what actually changed"""
+    tracked_fields = ()
+    # The text the search index is built from (core.search), remembered apart
+    indexed_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_state()
+        instance.remember_indexed()
+        return instance
+
+    def remember_indexed(self):
+        self._indexed_state = {f: self.__dict__.get(f) for f in self.indexed_fields}
+
+    def indexed_changed(self, update_fields=None):
+        """True if a save may have changed the indexed text"""
+        if update_fields is not None and not {f.removesuffix('_id') for f in self.indexed_fields} & set(update_fields):
+            return False
+        return getattr(self, '_indexed_state', None) != {f: self.__dict__.get(f) for f in self.indexed_fields}
+
+    def remember_state(self):
+        self._loaded_state = {f: self.__dict__.get(f) for f in self.tracked_fields}
+
+    @property
+    def loaded_state(self):
+        return getattr(self, '_loaded_state', None)
+
+    @property
+    def current_state(self):
+        return {f: self.__dict__.get(f) for f in self.tracked_fields}
+
+
 class User(AbstractUser):
     """Extended user model with email verification"""
     ROLE_CHOICES = [
@@ -39,7 +76,26 @@ class User(AbstractUser):
         super().save(*args, **kwargs)
 
 
-class Course(models.Model):
+class CourseQuerySet(models.QuerySet):
+    """Listing helpers that fold per-course counts into the main query"""
+
+    def with_counts(self):
+        """Annotate module_count and enrollment_count (completed payments)"""
+        # Correlated subqueries instead of JOIN + GROUP BY keep the outer
+        # query a plain index range scan, so LIMIT stops early
+        modules = Module.objects.filter(
+            course=models.OuterRef('pk')
+        ).order_by().values('course').annotate(n=models.Count('id')).values('n')
+        enrollments = Enrollment.objects.filter(
+            course=models.OuterRef('pk'), payment_status='completed'
+        ).order_by().values('course').annotate(n=models.Count('id')).values('n')
+        return self.annotate(
+            module_count=Coalesce(models.Subquery(modules), 0),
+            enrollment_count=Coalesce(models.Subquery(enrollments), 0),
+        )
+
+
+class Course(LoadedStateMixin, models.Model):
     """Course model"""
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -56,9 +112,22 @@ class Course(models.Model):
         ('advanced', 'Advanced')
     ], default='beginner')
 
+    objects = CourseQuerySet.as_manager()
+
+    indexed_fields = ('title', 'description')
+
     class Meta:
         db_table = 'courses'
         ordering = ['-created_at']
+        # Catalog filters always lead with is_active and page on (created_at, id).
+        # An index can't seek a price range and still return that order, so
+        # price comes last: a page walks the index from the cursor, checks the
+        # price in the index entry and stops after page_size matches. Its cost
+        # depends on how many courses match the price range, not on the depth.
+        indexes = [
+            models.Index(fields=['is_active', 'created_at', 'id', 'price'], name='courses_active_created_prc_idx'),
+            models.Index(fields=['is_active', 'level', 'created_at', 'id', 'price'], name='courses_active_level_prc_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -69,7 +138,7 @@ class Course(models.Model):
         return self.price
 
 
-class Module(models.Model):
+class Module(LoadedStateMixin, models.Model):
     """Course module/lesson"""
     CONTENT_TYPES = [
         ('text', 'Text'),
@@ -97,15 +166,71 @@ class Module(models.Model):
     # Optional Quiz Data
     quiz_data = models.JSONField(default=list, blank=True)  # List of {question, options, correct_answer}
 
+    # Rendered Markdown, see core.rendering
+    content_html = models.TextField(blank=True, editable=False)
+    content_html_key = models.CharField(max_length=64, blank=True, editable=False)
+
+    # Position in an enrollment's ProgressBitmap, stable across reordering
+    progress_bit = models.PositiveIntegerField(editable=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Adding, moving or reordering modules changes enrollment progress summaries
+    tracked_fields = ('course_id', 'order')
+    indexed_fields = ('course_id', 'title', 'content')
+
     class Meta:
         db_table = 'modules'
         ordering = ['order']
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'progress_bit'], name='modules_course_progress_bit_uniq'),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .rendering import prerender
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            if prerender(self) and update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'content_html', 'content_html_key'}
+
+        if self.progress_bit is not None:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            # Modules added to one course at once wait on the course row, so
+            # each reads the highest bit after the previous one is inserted
+            list(Course.objects.select_for_update().filter(id=self.course_id).values_list('id', flat=True))
+            last_bit = Module.objects.filter(course_id=self.course_id).aggregate(
+                last=models.Max('progress_bit')
+            )['last']
+            self.progress_bit = 0 if last_bit is None else last_bit + 1
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
 
-class Enrollment(models.Model):
+class EnrollmentQuerySet(models.QuerySet):
+    """Enrollment listing helpers"""
+
+    def with_course_counts(self):
+        """Load each course with its module_count so progress needs no extra query"""
+        return self.prefetch_related(
+            models.Prefetch('course', queryset=Course.objects.with_counts())
+        )
+
+    def with_completions(self):
+        """Prefetch completed modules (with their progress bit) for completion_bitmap"""
+        return self.prefetch_related(models.Prefetch(
+            'completions',
+            queryset=ModuleCompletion.objects.annotate(
+                progress_bit=models.F('module__progress_bit')
+            ).only('id', 'enrollment_id', 'module_id')
+        ))
+
+
+class Enrollment(LoadedStateMixin, models.Model):
     """User course enrollment"""
     PAYMENT_STATUS = [
         ('pending', 'Pending'),
@@ -118,16 +243,41 @@ class Enrollment(models.Model):
     access_key = models.CharField(max_length=32, unique=True)
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS, default='pending')
     enrolled_at = models.DateTimeField(auto_now_add=True)
-    progress = models.JSONField(default=dict)  # Track completed modules
+    progress = models.JSONField(default=dict)  # Quiz answers per module
     completed = models.BooleanField(default=False)
 
+    # Progress summary derived from ModuleCompletion, see core.progress
+    completed_count = models.PositiveIntegerField(default=0, editable=False)
+    progress_percent = models.PositiveSmallIntegerField(default=0, editable=False)
+    next_module = models.ForeignKey(
+        'Module', null=True, blank=True, on_delete=models.SET_NULL, related_name='+', editable=False
+    )
+    last_activity_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = EnrollmentQuerySet.as_manager()
+    tracked_fields = ('course_id', 'payment_status', 'completed')
+
     class Meta:
         db_table = 'enrollments'
         unique_together = ['user', 'course']
 
     def save(self, *args, **kwargs):
+        from .progress import SUMMARY_FIELDS
         if not self.access_key:
             self.access_key = self.generate_access_key()
+        if self._state.adding and self.next_module_id is None:
+            # Nothing completed yet: the summary starts at the first module
+            self.next_module_id = (
+                Module.objects.filter(course_id=self.course_id).order_by('order', 'id').values_list('id', flat=True).first()
+            )
+        if kwargs.get('update_fields') is None and not self._state.adding:
+            # The summary is written by refresh_progress_summary() only; a full
+            # save of an instance loaded earlier must not put back stale values
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname not in SUMMARY_FIELDS and f.attname not in deferred
+            ]
         super().save(*args, **kwargs)
 
     @staticmethod
@@ -136,19 +286,55 @@ class Enrollment(models.Model):
         chars = string.ascii_uppercase + string.digits
         return ''.join(secrets.choice(chars) for _ in range(16))
 
+    @property
+    def completion_bitmap(self):
+        """Completed modules as a ProgressBitmap of Module.progress_bit positions"""
+        from .progress import ProgressBitmap
+        if 'completions' in getattr(self, '_prefetched_objects_cache', {}):
+            return ProgressBitmap.from_bits(c.progress_bit for c in self.completions.all())
+        return ProgressBitmap.from_bits(self.completions.values_list('module__progress_bit', flat=True))
+
+    def has_completed(self, module):
+        """Indexed lookup on the (enrollment, module) unique key"""
+        return self.completions.filter(module_id=module.id).exists()
+
+    def mark_completed(self, module):
+        """Record a completion with a single INSERT, return False if it already existed"""
+        from .progress import SUMMARY_FIELDS, refresh_progress_summary
+        try:
+            with transaction.atomic():
+                ModuleCompletion.objects.create(enrollment=self, module_id=module.id)
+        except IntegrityError:
+            return False
+        refresh_progress_summary(Enrollment.objects.filter(id=self.id), touch=True)
+        self.refresh_from_db(fields=SUMMARY_FIELDS)
+        return True
+
     @property
     def progress_percentage(self):
-        """Calculate progress percentage"""
-        total_modules = self.course.modules.count()
-        if total_modules == 0:
-            return 0
-        completed_count = len(self.progress.get('completed_modules', [])) if self.progress else 0
-        return int((completed_count / total_modules) * 100)
+        """Alias of the stored progress_percent, used by the templates"""
+        return self.progress_percent
 
     def __str__(self):
         return f"{self.user.username} - {self.course.title}"
 
 
+class ModuleCompletion(models.Model):
+    """One completed module of an enrollment; the row is the fact, inserts are idempotent"""
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='completions')
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='completions')
+    completed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'module_completions'
+        constraints = [
+            models.UniqueConstraint(fields=['enrollment', 'module'], name='module_completions_enrollment_module_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.enrollment_id} - {self.module_id}"
+
+
 class Assessment(models.Model):
     """Course assessment/quiz"""
     course = models.OneToOneField(Course, on_delete=models.CASCADE, related_name='assessment')
@@ -193,7 +379,7 @@ class Choice(models.Model):
         return f"Choice: {self.text[:50]}..."
 
 
-class AssessmentResult(models.Model):
+class AssessmentResult(LoadedStateMixin, models.Model):
     """User assessment results"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     assessment = models.ForeignKey(Assessment, on_delete=models.CASCADE)
@@ -203,6 +389,8 @@ class AssessmentResult(models.Model):
     passed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(auto_now_add=True)
 
+    tracked_fields = ('assessment_id', 'score')
+
     class Meta:
         db_table = 'assessment_results'
 
@@ -210,7 +398,7 @@ class AssessmentResult(models.Model):
         return f"{self.user.username} - {self.assessment.course.title} - {self.score}%"
 
 
-class Certificate(models.Model):
+class Certificate(LoadedStateMixin, models.Model):
     """Course completion certificate"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -218,6 +406,8 @@ class Certificate(models.Model):
     certificate_id = models.CharField(max_length=100, unique=True)
     issued_at = models.DateTimeField(auto_now_add=True)
 
+    tracked_fields = ('course_id',)
+
     class Meta:
         db_table = 'certificates'
 
@@ -302,3 +492,60 @@ class CommissionRate(models.Model):
         course_str = self.course.title if self.course else "Global"
         rate_display = f"{self.percentage}%" if self.rate_type == 'percentage' else f"Rp {self.flat_amount}"
         return f"{self.get_role_display()} - {course_str}: {rate_display}"
+
+
+class SearchPosting(models.Model):
+    """Inverted index entry: a term found in a course (module is null) or one of its modules"""
+    term = models.CharField(max_length=64)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='search_postings')
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, null=True, blank=True, related_name='search_postings')
+    weight = models.FloatField(default=0)
+
+    class Meta:
+        db_table = 'search_postings'
+        indexes = [
+            # Catalog search: term lookup, grouped by course, weight read from the index
+            models.Index(fields=['term', 'course', 'weight'], name='search_term_course_idx'),
+            # Lesson search inside a single course
+            models.Index(fields=['course', 'term', 'module', 'weight'], name='search_course_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.course_id}/{self.module_id}"
+
+
+class CourseStats(models.Model):
+    """Per-course counters, maintained on write by core.stats"""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    enrollment_count = models.IntegerField(default=0)  # Completed payments
+    completed_count = models.IntegerField(default=0)  # Paid enrollments that passed the course
+    all_enrollment_count = models.IntegerField(default=0)  # Any payment status, pending included
+    all_completed_count = models.IntegerField(default=0)  # Of those, completed the course
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    assessment_attempts = models.IntegerField(default=0)
+    assessment_score_total = models.BigIntegerField(default=0)
+    certificate_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'course_stats'
+        indexes = [
+            models.Index(fields=['-enrollment_count'], name='course_stats_enrollments_idx'),
+        ]
+
+    @property
+    def completion_rate(self):
+        """Percentage of paid enrollments that completed the course"""
+        if not self.enrollment_count:
+            return 0
+        return int((self.completed_count / self.enrollment_count) * 100)
+
+    @property
+    def average_score(self):
+        """Average assessment score over all attempts"""
+        if not self.assessment_attempts:
+            return 0
+        return round(self.assessment_score_total / self.assessment_attempts, 1)
+
+    def __str__(self):
+        return f"Stats - {self.course.title}"
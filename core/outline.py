@@ -0,0 +1,141 @@
+"""
+Immutable, cached course outlines.
+
+A CourseOutline is the ordered list of a course's modules without their
+bodies (id, title, type, order, progress bit). It is built with one values_list query,
+cached under the course's version token and so dropped automatically when
+a module is added, edited or removed. course_viewer takes navigation, lock
+checks and the sidebar from it and only loads the body of the module being
+shown.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from .caching import get_course_version
+from .models import Module
+
+OUTLINE_KEY = 'course:outline:{}:{}'
+CONTENT_TYPE_LABELS = dict(Module.CONTENT_TYPES)
+
+
+class OutlineEntry:
+    """One module of an outline"""
+    __slots__ = ('id', 'title', 'content_type', 'order', 'progress_bit')
+
+    def __init__(self, id, title, content_type, order, progress_bit):
+        self.id = id
+        self.title = title
+        self.content_type = content_type
+        self.order = order
+        self.progress_bit = progress_bit
+
+    def __getstate__(self):
+        return (self.id, self.title, self.content_type, self.order, self.progress_bit)
+
+    def __setstate__(self, state):
+        self.id, self.title, self.content_type, self.order, self.progress_bit = state
+
+    @property
+    def content_type_display(self):
+        return CONTENT_TYPE_LABELS.get(self.content_type, self.content_type)
+
+
+class CourseOutline:
+    """Ordered modules of one course version"""
+
+    def __init__(self, course_id, entries):
+        self.course_id = course_id
+        self.entries = tuple(entries)
+        self._position = {entry.id: i for i, entry in enumerate(self.entries)}
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, module_id):
+        return module_id in self._position
+
+    def __getstate__(self):
+        return (self.course_id, self.entries)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    @property
+    def first(self):
+        return self.entries[0] if self.entries else None
+
+    @property
+    def last(self):
+        return self.entries[-1] if self.entries else None
+
+    def get(self, module_id):
+        """Entry for module_id, or None if it is not part of the course"""
+        position = self._position.get(module_id)
+        return None if position is None else self.entries[position]
+
+    def next_after(self, module_id):
+        """Entry following module_id, or None at the end"""
+        position = self._position.get(module_id)
+        if position is None or position + 1 >= len(self.entries):
+            return None
+        return self.entries[position + 1]
+
+    # `completed` below is the enrollment's ProgressBitmap
+
+    def completed_ids(self, completed):
+        """Ids of the completed modules, in outline order"""
+        return [entry.id for entry in self.entries if entry.progress_bit in completed]
+
+    def first_incomplete(self, completed):
+        """First entry not completed, the one a student works on next"""
+        return next((entry for entry in self.entries if entry.progress_bit not in completed), None)
+
+    def is_unlocked(self, module_id, completed, first_incomplete=None):
+        """Sequential unlocking: completed modules plus the first incomplete one"""
+        entry = self.get(module_id)
+        if entry is None:
+            return False
+        if first_incomplete is None:
+            first_incomplete = self.first_incomplete(completed)
+        return entry.progress_bit in completed or (first_incomplete is not None and entry.id == first_incomplete.id)
+
+    def navigation(self, completed, current_id, locking=True):
+        """Sidebar rows: each entry with is_completed, is_current and is_locked"""
+        first_incomplete = self.first_incomplete(completed)
+        return [
+            {
+                'id': entry.id,
+                'title': entry.title,
+                'content_type': entry.content_type,
+                'content_type_display': entry.content_type_display,
+                'order': entry.order,
+                'is_completed': entry.progress_bit in completed,
+                'is_current': entry.id == current_id,
+                'is_locked': locking and entry.progress_bit not in completed and (
+                    first_incomplete is None or entry.id != first_incomplete.id
+                ),
+            }
+            for entry in self.entries
+        ]
+
+
+def build_course_outline(course_id):
+    """Read a course's outline from the database (one query)"""
+    rows = (
+        Module.objects.filter(course_id=course_id)
+        .order_by('order', 'id')
+        .values_list('id', 'title', 'content_type', 'order', 'progress_bit')
+    )
+    return CourseOutline(course_id, (OutlineEntry(*row) for row in rows))
+
+
+def get_course_outline(course_id):
+    """Cached outline for the course's current version"""
+    key = OUTLINE_KEY.format(course_id, get_course_version(course_id))
+    outline = cache.get(key)
+    if outline is None:
+        outline = build_course_outline(course_id)
+        cache.set(key, outline, settings.COURSE_FRAGMENT_CACHE_TIMEOUT)
+    return outline
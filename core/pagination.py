@@ -0,0 +1,83 @@
+"""
+Keyset (cursor) pagination over (created_at, id), or another timestamp.
+
+Unlike OFFSET pagination, every page is a bounded index range scan that
+starts right after the last row of the previous page, so page 500 costs
+the same as page 1. A filter the index can't seek in that order (the
+catalog's price range, see Course.Meta.indexes) is checked while walking it,
+so such a page costs page_size rows divided by the share of rows that
+match. Cursors are opaque url-safe strings.
+"""
+import base64
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(obj, field='created_at'):
+    """Build a cursor pointing at obj's (timestamp, id) position"""
+    raw = f"{getattr(obj, field).isoformat()}|{obj.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (timestamp, id) for a cursor, or None if it is malformed"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, obj_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            return None
+        return created_at, int(obj_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """One page of results plus cursors for its neighbours"""
+
+    def __init__(self, items, has_next, has_previous, field='created_at'):
+        self.items = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = encode_cursor(items[-1], field) if items and has_next else None
+        self.previous_cursor = encode_cursor(items[0], field) if items and has_previous else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(queryset, after=None, before=None, page_size=12, field='created_at'):
+    """
+    Return a KeysetPage of queryset ordered newest first by (field, id).
+    `after` moves towards older rows, `before` towards newer ones.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before) if not after else None
+
+    if before:
+        position, obj_id = before
+        queryset = queryset.filter(
+            Q(**{f'{field}__gt': position}) | Q(**{field: position, 'id__gt': obj_id})
+        ).order_by(field, 'id')
+    else:
+        if after:
+            position, obj_id = after
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': position}) | Q(**{field: position, 'id__lt': obj_id})
+            )
+        queryset = queryset.order_by(f'-{field}', '-id')
+
+    # Fetch one extra row to know whether there is another page
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if before:
+        rows.reverse()
+        return KeysetPage(rows, has_next=True, has_previous=has_more, field=field)
+    return KeysetPage(rows, has_next=has_more, has_previous=after is not None, field=field)
@@ -0,0 +1,210 @@
+"""
+Enrollment progress: bitmap view and stored summary.
+
+Completions are stored as ModuleCompletion rows. Every module of a course
+owns a stable bit position (Module.progress_bit, assigned once on creation
+and kept across reordering), so the completed modules of an enrollment load
+as a ProgressBitmap: membership is a shift-and-mask and counting completed
+modules is a popcount.
+
+Lists only need the summary columns on Enrollment (completed_count,
+progress_percent, next_module, last_activity_at). They are rewritten by
+refresh_progress_summary() whenever completions change or a module is
+added, removed or reordered. The values are computed inside the UPDATE
+from module_completions and modules, so two writers racing on one
+enrollment can't leave a stale count behind: whichever statement runs
+last sees both completions.
+
+Quiz answers live in the progress JSON under quiz_data, keyed by module id.
+write_quiz_saves() changes only the entries it is given, with JSON_SET on
+MySQL/MariaDB and json_set on SQLite, so a save sends the new entry and not
+the whole document, however much quiz history an enrollment has. Other
+databases fall back to rewriting the document under a row lock.
+"""
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import NotSupportedError, connections, transaction
+from django.db.models import Count, Exists, F, FloatField, Func, JSONField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Floor, Greatest, NullIf
+from django.utils import timezone
+
+SUMMARY_FIELDS = ('completed_count', 'progress_percent', 'next_module_id', 'last_activity_at')
+
+# Backends whose JSON functions JSONObjectSet compiles to
+JSON_SET_VENDORS = ('mysql', 'sqlite')
+
+
+class ProgressBitmap:
+    """Set of bit positions backed by an int"""
+    __slots__ = ('value',)
+
+    def __init__(self, value=0):
+        self.value = value
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(int.from_bytes(bytes(data or b''), 'little'))
+
+    @classmethod
+    def from_bits(cls, bits):
+        value = 0
+        for bit in bits:
+            value |= 1 << bit
+        return cls(value)
+
+    def to_bytes(self):
+        return self.value.to_bytes((self.value.bit_length() + 7) // 8, 'little')
+
+    def __contains__(self, bit):
+        return bit is not None and (self.value >> bit) & 1 == 1
+
+    def __len__(self):
+        return self.value.bit_count()
+
+    def __iter__(self):
+        """Set bit positions, lowest first"""
+        value, bit = self.value, 0
+        while value:
+            if value & 1:
+                yield bit
+            value >>= 1
+            bit += 1
+
+    def add(self, bit):
+        """Set a bit, return True if it was not set before"""
+        if bit in self:
+            return False
+        self.value |= 1 << bit
+        return True
+
+    def discard(self, bit):
+        """Clear a bit, return True if it was set"""
+        if bit not in self:
+            return False
+        self.value &= ~(1 << bit)
+        return True
+
+
+def summary_expressions():
+    """completed_count, progress_percent and next_module_id of each row, as SQL expressions"""
+    from .models import Module, ModuleCompletion
+
+    completions = ModuleCompletion.objects.filter(enrollment_id=OuterRef('pk')).order_by().values('enrollment_id')
+    done = Coalesce(Subquery(completions.annotate(n=Count('id')).values('n')[:1]), 0)
+    modules = Module.objects.filter(course_id=OuterRef('course_id')).order_by().values('course_id')
+    total = Subquery(modules.annotate(n=Count('id')).values('n')[:1])
+    percent = Coalesce(Floor(done * 100.0 / NullIf(total, 0), output_field=FloatField()), 0.0)
+
+    completed = ModuleCompletion.objects.filter(enrollment_id=OuterRef(OuterRef('pk')), module_id=OuterRef('pk'))
+    next_module = Subquery(
+        Module.objects.filter(course_id=OuterRef('course_id'))
+        .filter(~Exists(completed))
+        .order_by('order', 'id')
+        .values('id')[:1]
+    )
+    return {'completed_count': done, 'progress_percent': percent, 'next_module_id': next_module}
+
+
+def refresh_progress_summary(enrollments, touch=False):
+    """
+    Recompute the summary columns of an Enrollment queryset in one UPDATE.
+    touch=True also sets last_activity_at, for changes made by the student.
+    """
+    values = summary_expressions()
+    if touch:
+        values['last_activity_at'] = timezone.now()
+    return enrollments.update(**values)
+
+
+def check_progress_summary(enrollments):
+    """Yield (enrollment id, stored, expected) for rows whose summary is out of date"""
+    expected = {f'expected_{name}': expression for name, expression in summary_expressions().items()}
+    rows = enrollments.annotate(**expected).values('id', *SUMMARY_FIELDS[:3], *expected).order_by('id')
+    for row in rows.iterator(chunk_size=500):
+        stored = tuple(row[name] for name in SUMMARY_FIELDS[:3])
+        wanted = (row['expected_completed_count'], int(row['expected_progress_percent']), row['expected_next_module_id'])
+        if stored != wanted:
+            yield row['id'], stored, wanted
+
+
+class JSONObjectSet(Func):
+    """
+    A JSON column with members of one of its nested objects set in place:
+    JSONObjectSet('progress', 'quiz_data', {'4': {...}}) is the document with
+    progress['quiz_data']['4'] replaced, quiz_data created if missing.
+    """
+    output_field = JSONField()
+
+    def __init__(self, expression, key, members):
+        super().__init__(expression)
+        self.key = key
+        self.members = members
+
+    def _compile(self, compiler, connection, parse):
+        sql, params = compiler.compile(self.source_expressions[0])
+        parent = f'$.{json.dumps(self.key)}'
+        sql = f"JSON_INSERT({sql}, %s, {parse})"
+        params = [*params, parent, '{}']
+        paths = []
+        for member, value in self.members.items():
+            paths.append(f"%s, {parse}")
+            params += [f'{parent}.{json.dumps(str(member))}', json.dumps(value, cls=DjangoJSONEncoder)]
+        return f"JSON_SET({sql}, {', '.join(paths)})", params
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        # JSON_EXTRACT(text, '$') parses on MySQL and MariaDB alike
+        return self._compile(compiler, connection, "JSON_EXTRACT(%s, '$')")
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self._compile(compiler, connection, 'JSON(%s)')
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f'JSONObjectSet is not implemented on {connection.vendor}')
+
+
+def _merge_quiz_saves(enrollment, saves):
+    """Python version of the JSON_SET update, for the fallback"""
+    progress = dict(enrollment.progress or {})
+    quiz_data = dict(progress.get('quiz_data', {}))
+    quiz_data.update((str(module_id), saved) for module_id, (saved, at) in saves.items())
+    progress['quiz_data'] = quiz_data
+    enrollment.progress = progress
+    latest = max(at for saved, at in saves.values())
+    if enrollment.last_activity_at is None or latest > enrollment.last_activity_at:
+        enrollment.last_activity_at = latest
+
+
+def write_quiz_saves(saves):
+    """
+    Write {(enrollment_id, module_id): (saved, at)} in one statement: quiz
+    entries set in place and last_activity_at moved forward. Returns the
+    number of enrollment rows updated.
+    """
+    from .models import Enrollment
+
+    by_enrollment = {}
+    for (enrollment_id, module_id), value in saves.items():
+        by_enrollment.setdefault(enrollment_id, {})[module_id] = value
+    if not by_enrollment:
+        return 0
+
+    if connections[Enrollment.objects.db].vendor in JSON_SET_VENDORS:
+        enrollments = []
+        for enrollment_id, entries in by_enrollment.items():
+            at = max(at for saved, at in entries.values())
+            enrollments.append(Enrollment(
+                id=enrollment_id,
+                progress=JSONObjectSet('progress', 'quiz_data', {m: saved for m, (saved, _) in entries.items()}),
+                last_activity_at=Greatest(Coalesce(F('last_activity_at'), Value(at)), Value(at)),
+            ))
+        # A plain UPDATE: quiz state doesn't feed the stats signals
+        return Enrollment.objects.bulk_update(enrollments, ['progress', 'last_activity_at'])
+
+    with transaction.atomic():
+        enrollments = list(
+            Enrollment.objects.select_for_update().filter(id__in=by_enrollment)
+            .only('id', 'progress', 'last_activity_at').order_by('id')
+        )
+        for enrollment in enrollments:
+            _merge_quiz_saves(enrollment, by_enrollment[enrollment.id])
+        return Enrollment.objects.bulk_update(enrollments, ['progress', 'last_activity_at'])
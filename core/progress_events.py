@@ -0,0 +1,174 @@
+"""
+Batched progress events from clients that were offline or on a flaky link.
+
+A batch is an ordered list of events for one enrollment:
+
+    {"id": "c-17", "type": "complete", "module_id": 4, "at": "2026-10-17T08:00:00Z"}
+    {"id": "q-18", "type": "quiz", "module_id": 4, "answers": {"0": 2, "1": 0}, "score": 50}
+    {"id": "s-19", "type": "score", "module_id": 4, "score": 100}
+
+Events are checked in order against the course outline with the same
+sequential lock rule as course_viewer (a completion earlier in the batch
+unlocks the next module), and the whole batch is applied in one
+transaction or not at all. Repeated event ids, repeated completions of a
+module and superseded quiz saves are dropped before anything is written.
+"""
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Enrollment, Module, ModuleCompletion
+from .outline import get_course_outline
+from .progress import refresh_progress_summary, write_quiz_saves
+from .quiz_buffer import quiz_buffer
+
+EVENT_TYPES = ('complete', 'quiz', 'score')
+MAX_EVENTS = 200
+
+
+class ProgressEventError(Exception):
+    """A batch that can't be applied; errors is a list of {'index', 'error'}"""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _event_time(value, now):
+    """Client timestamp, never in the future; the server time if missing"""
+    if value is None:
+        return now
+    at = parse_datetime(value) if isinstance(value, str) else None
+    if at is None:
+        raise ValueError('at must be an ISO 8601 datetime')
+    if timezone.is_naive(at):
+        at = timezone.make_aware(at)
+    return min(at, now)
+
+
+def _score(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+        raise ValueError('score must be a number between 0 and 100')
+    return value
+
+
+def _answers(value, quiz):
+    """{question index: option index}, checked against the module's quiz"""
+    if not isinstance(value, dict):
+        raise ValueError('answers must be an object of question index -> option index')
+    for question, option in value.items():
+        try:
+            options = quiz[int(question)]['options']
+        except (ValueError, IndexError, KeyError, TypeError):
+            raise ValueError(f'Unknown question {question}')
+        if isinstance(option, bool) or not isinstance(option, int) or not 0 <= option < len(options):
+            raise ValueError(f'Unknown option {option} for question {question}')
+    return {str(question): option for question, option in value.items()}
+
+
+def parse_events(raw):
+    """Shape-check a batch and drop repeated event ids; returns (events, duplicates)"""
+    if not isinstance(raw, list) or not raw:
+        raise ProgressEventError([{'index': None, 'error': 'events must be a non-empty list'}])
+    if len(raw) > MAX_EVENTS:
+        raise ProgressEventError([{'index': None, 'error': f'At most {MAX_EVENTS} events per batch'}])
+
+    events, errors, seen, duplicates = [], [], set(), 0
+    for index, event in enumerate(raw):
+        if not isinstance(event, dict):
+            errors.append({'index': index, 'error': 'event must be an object'})
+            continue
+        if event.get('type') not in EVENT_TYPES:
+            errors.append({'index': index, 'error': f"type must be one of {', '.join(EVENT_TYPES)}"})
+            continue
+        if isinstance(event.get('module_id'), bool) or not isinstance(event.get('module_id'), int):
+            errors.append({'index': index, 'error': 'module_id must be an integer'})
+            continue
+        event_id = event.get('id')
+        if event_id is not None:
+            if isinstance(event_id, bool) or not isinstance(event_id, (str, int)):
+                errors.append({'index': index, 'error': 'id must be a string or an integer'})
+                continue
+            if event_id in seen:
+                duplicates += 1
+                continue
+            seen.add(event_id)
+        events.append((index, event))
+
+    if errors:
+        raise ProgressEventError(errors)
+    return events, duplicates
+
+
+@transaction.atomic
+def apply_progress_events(enrollment_id, user_id, raw_events):
+    """
+    Validate and apply one batch for the user's enrollment. Returns a summary
+    {'completed', 'quiz_saved', 'duplicates'}; raises ProgressEventError
+    (nothing written) if any event is invalid and Enrollment.DoesNotExist if
+    the enrollment isn't the user's.
+    """
+    events, duplicates = parse_events(raw_events)
+
+    # Serializes batches and quiz saves of this enrollment
+    enrollment = Enrollment.objects.select_for_update().only('id', 'course_id', 'progress').get(
+        id=enrollment_id, user_id=user_id
+    )
+    outline = get_course_outline(enrollment.course_id)
+    completed = enrollment.completion_bitmap
+    quizzes = dict(Module.objects.filter(
+        course_id=enrollment.course_id,
+        id__in={e['module_id'] for _, e in events if e['type'] != 'complete'}
+    ).values_list('id', 'quiz_data'))
+    # Buffered saves of the widget count as the current state
+    quiz_data = quiz_buffer.quiz_data(enrollment, quizzes)
+
+    now = timezone.now()
+    new_completions, quiz_saves, errors = {}, {}, []
+    for index, event in events:
+        module_id = event['module_id']
+        try:
+            if module_id not in outline:
+                raise ValueError('Module is not part of this course')
+            if not outline.is_unlocked(module_id, completed):
+                raise ValueError('Module is locked, complete the previous modules first')
+            at = _event_time(event.get('at'), now)
+
+            if event['type'] == 'complete':
+                # Only the first completion of a module counts
+                if completed.add(outline.get(module_id).progress_bit):
+                    new_completions[module_id] = at
+                else:
+                    duplicates += 1
+                continue
+
+            if not quizzes.get(module_id):
+                raise ValueError('Module has no quiz')
+            saved = dict(quiz_saves.get(module_id) or quiz_data.get(str(module_id)) or {})
+            if event['type'] == 'quiz':
+                saved['answers'] = _answers(event.get('answers'), quizzes[module_id])
+            if event['type'] == 'score' or 'score' in event:
+                saved['score'] = _score(event.get('score'))
+            saved['completed_at'] = at.isoformat()
+            if module_id in quiz_saves:
+                # A later save of the same quiz supersedes the earlier one
+                duplicates += 1
+            quiz_saves[module_id] = saved
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+
+    if errors:
+        raise ProgressEventError(errors)
+
+    ModuleCompletion.objects.bulk_create(
+        [ModuleCompletion(enrollment_id=enrollment.id, module_id=m, completed_at=at) for m, at in new_completions.items()],
+        ignore_conflicts=True
+    )
+    if quiz_saves:
+        # Only once the direct write is in; a rolled back batch keeps the buffered saves
+        transaction.on_commit(lambda: quiz_buffer.discard(enrollment.id, list(quiz_saves)))
+        write_quiz_saves({(enrollment.id, module_id): (saved, now) for module_id, saved in quiz_saves.items()})
+
+    if new_completions or quiz_saves:
+        refresh_progress_summary(Enrollment.objects.filter(id=enrollment.id), touch=True)
+
+    return {'completed': len(new_completions), 'quiz_saved': len(quiz_saves), 'duplicates': duplicates}
@@ -0,0 +1,219 @@
+"""
+Write-behind buffer for module quiz saves.
+
+The quiz widget saves on every scoring pass. Instead of rewriting the
+enrollment row each time, save() keeps the latest quiz state per
+(enrollment, module) in the default cache, which is shared by all workers,
+and a background thread writes what is pending in batches: every
+QUIZ_BUFFER_FLUSH_INTERVAL seconds, or sooner once QUIZ_BUFFER_MAX_PENDING
+pairs are waiting. A batch is one UPDATE (see progress.write_quiz_saves),
+however many saves were coalesced into it.
+
+Cache layout:
+
+    quizbuf:entry:<enrollment>:<module>   latest (saved, at); read-your-writes
+    quizbuf:pending:<enrollment>:<module> set while the pair awaits a flush
+    quizbuf:log:<n>                       pair that became pending as number n
+    quizbuf:seq / quizbuf:cursor          last number given out / written
+    quizbuf:gap                           seq when a log entry was last found missing
+
+A pair is logged once per flush cycle no matter how often it is saved. The
+flush clears the pending marker before it reads the entry, so a save that
+races with a flush is logged again and lands in the next batch.
+
+Once acknowledged, a save lives only in the cache until it is flushed, so
+the buffer is used only when the default cache is shared and never evicts
+keys (Redis, see caching.is_durable_cache). LocMem would lose saves past its
+300 entries and to other processes; on such a cache, or with
+QUIZ_BUFFER_FLUSH_INTERVAL=0, every save is written straight to the
+database and `manage.py check` warns (core.W001) if the buffer was asked
+for. Pending saves are also flushed at process exit and by the
+flush_quiz_buffer command.
+"""
+import atexit
+import logging
+import os
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from .caching import is_durable_cache
+from .progress import write_quiz_saves
+
+logger = logging.getLogger(__name__)
+
+ENTRY_KEY = 'quizbuf:entry:{}:{}'
+PENDING_KEY = 'quizbuf:pending:{}:{}'
+LOG_KEY = 'quizbuf:log:{}'
+SEQ_KEY = 'quizbuf:seq'
+CURSOR_KEY = 'quizbuf:cursor'
+GAP_KEY = 'quizbuf:gap'
+FLUSH_LOCK_KEY = 'quizbuf:flush-lock'
+FLUSH_LOCK_TIMEOUT = 60
+
+BATCH_SIZE = 500
+# Flushed entries stay readable a little longer; a save racing the flush
+# replaces the entry and is logged again, so it is never dropped
+FLUSHED_ENTRY_TIMEOUT = 5 * 60
+
+
+class QuizProgressBuffer:
+    """Coalesces quiz saves in the shared cache and writes them in batches"""
+
+    def __init__(self, flush_interval=5, max_pending=200, timeout=60 * 60 * 24):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        return self.flush_interval > 0 and is_durable_cache()
+
+    # -- Writes -----------------------------------------------------------
+
+    def save(self, enrollment_id, module_id, saved):
+        """Record the latest quiz state of a module; written now if the buffer is off"""
+        at = timezone.now()
+        if not self.enabled:
+            write_quiz_saves({(enrollment_id, module_id): (saved, at)})
+            return
+
+        cache.set(ENTRY_KEY.format(enrollment_id, module_id), (saved, at), self.timeout)
+        # Log the pair only when it isn't already waiting for a flush
+        if cache.add(PENDING_KEY.format(enrollment_id, module_id), 1, self.timeout):
+            if cache.get(SEQ_KEY) is None:
+                # Never set, or lost: go on from the last number written, so
+                # new numbers aren't taken for ones the cursor has passed
+                cache.add(SEQ_KEY, cache.get(CURSOR_KEY, 0), None)
+            n = cache.incr(SEQ_KEY)
+            cache.set(LOG_KEY.format(n), (enrollment_id, module_id), self.timeout)
+            if n % self.max_pending == 0:
+                self._wake.set()
+        self._ensure_flusher()
+
+    def discard(self, enrollment_id, module_ids):
+        """Drop buffered saves that a direct write supersedes; call with the enrollment row locked"""
+        cache.delete_many([ENTRY_KEY.format(enrollment_id, m) for m in module_ids])
+
+    # -- Reads ------------------------------------------------------------
+
+    def pending(self, pairs):
+        """{(enrollment_id, module_id): saved} of the pairs that have a buffered save"""
+        if not self.enabled:
+            return {}
+        keys = {ENTRY_KEY.format(*pair): pair for pair in pairs}
+        return {keys[key]: saved for key, (saved, at) in cache.get_many(keys).items()}
+
+    def quiz_data(self, enrollment, module_ids):
+        """The enrollment's quiz_data with its buffered saves of module_ids laid over it"""
+        quiz_data = dict((enrollment.progress or {}).get('quiz_data', {}))
+        pending = self.pending((enrollment.id, module_id) for module_id in module_ids)
+        quiz_data.update((str(module_id), saved) for (_, module_id), saved in pending.items())
+        return quiz_data
+
+    # -- Flushing ---------------------------------------------------------
+
+    def _next_batch(self):
+        """(stop, pairs, log keys, gap) of the next logged pairs, or None when nothing is waiting"""
+        state = cache.get_many([SEQ_KEY, CURSOR_KEY, GAP_KEY])
+        cursor, seq = state.get(CURSOR_KEY, 0), state.get(SEQ_KEY, 0)
+        if cursor >= seq:
+            return None
+
+        numbers = range(cursor + 1, min(seq, cursor + BATCH_SIZE) + 1)
+        found = cache.get_many([LOG_KEY.format(n) for n in numbers])
+        # Numbers given out before the previous flush had a whole interval to
+        # get their log entry; one that is still missing expired, skip it
+        settled = state.get(GAP_KEY, 0)
+        stop, pairs, gap = cursor, set(), False
+        for n in numbers:
+            pair = found.get(LOG_KEY.format(n))
+            if pair is None and n > settled:
+                # Taken by a save that may not have written its log entry yet
+                cache.set(GAP_KEY, seq, None)
+                gap = True
+                break
+            stop = n
+            if pair is not None:
+                pairs.add(pair)
+        return stop, pairs, [LOG_KEY.format(n) for n in range(cursor + 1, stop + 1)], gap
+
+    def flush(self):
+        """Write every pending save, return the number of enrollment rows updated"""
+        if not self.enabled or not cache.add(FLUSH_LOCK_KEY, os.getpid(), FLUSH_LOCK_TIMEOUT):
+            return 0
+        written = 0
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None or not batch[2]:
+                    break
+                stop, pairs, log_keys, gap = batch
+
+                entry_keys = {ENTRY_KEY.format(*pair): pair for pair in pairs}
+                # Unmark first: a save after this point is logged for the next batch
+                cache.delete_many([PENDING_KEY.format(*pair) for pair in pairs])
+                entries = cache.get_many(entry_keys)
+                written += write_quiz_saves({entry_keys[key]: value for key, value in entries.items()})
+
+                cache.set(CURSOR_KEY, stop, None)
+                cache.delete_many(log_keys)
+                for key in entries:
+                    cache.touch(key, FLUSHED_ENTRY_TIMEOUT)
+                if gap:
+                    # The rest waits for the next flush
+                    break
+        finally:
+            cache.delete(FLUSH_LOCK_KEY)
+        return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Quiz buffer flush failed")
+            finally:
+                connection.close()
+
+    def _ensure_flusher(self):
+        """Start this process's flush thread (again after a fork)"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            if self._pid is None:
+                atexit.register(self.shutdown)
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='quiz-buffer-flush', daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        """Stop the flush thread and write what is left; registered with atexit"""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Quiz buffer flush at shutdown failed")
+
+
+quiz_buffer = QuizProgressBuffer(
+    flush_interval=settings.QUIZ_BUFFER_FLUSH_INTERVAL,
+    max_pending=settings.QUIZ_BUFFER_MAX_PENDING,
+    timeout=settings.QUIZ_BUFFER_TIMEOUT,
+)
@@ -0,0 +1,159 @@
+"""
+Co-enrollment recommendations ("students who took X also took Y").
+
+Co-enrollment counts between courses are built from completed Enrollments,
+read as cosine similarity, and used to precompute a top-N list for every
+enrolled user. Requests only read those lists; building runs in a
+background thread and new enrollments are folded in incrementally.
+
+Counts are kept as a dict of rows holding only course pairs that share a
+student, so memory grows with actual co-enrollments, not with the square
+of the number of courses, in every worker that holds a snapshot.
+"""
+import heapq
+import logging
+import math
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+POPULAR_SIZE = 50
+
+
+class _Snapshot:
+    """Immutable-ish result of one full build, patched in place by record()"""
+
+    def __init__(self, course_ids, counts, owned, user_recs, built_at):
+        self.course_ids = course_ids                  # active course ids
+        self.counts = counts                          # course id -> {course id: co-enrollments}
+        self.owned = owned                            # user id -> set of course ids
+        self.user_recs = user_recs                    # user id -> tuple of course ids
+        self.popular = ()                             # best sellers, from CourseStats
+        self.built_at = built_at
+
+
+def _add_courses(counts, courses, new=None):
+    """Count co-enrollments among `courses`, or only the pairs that include `new`"""
+    for a in courses if new is None else (new,):
+        row = counts.setdefault(a, {})
+        for b in courses:
+            row[b] = row.get(b, 0) + 1
+            if new is not None and b != a:
+                other = counts.setdefault(b, {})
+                other[a] = other.get(a, 0) + 1
+
+
+def _top_n(counts, owned, n):
+    """The n unowned courses most cosine-similar to the owned ones, summed"""
+    scores = {}
+    for a in owned:
+        row = counts.get(a, {})
+        for b, shared in row.items():
+            if b not in owned:
+                # Diagonal entries are each course's own enrollment count
+                scores[b] = scores.get(b, 0.0) + shared / math.sqrt(row[a] * counts[b][b])
+    best = heapq.nlargest(n, scores.items(), key=lambda item: item[1])
+    return tuple(cid for cid, score in best if score > 0)
+
+
+class CoEnrollmentRecommender:
+    """Process-local recommendation store, rebuilt in the background"""
+
+    def __init__(self, top_n=6, max_age=900):
+        self.top_n = top_n
+        self.max_age = max_age
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._building = False
+
+    # -- Building ---------------------------------------------------------
+
+    def build(self):
+        """Rebuild the counts and all per-user lists from the database"""
+        from .models import Course, CourseStats, Enrollment
+
+        course_ids = frozenset(Course.objects.filter(is_active=True).values_list('id', flat=True))
+        owned = {}
+        for user_id, course_id in Enrollment.objects.filter(
+            payment_status='completed', course__is_active=True
+        ).values_list('user_id', 'course_id').iterator():
+            owned.setdefault(user_id, set()).add(course_id)
+
+        counts = {}
+        for courses in owned.values():
+            _add_courses(counts, courses)
+        user_recs = {user_id: _top_n(counts, courses, self.top_n) for user_id, courses in owned.items()}
+
+        snapshot = _Snapshot(course_ids, counts, owned, user_recs, time.monotonic())
+        snapshot.popular = tuple(
+            CourseStats.objects.filter(course__is_active=True)
+            .order_by('-enrollment_count').values_list('course_id', flat=True)[:POPULAR_SIZE]
+        )
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def _build_in_background(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception("Recommendation build failed")
+        finally:
+            self._building = False
+            connection.close()
+
+    def refresh_if_stale(self):
+        """Start a background rebuild when there is no snapshot or it is too old"""
+        snapshot = self._snapshot
+        if snapshot and time.monotonic() - snapshot.built_at < self.max_age:
+            return
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._build_in_background, name='recommendation-build', daemon=True).start()
+
+    # -- Incremental updates ----------------------------------------------
+
+    def record(self, user_id, course_id):
+        """Fold one new completed enrollment into the current snapshot"""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or course_id not in snapshot.course_ids:
+                return
+            owned = snapshot.owned.setdefault(user_id, set())
+            if course_id in owned:
+                return
+            owned.add(course_id)
+            # Only pairs with the new course change
+            _add_courses(snapshot.counts, owned, new=course_id)
+            snapshot.user_recs[user_id] = _top_n(snapshot.counts, owned, self.top_n)
+
+    # -- Reads ------------------------------------------------------------
+
+    def recommend(self, user_id, limit=3, exclude=()):
+        """Precomputed course ids for a user, never computed on the request path"""
+        self.refresh_if_stale()
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+        exclude = set(exclude)
+        return [cid for cid in snapshot.user_recs.get(user_id, ()) if cid not in exclude][:limit]
+
+    def best_sellers(self, exclude=(), limit=3):
+        """Most enrolled active courses, skipping the given course ids"""
+        self.refresh_if_stale()
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+        exclude = set(exclude)
+        return [cid for cid in snapshot.popular if cid not in exclude][:limit]
+
+
+recommender = CoEnrollmentRecommender(
+    top_n=settings.RECOMMENDATIONS_TOP_N,
+    max_age=settings.RECOMMENDATIONS_REFRESH_SECONDS,
+)
@@ -0,0 +1,78 @@
+"""
+Pre-rendered Markdown for module content.
+
+Module.content_html holds the rendered lesson and Module.content_html_key
+the hash of everything that produced it: the Markdown source, the
+extension configuration and the library versions. Rendering happens on
+save; a viewer request only hashes the source and re-renders when the key
+no longer matches (rows saved before this existed, or after an upgrade).
+"""
+import hashlib
+import json
+import threading
+import markdown
+from .highlighting import CachedHighlightExtension
+
+try:
+    import pygments
+    PYGMENTS_VERSION = pygments.__version__
+except ImportError:  # codehilite falls back to plain <pre><code> without it
+    PYGMENTS_VERSION = None
+
+MARKDOWN_EXTENSIONS = ['extra', 'codehilite', 'toc', 'fenced_code']
+MARKDOWN_EXTENSION_CONFIGS = {}
+
+_CONFIG_FINGERPRINT = json.dumps(
+    [MARKDOWN_EXTENSIONS, MARKDOWN_EXTENSION_CONFIGS, markdown.__version__, PYGMENTS_VERSION],
+    sort_keys=True
+)
+
+
+def render_key(content):
+    """Hash identifying the HTML that render_markdown(content) produces"""
+    digest = hashlib.sha256(_CONFIG_FINGERPRINT.encode())
+    digest.update((content or '').encode())
+    return digest.hexdigest()
+
+
+_local = threading.local()
+
+
+def _markdown():
+    """One Markdown instance per thread, extensions are only loaded once"""
+    md = getattr(_local, 'md', None)
+    if md is None:
+        md = _local.md = markdown.Markdown(
+            # Fenced blocks are answered from the shared highlight cache
+            extensions=MARKDOWN_EXTENSIONS + [CachedHighlightExtension()],
+            extension_configs=MARKDOWN_EXTENSION_CONFIGS
+        )
+    return md
+
+
+def render_markdown(content):
+    """Markdown -> HTML with the lesson extensions"""
+    if not content:
+        return ''
+    return _markdown().reset().convert(content)
+
+
+def prerender(module, force=False):
+    """Refresh module.content_html in memory if stale, return True if it changed"""
+    key = render_key(module.content)
+    if not force and module.content_html_key == key:
+        return False
+    module.content_html = render_markdown(module.content)
+    module.content_html_key = key
+    return True
+
+
+def ensure_rendered(module):
+    """Lazy path for the viewer: re-render and store only on a key mismatch"""
+    if prerender(module):
+        # Plain UPDATE, this is a cache refresh and not an edit of the module
+        type(module).objects.filter(pk=module.pk).update(
+            content_html=module.content_html,
+            content_html_key=module.content_html_key
+        )
+    return module.content_html
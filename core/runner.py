@@ -0,0 +1,307 @@
+"""
+Pool of pre-started interpreters for execute_python_code.
+
+Spawning a fresh interpreter per "Run" click costs tens of milliseconds of
+startup before the student's code runs, and a class clicking at once forks
+that many interpreters together. CodeRunnerPool keeps CODE_RUNNER_POOL_SIZE
+worker processes (core/runner_worker.py) per web process started and idle.
+A job is sent to a free worker over its pipe; the worker forks a process
+for it with the CODE_SANDBOX_* limits applied, and reports which limit
+stopped it, if one did. On a server running as root the process first
+becomes CODE_SANDBOX_USER, since RLIMIT_NPROC doesn't bind root.
+
+A worker is retired after CODE_RUNNER_MAX_JOBS jobs, and killed as soon as
+it crashes, stops answering or sends something unreadable. Replacements are
+started in the background, so a request never waits for an interpreter to
+boot unless the whole pool is busy. With the pool switched off, spawn_run
+starts one worker per program, under the same limits.
+"""
+import atexit
+import json
+import logging
+import os
+import pwd
+import queue
+import selectors
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from .runner_worker import HEADER
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = str(Path(__file__).with_name('runner_worker.py'))
+# Booting a worker takes well under a second; this only catches a broken one
+START_TIMEOUT = 10
+# The worker enforces the job's timeout itself; this much longer means it is stuck
+REPLY_GRACE = 2
+
+# status is 'ok', 'error' (the program failed), 'limit', 'timeout', 'crashed'
+# or 'busy'; cpu_time is the CPU seconds the program used, wall time where
+# unknown; limit names the limit that stopped it ('cpu', 'memory',
+# 'processes', 'file_size', 'output' or 'timeout'), else None
+RunResult = namedtuple('RunResult', 'success output error status cpu_time limit')
+
+LIMIT_MESSAGES = {
+    'cpu': "CPU time limit exceeded ({cpu_seconds} seconds)",
+    'memory': "Memory limit exceeded ({memory_mb} MB)",
+    'processes': "Process limit exceeded, programs can't start other processes",
+    'file_size': "File size limit exceeded ({file_size_mb} MB)",
+    'output': "Output limit exceeded, output truncated after {output_bytes} bytes",
+}
+
+
+def sandbox_user():
+    """(uid, gid) programs are switched to when the server runs as root, else None"""
+    if os.geteuid() != 0:
+        return None
+    try:
+        user = pwd.getpwnam(settings.CODE_SANDBOX_USER)
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"CODE_SANDBOX_USER {settings.CODE_SANDBOX_USER!r} does not exist; "
+            f"programs are not run as root, where the process limit doesn't apply"
+        )
+    if user.pw_uid == 0:
+        raise ImproperlyConfigured("CODE_SANDBOX_USER must not be root")
+    return user.pw_uid, user.pw_gid
+
+
+def sandbox_limits():
+    """Limits every program runs under, from the CODE_SANDBOX_* settings"""
+    return {
+        'run_as': sandbox_user(),
+        'cpu_seconds': settings.CODE_SANDBOX_CPU_SECONDS,
+        'memory_mb': settings.CODE_SANDBOX_MEMORY_MB,
+        'processes': settings.CODE_SANDBOX_MAX_PROCESSES,
+        'file_size_mb': settings.CODE_SANDBOX_MAX_FILE_MB,
+        'output_bytes': settings.CODE_SANDBOX_MAX_OUTPUT_BYTES,
+    }
+
+
+class WorkerError(Exception):
+    """The worker died or broke the protocol; it must not be reused"""
+
+
+class WorkerTimeout(WorkerError):
+    pass
+
+
+class _Worker:
+    """One warm interpreter and its two pipes"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-I', WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=tempfile.gettempdir(),
+        )
+        self.jobs = 0
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def _read(self, size, deadline):
+        fd = self.process.stdout.fileno()
+        data = b''
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while len(data) < size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    raise WorkerTimeout()
+                chunk = os.read(fd, size - len(data))
+                if not chunk:
+                    raise WorkerError('worker exited')
+                data += chunk
+        return data
+
+    def receive(self, deadline):
+        size = HEADER.unpack(self._read(HEADER.size, deadline))[0]
+        try:
+            return json.loads(self._read(size, deadline))
+        except ValueError:
+            raise WorkerError('unreadable reply')
+
+    def wait_ready(self):
+        if self.receive(time.monotonic() + START_TIMEOUT) != {'ready': True}:
+            raise WorkerError('unexpected greeting')
+
+    def run(self, code, inputs, timeout, limits):
+        data = json.dumps({'code': code, 'inputs': inputs, 'timeout': timeout, 'limits': limits}).encode()
+        try:
+            self.process.stdin.write(HEADER.pack(len(data)) + data)
+            self.process.stdin.flush()
+        except OSError:
+            raise WorkerError('worker exited')
+        self.jobs += 1
+        reply = self.receive(time.monotonic() + timeout + REPLY_GRACE)
+        if not isinstance(reply, dict) or 'ok' not in reply:
+            raise WorkerError('unreadable reply')
+        return reply
+
+    def close(self):
+        """Let the worker finish on EOF"""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+
+
+def _timed_out(timeout, cpu_time):
+    return RunResult(False, "", f"Code execution timed out ({timeout} seconds limit)", 'timeout', cpu_time, 'timeout')
+
+
+def _run_on(worker, code, inputs, timeout, limits):
+    """(RunResult, whether the worker can be reused)"""
+    started = time.monotonic()
+    try:
+        reply = worker.run(code, inputs, timeout, limits)
+    except WorkerTimeout:
+        return _timed_out(timeout, timeout), False
+    except WorkerError as e:
+        return RunResult(False, "", f"Code execution failed ({e})", 'crashed', time.monotonic() - started, None), False
+
+    limit = reply.get('limit')
+    if reply['ok']:
+        return RunResult(True, reply['stdout'], "", 'ok', reply['cpu'], None), True
+    if limit == 'timeout':
+        return _timed_out(timeout, reply['cpu']), True
+    if limit in LIMIT_MESSAGES:
+        # Whatever the program printed before it was stopped, then the reason
+        error = reply['stderr'].rstrip('\n')
+        error = (error + '\n' if error else '') + LIMIT_MESSAGES[limit].format(**limits)
+        return RunResult(False, reply['stdout'], error, 'limit', reply['cpu'], limit), True
+    return RunResult(False, "", reply['stderr'], 'error', reply['cpu'], None), True
+
+
+def spawn_run(code, inputs, timeout, limits=None):
+    """RunResult of one program in a worker started just for it"""
+    try:
+        worker = _Worker()
+    except OSError as e:
+        return RunResult(False, "", str(e), 'crashed', 0.0, None)
+    try:
+        worker.wait_ready()
+    except WorkerError as e:
+        worker.kill()
+        return RunResult(False, "", f"Code execution failed ({e})", 'crashed', 0.0, None)
+    result, healthy = _run_on(worker, code, inputs, timeout, limits or sandbox_limits())
+    if healthy:
+        worker.close()
+    else:
+        worker.kill()
+    return result
+
+
+class CodeRunnerPool:
+    """Supervised set of warm workers owned by this process"""
+
+    def __init__(self, size=4, max_jobs=100, limits=None):
+        self.size = size
+        self.max_jobs = max_jobs
+        # Resolved on first use: a missing sandbox user fails the run, not the import
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._pid = None
+
+    def _ensure_started(self):
+        """Start the workers on first use, and again in a forked child"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self.limits is None:
+                self.limits = sandbox_limits()
+            if self._pid is None:
+                atexit.register(self.shutdown)
+            # Workers inherited over a fork belong to the parent
+            self._idle = queue.Queue()
+            self._pid = os.getpid()
+            for _ in range(self.size):
+                self._replace()
+
+    def _spawn(self):
+        try:
+            worker = _Worker()
+        except OSError:
+            logger.exception("Code runner worker failed to start")
+            return
+        try:
+            worker.wait_ready()
+        except WorkerError:
+            logger.exception("Code runner worker failed to start")
+            worker.kill()
+            return
+        self._idle.put(worker)
+
+    def _replace(self):
+        """Start a worker in the background to take a retired one's place"""
+        threading.Thread(target=self._spawn, name='code-runner-spawn', daemon=True).start()
+
+    def _retire(self, worker, kill=False):
+        if kill:
+            worker.kill()
+        else:
+            worker.close()
+        self._replace()
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                worker = self._idle.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                return None
+            if worker.alive:
+                return worker
+            self._retire(worker, kill=True)
+
+    def run(self, code, inputs, timeout):
+        """RunResult of one program; its first three fields are what execute_python_code returns"""
+        self._ensure_started()
+        worker = self._acquire(timeout)
+        if worker is None:
+            return RunResult(False, "", "Code runner is busy, try again in a moment", 'busy', 0.0, None)
+
+        result, healthy = _run_on(worker, code, inputs, timeout, self.limits)
+        if not healthy:
+            self._retire(worker, kill=True)
+        elif worker.jobs >= self.max_jobs:
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def shutdown(self):
+        """Close this process's idle workers; registered with atexit"""
+        if self._pid != os.getpid():
+            return
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            worker.close()
+
+
+code_runner = CodeRunnerPool(
+    size=settings.CODE_RUNNER_POOL_SIZE,
+    max_jobs=settings.CODE_RUNNER_MAX_JOBS,
+)
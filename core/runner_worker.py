@@ -0,0 +1,328 @@
+"""
+Warm interpreter of the code runner pool (see core.runner).
+
+Started as `python -I runner_worker.py` and never imports Django or the
+project. Jobs and results are length-prefixed JSON frames on the worker's
+stdin/stdout; the worker moves those pipes to other descriptors and points
+fds 0-2 at /dev/null, so nothing it runs can write into the protocol.
+
+The worker itself never runs student code. For each job it forks a child,
+which is cheap from an interpreter that is already up. The child switches
+to the job's unprivileged user when the worker is root (the kernel doesn't
+apply RLIMIT_NPROC to root), applies the job's resource limits (RLIMIT_CPU,
+RLIMIT_AS, RLIMIT_NPROC, RLIMIT_FSIZE), runs the code in a fresh __main__ with its inputs as stdin,
+and exits the way the plain interpreter would. The worker streams the
+child's stdout/stderr into buffers capped at the output limit, kills the
+child when the cap or the wall-clock timeout is reached, and replies with
+the output, the CPU time from wait4() and the limit that was hit, if any.
+A child that closes its pipes is still killed at the timeout, and on Linux
+the kernel kills it if the worker dies first (the pool killing a stuck
+worker must not leave the job behind).
+"""
+import builtins
+import ctypes
+import errno
+import io
+import json
+import os
+import resource
+import selectors
+import signal
+import struct
+import sys
+import time
+import traceback
+import types
+
+HEADER = struct.Struct('!I')
+FILENAME = 'main.py'
+TRUNCATION_MARKER = '\n... [output truncated after {} bytes]'
+READ_SIZE = 65536
+# What a job process may report on its status pipe
+REPORTED_LIMITS = ('cpu', 'memory', 'processes', 'file_size')
+# Audit events of starting a process; with a process limit of 0 each one fails
+PROCESS_EVENTS = frozenset(('os.fork', 'os.forkpty', 'os.posix_spawn', 'os.system', 'subprocess.Popen'))
+# Longest sleep between checks for a job that closed its pipes but hasn't exited
+WAIT_INTERVAL = 0.05
+PR_SET_PDEATHSIG = 1
+
+
+class CPULimitExceeded(BaseException):
+    """Raised in the job on SIGXCPU, so its output so far is flushed"""
+
+
+def read_frame(fd):
+    """Next frame from fd, None once the pool closes the pipe"""
+    header = _read_exactly(fd, HEADER.size)
+    if header is None:
+        return None
+    return json.loads(_read_exactly(fd, HEADER.unpack(header)[0]))
+
+
+def _read_exactly(fd, size):
+    data = b''
+    while len(data) < size:
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def write_frame(fd, payload):
+    data = json.dumps(payload).encode()
+    data = HEADER.pack(len(data)) + data
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def drop_privileges(run_as):
+    """Become the job's user, (uid, gid); None when the worker isn't root"""
+    if run_as is None:
+        return
+    uid, gid = run_as
+    os.setgroups([])
+    os.setgid(gid)
+    os.setuid(uid)
+
+
+def die_with(worker_pid):
+    """Have the kernel SIGKILL this process when the worker exits (Linux only)"""
+    if not sys.platform.startswith('linux'):
+        return
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)
+    except (AttributeError, OSError):
+        return
+    # The worker may have died before the signal was armed
+    if os.getppid() != worker_pid:
+        os._exit(1)
+
+
+def set_limits(limits):
+    """Kernel limits of the job process; soft and hard, so the job can't raise them"""
+    cpu = limits['cpu_seconds']
+    # SIGXCPU at the soft limit, SIGKILL a second later if the job ignores it
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    memory = limits['memory_mb'] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    file_size = limits['file_size_mb'] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_FSIZE, (file_size, file_size))
+    # Counted per user: 0 means the job can't start any process
+    resource.setrlimit(resource.RLIMIT_NPROC, (limits['processes'], limits['processes']))
+
+
+def _cpu_exceeded(signum, frame):
+    raise CPULimitExceeded()
+
+
+def _limit_of(exception):
+    """The resource limit an uncaught exception comes from, if any"""
+    if isinstance(exception, CPULimitExceeded):
+        return 'cpu'
+    if isinstance(exception, MemoryError):
+        return 'memory'
+    if isinstance(exception, OSError) and exception.errno == errno.EFBIG:
+        return 'file_size'
+    if isinstance(exception, OSError) and exception.errno == errno.EAGAIN:
+        return 'processes'
+    return None
+
+
+def run_child(job, status_fd, worker_pid):
+    """Body of the forked job process; never returns"""
+    status = 1
+    reported = []
+
+    def report(limit):
+        # Only the first limit counts; the status pipe carries a single name
+        if not reported:
+            reported.append(limit)
+            os.write(status_fd, limit.encode())
+
+    def audit(event, args):
+        if event in PROCESS_EVENTS:
+            report('processes')
+
+    try:
+        signal.signal(signal.SIGXCPU, _cpu_exceeded)
+        drop_privileges(job['limits'].get('run_as'))
+        # After the switch of user, which clears the parent-death signal
+        die_with(worker_pid)
+        set_limits(job['limits'])
+        if job['limits']['processes'] == 0:
+            # Reported even if the program catches the error the attempt raises
+            sys.addaudithook(audit)
+        main = types.ModuleType('__main__')
+        main.__builtins__ = builtins
+        main.__file__ = FILENAME
+        sys.modules['__main__'] = main
+        sys.argv = [FILENAME]
+        sys.stdin = io.StringIO(job.get('inputs', ''))
+        sys.stdout = open(1, 'w', encoding='utf-8', closefd=False)
+        sys.stderr = open(2, 'w', encoding='utf-8', closefd=False)
+        try:
+            exec(compile(job['code'], FILENAME, 'exec'), main.__dict__)
+            status = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                status = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                status = 1
+        except BaseException as e:
+            limit = _limit_of(e)
+            if limit:
+                report(limit)
+            if limit != 'cpu':
+                # Leave this function's frame out, as if main.py had been run directly
+                traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+    finally:
+        os._exit(status & 0xFF)
+
+
+def _collect(pid, out_fd, err_fd, status_fd, timeout, limits):
+    """Read the job's streams until it exits; returns (ok, stdout, stderr, cpu, limit)"""
+    max_output = limits['output_bytes']
+    buffers = {out_fd: bytearray(), err_fd: bytearray()}
+    truncated = set()
+    reported = bytearray()
+    limit = None
+    deadline = time.monotonic() + timeout
+
+    with selectors.DefaultSelector() as selector:
+        for fd in (out_fd, err_fd, status_fd):
+            selector.register(fd, selectors.EVENT_READ)
+        while limit is None and selector.get_map():
+            remaining = deadline - time.monotonic()
+            events = selector.select(remaining) if remaining > 0 else []
+            if not events:
+                limit = 'timeout'
+                break
+            for key, _ in events:
+                chunk = os.read(key.fd, READ_SIZE)
+                if not chunk:
+                    selector.unregister(key.fd)
+                elif key.fd == status_fd:
+                    # The job can write here too; keep only what a report needs
+                    reported = (reported + chunk)[:16]
+                else:
+                    buffer = buffers[key.fd]
+                    room = max_output - len(buffer)
+                    buffer += chunk[:room]
+                    if len(chunk) > room:
+                        truncated.add(key.fd)
+                        limit = 'output'
+
+    if limit is not None:
+        _kill_group(pid)
+    # A job that closed its pipes may still be running; it has until the deadline
+    interval = 0.001
+    while True:
+        waited, wait_status, usage = os.wait4(pid, os.WNOHANG)
+        if waited:
+            break
+        remaining = deadline - time.monotonic()
+        if limit is not None or remaining <= 0:
+            if limit is None:
+                limit = 'timeout'
+            _kill_group(pid)
+            _, wait_status, usage = os.wait4(pid, 0)
+            break
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, WAIT_INTERVAL)
+    # Anything the job left running in its group goes with it
+    _kill_group(pid)
+    cpu = usage.ru_utime + usage.ru_stime
+    if limit is None:
+        reported = reported.decode(errors='replace')
+        if reported in REPORTED_LIMITS:
+            limit = reported
+        elif os.WIFSIGNALED(wait_status) and cpu >= limits['cpu_seconds']:
+            # SIGXCPU ignored by the job, or SIGKILL at the hard limit
+            limit = 'cpu'
+
+    streams = []
+    for fd in (out_fd, err_fd):
+        text = buffers[fd].decode('utf-8', errors='replace')
+        if fd in truncated:
+            text += TRUNCATION_MARKER.format(max_output)
+        streams.append(text)
+    ok = limit is None and os.WIFEXITED(wait_status) and os.WEXITSTATUS(wait_status) == 0
+    return ok, streams[0], streams[1], cpu, limit
+
+
+def _kill_group(pgid):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def run(job, protocol_fds):
+    """Fork, run one job in the child and report on it"""
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    status_r, status_w = os.pipe()
+    worker_pid = os.getpid()
+    pid = os.fork()
+    if pid == 0:
+        os.setpgid(0, 0)
+        # Nothing the job runs may touch the protocol or read its own output
+        for fd in (*protocol_fds, out_r, err_r, status_r):
+            os.close(fd)
+        os.dup2(out_w, 1)
+        os.dup2(err_w, 2)
+        os.close(out_w)
+        os.close(err_w)
+        run_child(job, status_w, worker_pid)
+
+    # On both sides, so the job's group exists before the worker may kill it
+    try:
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+    for fd in (out_w, err_w, status_w):
+        os.close(fd)
+    try:
+        ok, stdout, stderr, cpu, limit = _collect(pid, out_r, err_r, status_r, job['timeout'], job['limits'])
+    finally:
+        for fd in (out_r, err_r, status_r):
+            os.close(fd)
+    return {'ok': ok, 'stdout': stdout, 'stderr': stderr, 'cpu': cpu, 'limit': limit}
+
+
+def warm_up():
+    """
+    Do once here what every job process would otherwise do for the first time:
+    set up the compiler and format a traceback. Forked jobs inherit the result.
+    """
+    try:
+        exec(compile('1 / 0', FILENAME, 'exec'), {})
+    except ZeroDivisionError as e:
+        traceback.format_exception(type(e), e, e.__traceback__)
+
+
+def main():
+    job_fd, result_fd = os.dup(0), os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+    warm_up()
+    write_frame(result_fd, {'ready': True})
+    while True:
+        job = read_frame(job_fd)
+        if job is None:
+            return
+        write_frame(result_fd, run(job, (job_fd, result_fd)))
+
+
+if __name__ == '__main__':
+    main()
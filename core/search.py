@@ -0,0 +1,196 @@
+"""
+Inverted index over course and module text.
+
+Each (term, document) pair is stored as a SearchPosting row with a
+precomputed weight, so a query only touches the postings of its own terms
+through the term index instead of scanning Course.description and
+Module.content with LIKE '%x%'.
+"""
+import math
+import re
+from collections import Counter
+from django.db import transaction
+from django.db.models import Case, Count, FloatField, Sum, Value, When, F
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+from .models import Course, Module, SearchPosting
+
+TOKEN_RE = re.compile(r'[a-z0-9_]{2,64}')
+MAX_QUERY_TERMS = 8
+SNIPPET_RADIUS = 80
+
+# Field weights: a hit in a title is worth more than one in body text
+COURSE_TITLE_WEIGHT = 5.0
+COURSE_DESCRIPTION_WEIGHT = 1.0
+MODULE_TITLE_WEIGHT = 3.0
+MODULE_CONTENT_WEIGHT = 1.0
+
+STOPWORDS = {
+    # English
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'with',
+    # Indonesian
+    'dan', 'di', 'ke', 'dari', 'yang', 'untuk', 'ini', 'itu', 'dengan', 'atau',
+    'pada', 'adalah',
+}
+
+
+def tokenize(text):
+    """Split text (Markdown or HTML) into lowercase index terms"""
+    if not text:
+        return []
+    return [t for t in TOKEN_RE.findall(strip_tags(text).lower()) if t not in STOPWORDS]
+
+
+def _weigh(fields):
+    """Combine (text, field_weight) pairs into {term: weight} with damped tf"""
+    weights = Counter()
+    for text, field_weight in fields:
+        for term, tf in Counter(tokenize(text)).items():
+            weights[term] += field_weight * (1 + math.log(tf))
+    return weights
+
+
+def course_postings(course):
+    """Build the course-level postings (title and description)"""
+    weights = _weigh([
+        (course.title, COURSE_TITLE_WEIGHT),
+        (course.description, COURSE_DESCRIPTION_WEIGHT),
+    ])
+    return [SearchPosting(term=term, course_id=course.id, weight=weight) for term, weight in weights.items()]
+
+
+def module_postings(module):
+    """Build the postings of a single module"""
+    weights = _weigh([
+        (module.title, MODULE_TITLE_WEIGHT),
+        (module.content, MODULE_CONTENT_WEIGHT),
+    ])
+    return [
+        SearchPosting(term=term, course_id=module.course_id, module_id=module.id, weight=weight)
+        for term, weight in weights.items()
+    ]
+
+
+def index_course(course):
+    """Replace the course-level postings after a save"""
+    with transaction.atomic():
+        SearchPosting.objects.filter(course_id=course.id, module__isnull=True).delete()
+        SearchPosting.objects.bulk_create(course_postings(course))
+
+
+def index_module(module):
+    """Replace the postings of a module after a save"""
+    with transaction.atomic():
+        SearchPosting.objects.filter(module_id=module.id).delete()
+        SearchPosting.objects.bulk_create(module_postings(module))
+
+
+def parse_query(query):
+    """Return the distinct index terms of a search query, in order"""
+    terms = list(dict.fromkeys(tokenize(query)))
+    return terms[:MAX_QUERY_TERMS]
+
+
+def _score_expression(postings, terms, group_field, total_docs):
+    """Sum of weight * idf, with idf taken from the postings of each term"""
+    doc_freq = dict(
+        postings.values('term').annotate(n=Count(group_field, distinct=True)).values_list('term', 'n')
+    )
+    whens = [
+        When(term=term, then=F('weight') * Value(math.log(1 + total_docs / doc_freq[term])))
+        for term in terms if doc_freq.get(term)
+    ]
+    if not whens:
+        return None
+    return Sum(Case(*whens, default=Value(0.0), output_field=FloatField()))
+
+
+def highlight(text, terms, radius=SNIPPET_RADIUS):
+    """Return an HTML-escaped snippet around the first hit, terms wrapped in <mark>"""
+    plain = ' '.join(strip_tags(text or '').split())
+    if not plain:
+        return ''
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(t) for t in terms) + r')\b', re.IGNORECASE)
+    match = pattern.search(plain)
+    start = max(0, match.start() - radius) if match else 0
+    end = min(len(plain), (match.end() if match else 0) + radius * 2)
+    window = plain[start:end]
+
+    parts = []
+    last = 0
+    for hit in pattern.finditer(window):
+        parts.append(escape(window[last:hit.start()]))
+        parts.append(f'<mark>{escape(hit.group(0))}</mark>')
+        last = hit.end()
+    parts.append(escape(window[last:]))
+
+    prefix = '&hellip;' if start > 0 else ''
+    suffix = '&hellip;' if end < len(plain) else ''
+    return mark_safe(prefix + ''.join(parts) + suffix)
+
+
+def search_courses(query, limit=20, include_inactive=False):
+    """
+    Rank courses by their own text and the text of their modules.
+    Courses matching more query terms come first, then by tf-idf score.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return []
+
+    postings = SearchPosting.objects.filter(term__in=terms)
+    if not include_inactive:
+        postings = postings.filter(course__is_active=True)
+
+    score = _score_expression(postings, terms, 'course', Course.objects.count() or 1)
+    if score is None:
+        return []
+
+    ranked = list(
+        postings.values('course')
+        .annotate(score=score, matched=Count('term', distinct=True))
+        .order_by('-matched', '-score')[:limit]
+    )
+    courses = Course.objects.with_counts().select_related('mentor').in_bulk([r['course'] for r in ranked])
+
+    results = []
+    for row in ranked:
+        course = courses.get(row['course'])
+        if course is None:
+            continue
+        course.search_score = row['score']
+        course.snippet = highlight(course.description, terms)
+        results.append(course)
+    return results
+
+
+def search_lessons(course, query, limit=20):
+    """Rank the modules of one course, with highlighted content snippets"""
+    terms = parse_query(query)
+    if not terms:
+        return []
+
+    postings = SearchPosting.objects.filter(course_id=course.id, module__isnull=False, term__in=terms)
+    score = _score_expression(postings, terms, 'module', course.modules.count() or 1)
+    if score is None:
+        return []
+
+    ranked = list(
+        postings.values('module')
+        .annotate(score=score, matched=Count('term', distinct=True))
+        .order_by('-matched', '-score')[:limit]
+    )
+    modules = Module.objects.only('id', 'course_id', 'title', 'content', 'content_type', 'order').in_bulk(
+        [r['module'] for r in ranked]
+    )
+
+    results = []
+    for row in ranked:
+        module = modules.get(row['module'])
+        if module is None:
+            continue
+        module.search_score = row['score']
+        module.snippet = highlight(module.content, terms) or highlight(module.title, terms)
+        results.append(module)
+    return results
@@ -0,0 +1,115 @@
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Course, Module, Enrollment, AssessmentResult, Certificate, CourseStats
+from .caching import bump_course_version
+from .images import delete_derivatives, ensure_derivatives
+from .progress import refresh_progress_summary
+from .search import index_course, index_module
+from .recommendations import recommender
+from .stats import record_change, reprice_course
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    """Drop cached course cards and outlines when a course changes"""
+    bump_course_version(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Module)
+def module_changed(sender, instance, **kwargs):
+    """Module edits change the lesson count and the outline of their course"""
+    bump_course_version(instance.course_id)
+    # Course.updated_at drives Last-Modified/ETag of the course pages
+    Course.objects.filter(id=instance.course_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Module)
+def module_progress_summary(sender, instance, created, raw=False, **kwargs):
+    """A new, moved or reordered module changes next_module and the percentages"""
+    if raw:
+        return
+    old_state = None if created else instance.loaded_state
+    if old_state != instance.current_state:
+        course_ids = {instance.course_id, (old_state or {}).get('course_id')} - {None}
+        refresh_progress_summary(Enrollment.objects.filter(course_id__in=course_ids))
+    instance.remember_state()
+
+
+@receiver(post_delete, sender=Module)
+def module_deleted_progress_summary(sender, instance, **kwargs):
+    """Completions of the module are gone (cascade), recount its course"""
+    refresh_progress_summary(Enrollment.objects.filter(course_id=instance.course_id))
+
+
+@receiver(post_save, sender=Course)
+def index_course_text(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the course title/description postings in sync; loaddata leaves it to rebuild_search_index"""
+    if raw:
+        return
+    if instance.indexed_changed(update_fields):
+        index_course(instance)
+    instance.remember_indexed()
+
+
+@receiver(post_save, sender=Module)
+def index_module_text(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the module postings in sync, deletes cascade on their own"""
+    if raw:
+        return
+    if instance.indexed_changed(update_fields):
+        index_module(instance)
+    instance.remember_indexed()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Module)
+def image_derivatives(sender, instance, raw=False, **kwargs):
+    """Resize a newly uploaded thumbnail/module image once it is committed"""
+    field_file = instance.thumbnail if sender is Course else instance.image
+    if field_file and not raw:
+        transaction.on_commit(lambda: ensure_derivatives(field_file))
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Module)
+def image_derivatives_deleted(sender, instance, **kwargs):
+    """Derivatives go with their owner, the original is left to the storage"""
+    field_file = instance.thumbnail if sender is Course else instance.image
+    if field_file:
+        delete_derivatives(field_file)
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_recommendations(sender, instance, **kwargs):
+    """Fold paid enrollments into the co-enrollment matrix once committed"""
+    if instance.payment_status == 'completed':
+        user_id, course_id = instance.user_id, instance.course_id
+        transaction.on_commit(lambda: recommender.record(user_id, course_id))
+
+
+@receiver(post_save, sender=Course)
+def course_stats_row(sender, instance, created, **kwargs):
+    """Every course gets a stats row, revenue tracks the current price"""
+    if created:
+        CourseStats.objects.get_or_create(course=instance)
+    else:
+        reprice_course(instance)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_save, sender=AssessmentResult)
+@receiver(post_save, sender=Certificate)
+def stats_source_saved(sender, instance, created, raw=False, **kwargs):
+    """Apply the CourseStats delta of a created or changed row"""
+    if not raw:
+        record_change(instance, created=created)
+
+
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_delete, sender=AssessmentResult)
+@receiver(post_delete, sender=Certificate)
+def stats_source_deleted(sender, instance, **kwargs):
+    """Remove a deleted row's contribution from CourseStats"""
+    record_change(instance, deleted=True)
@@ -0,0 +1,174 @@
+"""
+Maintenance of the CourseStats projection.
+
+Writes to Enrollment, AssessmentResult and Certificate are turned into
+counter deltas (new contribution minus the contribution as loaded from the
+database) and applied with a single UPDATE ... SET x = x + n per course.
+Saves that do not touch a counted field, such as progress updates, cost
+nothing. rebuild_course_stats recomputes everything in bulk.
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from .models import Assessment, AssessmentResult, Certificate, Course, CourseStats, Enrollment
+
+COUNTER_FIELDS = (
+    'enrollment_count',
+    'completed_count',
+    'all_enrollment_count',
+    'all_completed_count',
+    'assessment_attempts',
+    'assessment_score_total',
+    'certificate_count',
+)
+
+
+def _contribution(model, state):
+    """Return (course_id, Counter of CourseStats deltas) one row adds to the projection"""
+    if model is Enrollment:
+        paid = state['payment_status'] == 'completed'
+        return state['course_id'], Counter({
+            'enrollment_count': int(paid),
+            'completed_count': int(paid and bool(state['completed'])),
+            'all_enrollment_count': 1,
+            'all_completed_count': int(bool(state['completed'])),
+        })
+    if model is AssessmentResult:
+        course_id = Assessment.objects.filter(id=state['assessment_id']).values_list('course_id', flat=True).first()
+        return course_id, Counter({
+            'assessment_attempts': 1,
+            'assessment_score_total': state['score'] or 0,
+        })
+    if model is Certificate:
+        return state['course_id'], Counter({'certificate_count': 1})
+    raise ValueError(f"{model.__name__} does not feed CourseStats")
+
+
+def _apply(course_id, deltas):
+    """Add deltas to one course's counters, revenue follows enrollment_count"""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not course_id or not deltas:
+        return
+
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if 'enrollment_count' in deltas:
+        price = Course.objects.filter(id=course_id).values_list('price', flat=True).first() or Decimal('0')
+        updates['revenue'] = F('revenue') + price * deltas['enrollment_count']
+
+    updated = CourseStats.objects.filter(course_id=course_id).update(updated_at=timezone.now(), **updates)
+    if not updated and any(v > 0 for v in deltas.values()):
+        # No row yet (course predates the projection): build it from the
+        # source tables, which already include this write. Pure decrements
+        # are skipped, they come from cascade deletes of the course itself.
+        refresh_course_stats(course_id)
+
+
+def _values_present(state):
+    return state is not None and all(v is not None for v in state.values())
+
+
+def record_change(instance, created=False, deleted=False):
+    """Apply the CourseStats delta for a saved or deleted row"""
+    model = type(instance)
+    old_state = None if created else instance.loaded_state
+    new_state = None if deleted else instance.current_state
+
+    if not created and not deleted and not _values_present(old_state):
+        # Saved without being loaded first (or with deferred fields):
+        # the old contribution is unknown, so recompute the course instead
+        refresh_course_stats(instance.current_state.get('course_id') or _contribution(model, new_state)[0])
+        instance.remember_state()
+        return
+
+    if old_state == new_state:
+        return
+
+    deltas = defaultdict(Counter)
+    if old_state is not None:
+        course_id, contribution = _contribution(model, old_state)
+        deltas[course_id].subtract(contribution)
+    if new_state is not None:
+        course_id, contribution = _contribution(model, new_state)
+        deltas[course_id].update(contribution)
+
+    with transaction.atomic():
+        for course_id, course_deltas in deltas.items():
+            _apply(course_id, course_deltas)
+
+    if not deleted:
+        instance.remember_state()
+
+
+def reprice_course(course):
+    """Keep revenue = paid enrollments x current price after a price change"""
+    CourseStats.objects.filter(course_id=course.id).update(
+        revenue=F('enrollment_count') * course.price,
+        updated_at=timezone.now()
+    )
+
+
+def compute_course_stats(course_ids=None):
+    """Recompute CourseStats values from the source tables, grouped per course"""
+    courses = Course.objects.all()
+    enrollments = Enrollment.objects.all()
+    results = AssessmentResult.objects.all()
+    certificates = Certificate.objects.all()
+    if course_ids is not None:
+        courses = courses.filter(id__in=course_ids)
+        enrollments = enrollments.filter(course_id__in=course_ids)
+        results = results.filter(assessment__course_id__in=course_ids)
+        certificates = certificates.filter(course_id__in=course_ids)
+
+    stats = {
+        course_id: {'course_id': course_id, 'revenue': Decimal('0'), **{f: 0 for f in COUNTER_FIELDS}}
+        for course_id in courses.values_list('id', flat=True)
+    }
+    prices = dict(courses.values_list('id', 'price'))
+
+    paid = Q(payment_status='completed')
+    for row in enrollments.values('course_id').annotate(
+        n=Count('id', filter=paid),
+        done=Count('id', filter=paid & Q(completed=True)),
+        all_n=Count('id'),
+        all_done=Count('id', filter=Q(completed=True)),
+    ):
+        if row['course_id'] in stats:
+            stats[row['course_id']].update(
+                enrollment_count=row['n'],
+                completed_count=row['done'],
+                all_enrollment_count=row['all_n'],
+                all_completed_count=row['all_done'],
+                revenue=prices[row['course_id']] * row['n'],
+            )
+    for row in results.values('assessment__course_id').annotate(n=Count('id'), total=Sum('score')):
+        if row['assessment__course_id'] in stats:
+            stats[row['assessment__course_id']].update(
+                assessment_attempts=row['n'],
+                assessment_score_total=row['total'] or 0,
+            )
+    for row in certificates.values('course_id').annotate(n=Count('id')):
+        if row['course_id'] in stats:
+            stats[row['course_id']]['certificate_count'] = row['n']
+    return stats
+
+
+def refresh_course_stats(course_id):
+    """Recompute a single course's row from scratch"""
+    if not course_id:
+        return
+    values = compute_course_stats([course_id]).get(course_id)
+    if values is not None:
+        values.pop('course_id')
+        CourseStats.objects.update_or_create(course_id=course_id, defaults=values)
+
+
+def top_courses(limit=5):
+    """Best-selling courses, read straight from the enrollment_count index"""
+    return CourseStats.objects.select_related('course__mentor').order_by('-enrollment_count')[:limit]
+
+
+def total_revenue():
+    """Sum of paid enrollments x course price across all courses"""
+    return CourseStats.objects.aggregate(total=Sum('revenue'))['total'] or Decimal('0')
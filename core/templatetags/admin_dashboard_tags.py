@@ -2,6 +2,7 @@ from django import template
 from django.db.models import Sum, Count
 from django.contrib.auth import get_user_model
 from core.models import Course, Enrollment, User
+from core.stats import top_courses as top_course_stats, total_revenue as stats_total_revenue
 from decimal import Decimal
 import json
 
@@ -10,16 +11,7 @@ register = template.Library()
 @register.simple_tag
 def get_admin_stats():
     # 1. Total Revenue
-    total_revenue = Decimal('0')
-    completed_enrollments = Enrollment.objects.filter(payment_status='completed').select_related('course')
-
-    for en in completed_enrollments:
-        price = en.course.price
-        if hasattr(price, 'to_decimal'):
-            price = price.to_decimal()
-        elif not isinstance(price, Decimal):
-            price = Decimal(str(price))
-        total_revenue += price
+    total_revenue = stats_total_revenue()
 
     # 2. User Distribution
     user_counts = {
@@ -29,18 +21,11 @@ def get_admin_stats():
         'pembaca': User.objects.filter(role='pembaca').count(),
     }
 
-    # 3. Course Performance
-    courses = Course.objects.all()
-    course_data = []
-    for c in courses:
-        enrollment_count = Enrollment.objects.filter(course=c, payment_status='completed').count()
-        course_data.append({
-            'title': c.title,
-            'count': enrollment_count
-        })
-
-    # Sort by count desc and take top 5
-    top_courses = sorted(course_data, key=lambda x: x['count'], reverse=True)[:5]
+    # 3. Course Performance (top 5 by enrollments)
+    top_courses = [
+        {'title': stats.course.title, 'count': stats.enrollment_count}
+        for stats in top_course_stats(5)
+    ]
 
     # 4. Recent Activity (Last 5 enrollments)
     recent_enrollments = Enrollment.objects.filter(payment_status='completed').select_related('user', 'course').order_by('-enrolled_at')[:5]
@@ -0,0 +1,38 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+from core.images import responsive_sources
+
+register = template.Library()
+
+DEFAULT_SIZES = '(max-width: 768px) 100vw, 400px'
+
+
+@register.simple_tag
+def responsive_image(field_file, alt='', css_class='', sizes=DEFAULT_SIZES, style='', loading='lazy'):
+    """
+    <picture> with WebP and JPEG srcsets plus explicit width/height, e.g.
+    {% responsive_image course.thumbnail alt=course.title css_class="card-img" %}
+    """
+    if not field_file:
+        return ''
+    sources = responsive_sources(field_file)
+    webp = sources['srcsets'].get('webp')
+    jpeg = sources['srcsets'].get('jpeg')
+
+    attrs = [('src', sources['src'])]
+    if jpeg:
+        attrs += [('srcset', jpeg), ('sizes', sizes)]
+    if sources['width']:
+        attrs += [('width', sources['width']), ('height', sources['height'])]
+    attrs += [('alt', alt), ('class', css_class), ('style', style), ('loading', loading), ('decoding', 'async')]
+    img = format_html(
+        '<img{}>',
+        format_html_join('', ' {}="{}"', ((k, v) for k, v in attrs if v != '' or k == 'alt'))
+    )
+    if not webp:
+        return img
+    return format_html(
+        '<picture>{}{}</picture>',
+        format_html('<source type="image/webp" srcset="{}" sizes="{}">', webp, sizes),
+        img
+    )
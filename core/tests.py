@@ -1,3 +1,1015 @@
-from django.test import TestCase
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from . import quiz_buffer as buffer_module
+from .checks import check_quiz_buffer_cache
+from .code_cache import CodeResultCache, is_deterministic
+from .forms import CatalogFilterForm
+from .jobs import OWNER_KEY, CodeJobQueue, QueueFull
+from .models import Course, CourseStats, Enrollment, Module, ModuleCompletion, SearchPosting, User
+from .pagination import decode_cursor, encode_cursor, keyset_paginate
+from .progress import SUMMARY_FIELDS, JSONObjectSet, check_progress_summary, refresh_progress_summary
+from .quiz_buffer import QuizProgressBuffer
+from .stats import COUNTER_FIELDS, compute_course_stats
+from .search import highlight, parse_query, search_courses, search_lessons, tokenize
+from .runner import REPLY_GRACE, CodeRunnerPool, RunResult, WorkerError, _Worker, sandbox_limits, sandbox_user, spawn_run
+from .runner_worker import TRUNCATION_MARKER
+from .progress_events import ProgressEventError, apply_progress_events, parse_events
 
-# Create your tests here.
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrate core to `migrate_from`, let the test add rows, then move between states"""
+    migrate_from = None
+
+    def setUp(self):
+        super().setUp()
+        self.latest = MigrationExecutor(connection).loader.graph.leaf_nodes('core')
+        self.apps = self.migrate_to(self.migrate_from)
+
+    def tearDown(self):
+        self.migrate_to(self.latest[0][1])
+        super().tearDown()
+
+    def migrate_to(self, name):
+        """Apply or unapply core migrations up to `name`, return the historical apps"""
+        executor = MigrationExecutor(connection)
+        executor.migrate([('core', name)])
+        executor.loader.build_graph()
+        return executor.loader.project_state([('core', name)]).apps
+
+    def patch_batch_size(self, migration, size=2):
+        """Small chunks, so the tests cross chunk boundaries"""
+        module = importlib.import_module(f'core.migrations.{migration}')
+        patcher = mock.patch.object(module, 'BATCH_SIZE', size)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_course(self, apps, title, modules, with_bits=False):
+        """A course with modules at the orders given; with_bits numbers them in outline order"""
+        Course = apps.get_model('core', 'Course')
+        Module = apps.get_model('core', 'Module')
+        course = Course.objects.create(title=title, description='', price=0)
+        return course, [
+            Module.objects.create(
+                course=course, title=f'{title} {order}', order=order, content_type='text', content='',
+                **({'progress_bit': sorted(modules).index(order)} if with_bits else {})
+            )
+            for order in modules
+        ]
+
+    def make_enrollment(self, apps, course, username, **fields):
+        User = apps.get_model('core', 'User')
+        Enrollment = apps.get_model('core', 'Enrollment')
+        user = User.objects.create(username=username)
+        return Enrollment.objects.create(
+            user=user, course=course, access_key=username.upper(), payment_status='completed', **fields
+        )
+
+
+class ProgressBitmapMigrationTests(MigrationTestCase):
+    """0019: progress['completed_modules'] <-> Enrollment.completed_bits"""
+    migrate_from = '0018_module_content_html'
+
+    def test_forward_and_reverse(self):
+        self.patch_batch_size('0019_progress_bitmap')
+        course, (m2, m0, m1) = self.make_course(self.apps, 'python', [2, 0, 1])
+        other, (foreign,) = self.make_course(self.apps, 'web', [0])
+        quiz = {str(m0.id): {'answers': [1]}}
+        enrollments = [
+            self.make_enrollment(self.apps, course, 'ani', progress={
+                # A deleted module and a module of another course are dropped
+                'completed_modules': [m2.id, m0.id, foreign.id, 999999], 'quiz_data': quiz,
+            }),
+            self.make_enrollment(self.apps, course, 'budi', progress={'completed_modules': []}),
+            self.make_enrollment(self.apps, course, 'citra', progress={}),
+            self.make_enrollment(self.apps, other, 'dewi', progress={'completed_modules': [foreign.id]}),
+        ]
+
+        apps = self.migrate_to('0019_progress_bitmap')
+        Module = apps.get_model('core', 'Module')
+        Enrollment = apps.get_model('core', 'Enrollment')
+        self.assertEqual(
+            dict(Module.objects.values_list('id', 'progress_bit')),
+            {m0.id: 0, m1.id: 1, m2.id: 2, foreign.id: 0}
+        )
+        ani, budi, citra, dewi = (Enrollment.objects.get(id=e.id) for e in enrollments)
+        self.assertEqual(bytes(ani.completed_bits), bytes([0b101]))
+        self.assertEqual(ani.progress, {'quiz_data': quiz})
+        self.assertEqual(bytes(budi.completed_bits), b'')
+        self.assertEqual(citra.progress, {})
+        self.assertEqual(bytes(dewi.completed_bits), bytes([0b1]))
+
+        apps = self.migrate_to('0018_module_content_html')
+        Enrollment = apps.get_model('core', 'Enrollment')
+        progress = {e.id: Enrollment.objects.get(id=e.id).progress for e in enrollments}
+        self.assertEqual(progress[ani.id], {'completed_modules': [m0.id, m2.id], 'quiz_data': quiz})
+        self.assertEqual(progress[budi.id], {'completed_modules': []})
+        self.assertEqual(progress[citra.id], {'completed_modules': []})
+        self.assertEqual(progress[dewi.id], {'completed_modules': [foreign.id]})
+
+
+class ModuleCompletionMigrationTests(MigrationTestCase):
+    """0020: Enrollment.completed_bits <-> ModuleCompletion rows"""
+    migrate_from = '0019_progress_bitmap'
+
+    def test_forward_and_reverse(self):
+        self.patch_batch_size('0020_module_completions')
+        course, (m0, m1, m2) = self.make_course(self.apps, 'python', [0, 1, 2], with_bits=True)
+        quiz = {str(m2.id): {'completed_at': '2026-01-02T03:04:05+00:00'}}
+        enrollments = [
+            # Bit 7 has no module and is dropped
+            self.make_enrollment(self.apps, course, 'ani', completed_bits=bytes([0b10000101]), progress={'quiz_data': quiz}),
+            self.make_enrollment(self.apps, course, 'budi', completed_bits=bytes([0b010])),
+            self.make_enrollment(self.apps, course, 'citra', completed_bits=b''),
+        ]
+        ani, budi, citra = enrollments
+
+        apps = self.migrate_to('0020_module_completions')
+        ModuleCompletion = apps.get_model('core', 'ModuleCompletion')
+        rows = {(c.enrollment_id, c.module_id): c.completed_at for c in ModuleCompletion.objects.all()}
+        self.assertEqual(set(rows), {(ani.id, m0.id), (ani.id, m2.id), (budi.id, m1.id)})
+        # The saved quiz time where there is one, else the enrollment date
+        self.assertEqual(rows[(ani.id, m2.id)], datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc))
+        self.assertEqual(rows[(ani.id, m0.id)], ani.enrolled_at)
+
+        apps = self.migrate_to('0019_progress_bitmap')
+        Enrollment = apps.get_model('core', 'Enrollment')
+        bits = {e.id: bytes(e.completed_bits) for e in Enrollment.objects.all()}
+        self.assertEqual(bits, {ani.id: bytes([0b101]), budi.id: bytes([0b010]), citra.id: b''})
+
+
+class ProgressSummaryMigrationTests(MigrationTestCase):
+    """0021: summary columns on Enrollment, filled from module_completions"""
+    migrate_from = '0020_module_completions'
+
+    def test_forward_and_reverse(self):
+        self.patch_batch_size('0021_enrollment_progress_summary')
+        ModuleCompletion = self.apps.get_model('core', 'ModuleCompletion')
+        course, (m1, m0, m2) = self.make_course(self.apps, 'python', [1, 0, 2], with_bits=True)
+        empty, _ = self.make_course(self.apps, 'web', [])
+        ani, budi, citra, dewi, eka = (
+            self.make_enrollment(self.apps, course, 'ani'),
+            self.make_enrollment(self.apps, course, 'budi'),
+            self.make_enrollment(self.apps, course, 'citra'),
+            self.make_enrollment(self.apps, empty, 'dewi'),
+            self.make_enrollment(self.apps, course, 'eka'),
+        )
+        early = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        late = datetime(2026, 2, 1, tzinfo=dt_timezone.utc)
+        ModuleCompletion.objects.bulk_create([
+            ModuleCompletion(enrollment_id=ani.id, module_id=m0.id, completed_at=late),
+            ModuleCompletion(enrollment_id=ani.id, module_id=m2.id, completed_at=early),
+            *(ModuleCompletion(enrollment_id=citra.id, module_id=m.id, completed_at=early) for m in (m0, m1, m2)),
+        ])
+
+        apps = self.migrate_to('0021_enrollment_progress_summary')
+        Enrollment = apps.get_model('core', 'Enrollment')
+        summary = {
+            e['id']: tuple(e[name] for name in SUMMARY_FIELDS)
+            for e in Enrollment.objects.values('id', *SUMMARY_FIELDS)
+        }
+        self.assertEqual(summary, {
+            # Next is the first open module in outline order, not by id or bit
+            ani.id: (2, 66, m1.id, late),
+            budi.id: (0, 0, m0.id, None),
+            citra.id: (3, 100, None, early),
+            dewi.id: (0, 0, None, None),
+            eka.id: (0, 0, m0.id, None),
+        })
+
+        apps = self.migrate_to('0020_module_completions')
+        fields = {f.name for f in apps.get_model('core', 'Enrollment')._meta.get_fields()}
+        self.assertFalse(fields & {'completed_count', 'progress_percent', 'next_module', 'last_activity_at'})
+        self.assertEqual(apps.get_model('core', 'ModuleCompletion').objects.count(), 5)
+
+
+class RefreshProgressSummaryTests(TestCase):
+
+    def setUp(self):
+        self.course = Course.objects.create(title='Python', description='', price=0)
+        self.modules = [
+            Module.objects.create(course=self.course, title=f'Modul {i}', order=i, content_type='text', content='')
+            for i in range(3)
+        ]
+        self.enrollments = [
+            Enrollment.objects.create(user=User.objects.create(username=name), course=self.course, payment_status='completed')
+            for name in ('ani', 'budi')
+        ]
+
+    def summary(self, enrollment):
+        enrollment.refresh_from_db()
+        return enrollment.completed_count, enrollment.progress_percent, enrollment.next_module_id
+
+    def test_recomputes_from_completions(self):
+        ani, budi = self.enrollments
+        first, second, third = self.modules
+        # Written behind the summary's back, as a bulk import would
+        ModuleCompletion.objects.bulk_create([
+            ModuleCompletion(enrollment=ani, module=first),
+            ModuleCompletion(enrollment=ani, module=third),
+        ])
+        self.assertEqual([row[0] for row in check_progress_summary(Enrollment.objects.all())], [ani.id])
+
+        self.assertEqual(refresh_progress_summary(Enrollment.objects.all()), 2)
+        self.assertEqual(self.summary(ani), (2, 66, second.id))
+        self.assertEqual(self.summary(budi), (0, 0, first.id))
+        self.assertEqual(list(check_progress_summary(Enrollment.objects.all())), [])
+
+        # Reordering changes which open module comes next
+        Module.objects.filter(id=third.id).update(order=-1)
+        Module.objects.filter(id=second.id).update(order=5)
+        refresh_progress_summary(Enrollment.objects.all())
+        self.assertEqual(self.summary(budi), (0, 0, third.id))
+
+    def test_touch_sets_last_activity_of_the_given_rows_only(self):
+        ani, budi = self.enrollments
+        refresh_progress_summary(Enrollment.objects.filter(id=ani.id))
+        ani.refresh_from_db()
+        self.assertIsNone(ani.last_activity_at)
+
+        refresh_progress_summary(Enrollment.objects.filter(id=ani.id), touch=True)
+        ani.refresh_from_db()
+        budi.refresh_from_db()
+        self.assertIsNotNone(ani.last_activity_at)
+        self.assertIsNone(budi.last_activity_at)
+
+
+class ModuleProgressBitTests(TestCase):
+
+    def test_bits_assigned_under_the_course_lock(self):
+        course = Course.objects.create(title='Python', description='', price=0)
+        with mock.patch.object(Course.objects, 'select_for_update', wraps=Course.objects.select_for_update) as lock:
+            modules = [
+                Module.objects.create(course=course, title=f'Modul {i}', order=10 - i, content_type='text', content='')
+                for i in range(3)
+            ]
+        self.assertEqual(lock.call_count, 3)
+        self.assertEqual([m.progress_bit for m in modules], [0, 1, 2])
+
+        # Reordering and deleting keep the bits; a new module takes the next one
+        modules[0].order = 99
+        with mock.patch.object(Course.objects, 'select_for_update') as lock:
+            modules[0].save()
+        lock.assert_not_called()
+        modules[2].delete()
+        added = Module.objects.create(course=course, title='Baru', order=0, content_type='text', content='')
+        self.assertEqual(added.progress_bit, 2)
+
+
+class MarkCompletedTests(TestCase):
+
+    def setUp(self):
+        self.course = Course.objects.create(title='Python', description='', price=0)
+        self.modules = [
+            Module.objects.create(course=self.course, title=f'Modul {i}', order=i, content_type='text', content='')
+            for i in range(4)
+        ]
+        user = User.objects.create(username='ani')
+        self.enrollment = Enrollment.objects.create(user=user, course=self.course, payment_status='completed')
+
+    def test_records_once_and_updates_summary(self):
+        first, second = self.modules[:2]
+        self.assertTrue(self.enrollment.mark_completed(second))
+        self.assertFalse(self.enrollment.mark_completed(second))
+        self.assertEqual(ModuleCompletion.objects.filter(enrollment=self.enrollment).count(), 1)
+        self.assertTrue(self.enrollment.has_completed(second))
+        self.assertFalse(self.enrollment.has_completed(first))
+
+        # The instance is refreshed, and so is the row
+        for enrollment in (self.enrollment, Enrollment.objects.get(id=self.enrollment.id)):
+            self.assertEqual(enrollment.completed_count, 1)
+            self.assertEqual(enrollment.progress_percent, 25)
+            self.assertEqual(enrollment.next_module_id, first.id)
+            self.assertIsNotNone(enrollment.last_activity_at)
+        self.assertEqual(list(self.enrollment.completion_bitmap), [second.progress_bit])
+
+    def test_all_modules_completed(self):
+        for module in self.modules:
+            self.enrollment.mark_completed(module)
+        self.assertEqual(self.enrollment.completed_count, 4)
+        self.assertEqual(self.enrollment.progress_percent, 100)
+        self.assertIsNone(self.enrollment.next_module_id)
+
+    def test_full_save_keeps_summary(self):
+        stale = Enrollment.objects.get(id=self.enrollment.id)
+        self.enrollment.mark_completed(self.modules[0])
+        # An instance loaded before the completion must not write its old summary back
+        stale.completed = True
+        stale.save()
+        enrollment = Enrollment.objects.get(id=self.enrollment.id)
+        self.assertTrue(enrollment.completed)
+        self.assertEqual(enrollment.completed_count, 1)
+
+
+class ProgressEventTests(TestCase):
+
+    def setUp(self):
+        course = Course.objects.create(title='Python', description='', price=0)
+        self.module = Module.objects.create(
+            course=course, title='Kuis', order=0, content_type='quiz', content='',
+            quiz_data=[{'question': '1 + 1?', 'options': ['1', '2'], 'correct_answer': 1}]
+        )
+        self.user = User.objects.create(username='ani')
+        self.enrollment = Enrollment.objects.create(user=self.user, course=course, payment_status='completed')
+
+    def test_rejects_ids_that_are_not_strings_or_integers(self):
+        raw = [
+            {'id': bad, 'type': 'complete', 'module_id': self.module.id}
+            for bad in (['a'], {'a': 1}, True, 1.5)
+        ] + [{'id': 'c-1', 'type': 'complete', 'module_id': self.module.id}]
+        with self.assertRaises(ProgressEventError) as raised:
+            parse_events(raw)
+        self.assertEqual([e['index'] for e in raised.exception.errors], [0, 1, 2, 3])
+
+        events, duplicates = parse_events([
+            {'id': 7, 'type': 'complete', 'module_id': self.module.id},
+            {'id': 7, 'type': 'complete', 'module_id': self.module.id},
+            {'id': '7', 'type': 'complete', 'module_id': self.module.id},
+        ])
+        self.assertEqual(([index for index, _ in events], duplicates), ([0, 2], 1))
+
+    def test_buffered_saves_dropped_only_after_commit(self):
+        quiz = {'type': 'quiz', 'module_id': self.module.id, 'answers': {'0': 1}}
+        with mock.patch('core.progress_events.quiz_buffer.discard') as discard:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(ProgressEventError):
+                    apply_progress_events(self.enrollment.id, self.user.id, [quiz, {'type': 'score', 'module_id': 0}])
+            discard.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                apply_progress_events(self.enrollment.id, self.user.id, [quiz])
+            discard.assert_not_called()
+            for callback in callbacks:
+                callback()
+            discard.assert_called_once_with(self.enrollment.id, [self.module.id])
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'quiz-buffer-tests',
+    'OPTIONS': {'MAX_ENTRIES': 100000},
+}})
+class QuizBufferTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        course = Course.objects.create(title='Python', description='', price=0)
+        self.modules = [
+            Module.objects.create(course=course, title=f'Kuis {i}', order=i, content_type='quiz', content='')
+            for i in range(3)
+        ]
+        self.enrollment = Enrollment.objects.create(
+            user=User.objects.create(username='ani'), course=course, payment_status='completed'
+        )
+        self.buffer = QuizProgressBuffer(flush_interval=60, max_pending=1000)
+        # Flushed by the tests, not by a thread
+        patcher = mock.patch.object(self.buffer, '_ensure_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def durable(self):
+        """Let the test's big LocMem stand in for Redis"""
+        patcher = mock.patch.object(buffer_module, 'is_durable_cache', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stored(self):
+        enrollment = Enrollment.objects.get(id=self.enrollment.id)
+        return (enrollment.progress or {}).get('quiz_data', {})
+
+    def test_writes_through_on_an_evicting_cache(self):
+        self.assertFalse(self.buffer.enabled)
+        self.buffer.save(self.enrollment.id, self.modules[0].id, {'score': 50})
+        self.assertEqual(self.stored(), {str(self.modules[0].id): {'score': 50}})
+        self.assertEqual(cache.get(buffer_module.ENTRY_KEY.format(self.enrollment.id, self.modules[0].id)), None)
+
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'}}
+        with override_settings(CACHES=redis):
+            self.assertTrue(self.buffer.enabled)
+        with override_settings(CACHES=redis, QUIZ_BUFFER_FLUSH_INTERVAL=5):
+            self.assertEqual(check_quiz_buffer_cache(None), [])
+        with override_settings(QUIZ_BUFFER_FLUSH_INTERVAL=5):
+            self.assertEqual([w.id for w in check_quiz_buffer_cache(None)], ['core.W001'])
+
+    def test_read_your_writes_and_flush(self):
+        self.durable()
+        first, second = self.modules[:2]
+        self.buffer.save(self.enrollment.id, first.id, {'score': 10})
+        self.buffer.save(self.enrollment.id, first.id, {'score': 20})
+        self.buffer.save(self.enrollment.id, second.id, {'score': 30})
+
+        self.assertEqual(self.stored(), {})
+        enrollment = Enrollment.objects.get(id=self.enrollment.id)
+        self.assertEqual(self.buffer.quiz_data(enrollment, [first.id, second.id]), {
+            str(first.id): {'score': 20}, str(second.id): {'score': 30},
+        })
+        # Repeated saves of a pair are logged once
+        self.assertEqual(cache.get(buffer_module.SEQ_KEY), 2)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.stored(), {str(first.id): {'score': 20}, str(second.id): {'score': 30}})
+        self.assertIsNotNone(Enrollment.objects.get(id=self.enrollment.id).last_activity_at)
+        self.assertEqual(self.buffer.flush(), 0)
+
+        # A save after the flush is logged again
+        self.buffer.save(self.enrollment.id, first.id, {'score': 90})
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.stored()[str(first.id)], {'score': 90})
+
+    def test_lost_log_entries_are_skipped_together(self):
+        self.durable()
+        first, second, third = self.modules
+        self.buffer.save(self.enrollment.id, first.id, {'score': 10})
+        # Two numbers whose log entries were lost, then a real save
+        cache.incr(buffer_module.SEQ_KEY, 2)
+        self.buffer.save(self.enrollment.id, third.id, {'score': 30})
+
+        # The first pass stops at the gap, which may be a save still writing its entry
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(set(self.stored()), {str(first.id)})
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(set(self.stored()), {str(first.id), str(third.id)})
+        self.assertEqual(cache.get(buffer_module.CURSOR_KEY), 4)
+
+    def test_recovers_from_a_lost_counter(self):
+        self.durable()
+        self.buffer.save(self.enrollment.id, self.modules[0].id, {'score': 10})
+        self.buffer.flush()
+        cache.delete(buffer_module.SEQ_KEY)
+
+        self.buffer.save(self.enrollment.id, self.modules[1].id, {'score': 20})
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.stored()[str(self.modules[1].id)], {'score': 20})
+
+    def test_json_set_sql_for_mysql(self):
+        # The suite runs on SQLite; compile the MySQL form against its compiler
+        query = Enrollment.objects.filter(id=self.enrollment.id).query
+        compiler = query.get_compiler(using='default')
+        expression = JSONObjectSet('progress', 'quiz_data', {12: {'score': 1}, '7': [1, 2]}).resolve_expression(query)
+        sql, params = expression.as_mysql(compiler, connection)
+
+        column = compiler.compile(expression.source_expressions[0])[0]
+        parse = "JSON_EXTRACT(%s, '$')"
+        self.assertEqual(sql, f'JSON_SET(JSON_INSERT({column}, %s, {parse}), %s, {parse}, %s, {parse})')
+        # Module ids are quoted path members, not array indexes
+        self.assertEqual(params, [
+            '$."quiz_data"', '{}',
+            '$."quiz_data"."12"', '{"score": 1}',
+            '$."quiz_data"."7"', '[1, 2]',
+        ])
+
+
+class CodeJobQueueTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.queue = CodeJobQueue(per_user=2)
+        # Jobs stay queued; no dispatcher threads
+        self.queue._pid = os.getpid()
+
+    def test_per_user_limit(self):
+        self.queue.submit('ani', 'print(1)')
+        self.queue.submit('ani', 'print(2)')
+        with self.assertRaises(QueueFull):
+            self.queue.submit('ani', 'print(3)')
+        self.queue.submit('budi', 'print(4)')
+        self.assertEqual(cache.get(OWNER_KEY.format('ani')), 2)
+
+    def test_owner_count_expiring_before_incr(self):
+        self.queue.submit('ani', 'print(1)')
+        with mock.patch('core.jobs.cache.incr', side_effect=ValueError):
+            job_id = self.queue.submit('ani', 'print(2)')
+        self.assertEqual(self.queue.get(job_id, 'ani')['status'], 'queued')
+        self.assertEqual(cache.get(OWNER_KEY.format('ani')), 1)
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_refuses_jobs_on_a_process_local_cache(self):
+        self.queue._pid = None
+        with self.assertRaises(ImproperlyConfigured):
+            self.queue.submit('ani', 'print(1)')
+
+
+def _process_gone(pid):
+    """No such process, or only its zombie waiting for a parent to reap it"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] == 'Z'
+    except FileNotFoundError:
+        return True
+
+
+class SandboxTests(SimpleTestCase):
+    # Writes its pid where the test can find it, then outlives any timeout
+    SLEEPER = (
+        "import os, time\n"
+        "path = input() + '/pid'\n"
+        "with open(path + '.tmp', 'w') as f:\n"
+        "    f.write(str(os.getpid()))\n"
+        "os.rename(path + '.tmp', path)\n"
+    )
+
+    def setUp(self):
+        # Writable by the sandbox user the programs run as
+        self.tmp = tempfile.mkdtemp()
+        os.chmod(self.tmp, 0o777)
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def run_limited(self, code, timeout=5, **limits):
+        return spawn_run(code, self.tmp, timeout, limits={**sandbox_limits(), **limits})
+
+    def test_output_is_capped(self):
+        result = self.run_limited("print('x' * 1000)\n", output_bytes=100)
+        self.assertEqual((result.status, result.limit), ('limit', 'output'))
+        self.assertEqual(result.output, 'x' * 100 + TRUNCATION_MARKER.format(100))
+
+    def test_resource_limits_are_named(self):
+        cases = [
+            ("x = bytearray(1024 * 1024 * 1024)\n", {'memory_mb': 256}, 'memory'),
+            ("while True:\n    pass\n", {'cpu_seconds': 1}, 'cpu'),
+            ("with open(input() + '/big', 'wb') as f:\n    f.write(b'x' * 2 * 1024 * 1024)\n", {'file_size_mb': 1}, 'file_size'),
+        ]
+        for code, limits, limit in cases:
+            result = self.run_limited(code, **limits)
+            self.assertEqual((result.status, result.limit), ('limit', limit), result.error)
+
+    def test_timeout(self):
+        result = self.run_limited("import time\ntime.sleep(30)\n", timeout=1)
+        self.assertEqual((result.status, result.limit), ('timeout', 'timeout'))
+
+    def job_pid(self):
+        path = os.path.join(self.tmp, 'pid')
+        deadline = time.monotonic() + 5
+        while not os.path.exists(path):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        with open(path) as f:
+            return int(f.read())
+
+    def test_job_that_closes_its_pipes_is_killed_at_the_timeout(self):
+        started = time.monotonic()
+        result = self.run_limited(self.SLEEPER + "os.closerange(0, 64)\ntime.sleep(30)\n", timeout=1)
+        # Answered by the worker, before the pool would give up on it
+        self.assertLess(time.monotonic() - started, 1 + REPLY_GRACE)
+        self.assertEqual((result.status, result.limit), ('timeout', 'timeout'))
+        self.assertTrue(_process_gone(self.job_pid()))
+
+    @skipUnless(sys.platform.startswith('linux'), 'parent-death signal is Linux only')
+    def test_job_dies_with_its_worker(self):
+        worker = _Worker()
+        worker.wait_ready()
+
+        def run():
+            try:
+                worker.run(self.SLEEPER + "time.sleep(30)\n", self.tmp, 30, sandbox_limits())
+            except WorkerError:
+                pass
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        pid = self.job_pid()
+        # What the pool does to a worker that stops answering
+        worker.kill()
+        thread.join()
+        deadline = time.monotonic() + 5
+        while not _process_gone(pid):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+    def test_caught_fork_is_reported(self):
+        code = "import os\ntry:\n    os.fork()\nexcept OSError:\n    print('no fork')\n"
+        result = spawn_run(code, '', 5)
+        self.assertEqual((result.output, result.limit), ('no fork\n', 'processes'))
+
+    @mock.patch('core.runner.os.geteuid', return_value=0)
+    def test_root_runs_programs_as_the_sandbox_user(self, geteuid):
+        with mock.patch('core.runner.pwd.getpwnam', return_value=mock.Mock(pw_uid=65534, pw_gid=65534)):
+            self.assertEqual(sandbox_user(), (65534, 65534))
+        with mock.patch('core.runner.pwd.getpwnam', side_effect=KeyError):
+            with self.assertRaises(ImproperlyConfigured):
+                sandbox_user()
+        with mock.patch('core.runner.pwd.getpwnam', return_value=mock.Mock(pw_uid=0, pw_gid=0)):
+            with self.assertRaises(ImproperlyConfigured):
+                sandbox_user()
+        geteuid.return_value = 1000
+        self.assertIsNone(sandbox_user())
+
+
+class CodeRunnerPoolTests(SimpleTestCase):
+    # A job's parent is the worker that forked it
+    WORKER_PID = "import os\nprint(os.getppid())\n"
+
+    def setUp(self):
+        # As the server's own user, so a job can reach its worker
+        self.pool = CodeRunnerPool(size=1, max_jobs=2, limits={**sandbox_limits(), 'run_as': None})
+        self.addCleanup(self.shutdown)
+
+    def shutdown(self):
+        if self.pool._pid is not None:
+            # Let replacements finish starting, so none outlives the test
+            self.wait_idle()
+        self.pool.shutdown()
+
+    def wait_idle(self, count=1):
+        deadline = time.monotonic() + 10
+        while self.pool._idle.qsize() < count and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def worker_pid(self):
+        result = self.pool.run(self.WORKER_PID, '', 5)
+        self.assertEqual(result.status, 'ok')
+        return int(result.output)
+
+    def test_recycled_after_max_jobs(self):
+        first = self.worker_pid()
+        self.assertEqual(self.worker_pid(), first)
+        self.assertNotEqual(self.worker_pid(), first)
+
+    def test_crashed_worker_is_replaced(self):
+        first = self.worker_pid()
+        result = self.pool.run("import os, signal\nos.kill(os.getppid(), signal.SIGKILL)\n", '', 5)
+        self.assertEqual(result.status, 'crashed')
+        self.assertNotEqual(self.worker_pid(), first)
+
+    @mock.patch('core.runner.REPLY_GRACE', 0.5)
+    def test_stuck_worker_is_replaced(self):
+        first = self.worker_pid()
+        result = self.pool.run("import os, signal\nos.kill(os.getppid(), signal.SIGSTOP)\n", '', 1)
+        self.assertEqual((result.status, result.limit), ('timeout', 'timeout'))
+        self.assertNotEqual(self.worker_pid(), first)
+
+    def test_busy_when_no_worker_frees_up(self):
+        self.pool._ensure_started()
+        worker = self.pool._idle.get(timeout=10)
+        try:
+            result = self.pool.run('print(1)', '', 0.2)
+        finally:
+            self.pool._idle.put(worker)
+        self.assertEqual(result.status, 'busy')
+        self.assertEqual(self.pool.run('print(1)', '', 5).output, '1\n')
+
+    def test_new_workers_after_a_fork(self):
+        first = self.worker_pid()
+        inherited = self.pool._idle
+        self.wait_idle()
+        # As if this process were the forked child of the one that started them
+        self.pool._pid = -1
+        self.assertNotEqual(self.worker_pid(), first)
+        self.assertIsNot(self.pool._idle, inherited)
+        inherited.get_nowait().close()
+
+    @mock.patch('core.runner.os.geteuid', return_value=0)
+    def test_missing_sandbox_user_fails_the_run_not_the_import(self, geteuid):
+        with mock.patch('core.runner.pwd.getpwnam', side_effect=KeyError):
+            pool = CodeRunnerPool(size=1)
+            with self.assertRaises(ImproperlyConfigured):
+                pool.run('print(1)', '', 5)
+        self.assertIsNone(pool._pid)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'code_results': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'code-results'},
+})
+class CodeResultCacheTests(SimpleTestCase):
+
+    def test_deterministic_programs(self):
+        for code in (
+            "import math\nprint(math.sqrt(int(input())))\n",
+            "from collections import Counter\nprint(Counter('aab'))\n",
+            "if __name__ == '__main__':\n    print(__file__)\n",
+            "class A:\n    def __init__(self):\n        self.x = 1\nprint(A().x)\n",
+            "print(",
+        ):
+            self.assertTrue(is_deterministic(code), code)
+
+    def test_programs_that_can_reach_other_code(self):
+        for code in (
+            "import random\nprint(random.random())\n",
+            "from os import urandom\n",
+            "from . import x\n",
+            "print(open('/etc/hostname').read())\n",
+            "print(__import__('random').random())\n",
+            "print(print.__self__.__import__('random').random())\n",
+            "print(int.__getattribute__)\n",
+            "print(__loader__, __spec__)\n",
+            "from collections import __builtins__ as b\n",
+            "import operator\nprint(operator.attrgetter('x'))\n",
+            "from typing import get_type_hints\n",
+            "match print:\n    case object(__self__=b):\n        pass\n",
+        ):
+            self.assertFalse(is_deterministic(code), code)
+
+    def test_only_finished_runs_are_stored(self):
+        results = CodeResultCache(max_bytes=10)
+        code = 'print(1)'
+        stored = [
+            RunResult(True, '1\n', '', 'ok', 0.5, None),
+            RunResult(False, '', 'NameError', 'error', 0.1, None),
+        ]
+        skipped = [
+            RunResult(False, '1\n', 'Memory limit exceeded', 'limit', 0.1, 'memory'),
+            RunResult(False, '', 'timed out', 'timeout', 5, 'timeout'),
+            RunResult(False, '', 'Code execution failed', 'crashed', 0.0, None),
+            RunResult(False, '', 'Code runner is busy', 'busy', 0.0, None),
+            RunResult(True, 'x' * 11, '', 'ok', 0.1, None),
+        ]
+        for timeout, result in enumerate(stored + skipped):
+            key, cached = results.lookup(code, '', timeout)
+            self.assertIsNone(cached)
+            results.store_result(key, result)
+            expected = result[:3] if result in stored else None
+            self.assertEqual(results.lookup(code, '', timeout)[1], expected, result)
+
+        self.assertEqual(results.stats['hits'], 2)
+        self.assertEqual(results.stats['saved_cpu_seconds'], 0.6)
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        start = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        self.courses = []
+        for i in range(7):
+            course = Course.objects.create(title=f'Kursus {i}', description='', price=i * 10)
+            # Pairs of courses share a timestamp, so pages split on the id
+            Course.objects.filter(id=course.id).update(created_at=start + timedelta(days=i // 2))
+            course.refresh_from_db()
+            self.courses.append(course)
+        # Newest first, ties broken by the higher id
+        self.ordered = sorted(self.courses, key=lambda c: (c.created_at, c.id), reverse=True)
+
+    def test_cursor_round_trip(self):
+        course = self.courses[3]
+        self.assertEqual(decode_cursor(encode_cursor(course)), (course.created_at, course.id))
+        for token in ('', 'not-base64!', encode_cursor(course)[:-3] + 'xyz'):
+            self.assertIsNone(decode_cursor(token))
+
+    def test_forward_and_back_across_ties(self):
+        pages, page = [], keyset_paginate(Course.objects.all(), page_size=2)
+        while True:
+            pages.append(page)
+            if not page.has_next:
+                break
+            page = keyset_paginate(Course.objects.all(), after=page.next_cursor, page_size=2)
+        self.assertEqual([c.id for p in pages for c in p], [c.id for c in self.ordered])
+        self.assertEqual([len(p) for p in pages], [2, 2, 2, 1])
+        self.assertFalse(pages[0].has_previous)
+
+        back = []
+        page = pages[-1]
+        while page.has_previous:
+            page = keyset_paginate(Course.objects.all(), before=page.previous_cursor, page_size=2)
+            back.append([c.id for c in page])
+        self.assertEqual(back, [[c.id for c in p] for p in reversed(pages[:-1])])
+        self.assertTrue(page.has_next)
+
+    def test_filters(self):
+        staff, student = User(username='staf', is_staff=True), User(username='ani')
+        Course.objects.filter(id=self.courses[6].id).update(is_active=False)
+        Course.objects.filter(id__in=[c.id for c in self.courses[:3]]).update(level='advanced')
+
+        def titles(params, user=student):
+            form = CatalogFilterForm(params)
+            return sorted(c.title for c in form.filter_queryset(Course.objects.all(), user))
+
+        self.assertEqual(len(titles({})), 6)
+        self.assertEqual(titles({'min_price': '20', 'max_price': '40'}), ['Kursus 2', 'Kursus 3', 'Kursus 4'])
+        self.assertEqual(titles({'level': 'advanced', 'min_price': '10'}), ['Kursus 1', 'Kursus 2'])
+        # Only staff may see inactive courses
+        self.assertEqual(titles({'is_active': 'inactive'}), titles({}))
+        self.assertEqual(titles({'is_active': 'inactive'}, staff), ['Kursus 6'])
+        self.assertEqual(len(titles({'is_active': 'all'}, staff)), 7)
+        # Invalid filters are ignored rather than failing the page
+        self.assertEqual(len(titles({'min_price': 'abc'})), 6)
+
+        filtered = CatalogFilterForm({'min_price': '20'}).filter_queryset(Course.objects.all(), student)
+        first = keyset_paginate(filtered, page_size=2)
+        second = keyset_paginate(filtered, after=first.next_cursor, page_size=2)
+        self.assertEqual(
+            [c.id for c in (*first, *second)],
+            [c.id for c in self.ordered if c.price >= Decimal(20) and c.id != self.courses[6].id]
+        )
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.python = Course.objects.create(
+            title='Python Dasar', description='Belajar variabel dan fungsi di Python', price=0
+        )
+        self.web = Course.objects.create(title='Web', description='HTML, CSS and a little Python', price=0)
+        self.loops = Module.objects.create(
+            course=self.python, title='Perulangan', order=0, content_type='text',
+            content='<p>Perulangan <b>while</b> dan for, while lagi, while terus</p>'
+        )
+        self.functions = Module.objects.create(
+            course=self.python, title='Fungsi', order=1, content_type='text', content='def dan return'
+        )
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('<p>The <b>Loop</b> dan x IF_ELSE 42</p>'), ['loop', 'if_else', '42'])
+        self.assertEqual(tokenize(''), [])
+        # Stopwords only, repeated terms once, at most MAX_QUERY_TERMS
+        self.assertEqual(parse_query('the dan yang'), [])
+        self.assertEqual(parse_query('loop Loop for while'), ['loop', 'while'])
+        self.assertEqual(len(parse_query(' '.join(f'kata{i}' for i in range(20)))), 8)
+
+    def test_ranking(self):
+        # A title hit outweighs a description hit
+        self.assertEqual([c.id for c in search_courses('python')], [self.python.id, self.web.id])
+        # Courses matching more terms come first, module text counts for the course
+        self.assertEqual([c.id for c in search_courses('perulangan css')][0], self.python.id)
+        self.assertEqual(search_courses('kosong'), [])
+
+        Course.objects.filter(id=self.python.id).update(is_active=False)
+        self.assertEqual([c.id for c in search_courses('python')], [self.web.id])
+        self.assertEqual(len(search_courses('python', include_inactive=True)), 2)
+
+        lessons = search_lessons(self.python, 'while fungsi')
+        self.assertEqual({m.id for m in lessons}, {self.loops.id, self.functions.id})
+        self.assertIn('<mark>while</mark>', search_lessons(self.python, 'while')[0].snippet)
+        self.assertEqual(str(highlight('<script>x</script> a < b', ['b'])), 'x a &lt; <mark>b</mark>')
+
+    def test_signals_reindex_only_changed_text(self):
+        postings = lambda: set(SearchPosting.objects.filter(module=self.loops).values_list('id', flat=True))
+        before = postings()
+        self.assertTrue(before)
+
+        module = Module.objects.get(id=self.loops.id)
+        module.order = 5
+        module.save()
+        module.save(update_fields=['order'])
+        self.assertEqual(postings(), before)
+
+        module.content = 'rekursi'
+        module.save(update_fields=['content'])
+        self.assertEqual(
+            set(SearchPosting.objects.filter(module=self.loops).values_list('term', flat=True)), {'perulangan', 'rekursi'}
+        )
+
+        course = Course.objects.get(id=self.web.id)
+        course.price = 10
+        course.save()
+        self.assertEqual([c.id for c in search_courses('web')], [self.web.id])
+        course.title = 'JavaScript'
+        course.save()
+        self.assertEqual([c.id for c in search_courses('javascript')], [self.web.id])
+        self.assertEqual(search_courses('web'), [])
+
+        # loaddata leaves the index to rebuild_search_index
+        from .signals import index_module_text
+        module.title = 'Baru'
+        index_module_text(Module, module, raw=True)
+        self.assertFalse(SearchPosting.objects.filter(term='baru').exists())
+
+
+class CourseStatsTests(TestCase):
+
+    def setUp(self):
+        self.python = Course.objects.create(title='Python', description='', price=100)
+        self.web = Course.objects.create(title='Web', description='', price=50)
+        self.user = User.objects.create(username='ani')
+
+    def stats(self, course):
+        row = CourseStats.objects.filter(course=course).values(*COUNTER_FIELDS, 'revenue').first()
+        # The deltas must agree with a recount from the source tables
+        expected = compute_course_stats([course.id])[course.id]
+        self.assertEqual(row, {f: expected[f] for f in row})
+        return row['enrollment_count'], row['all_enrollment_count'], row['all_completed_count'], row['revenue']
+
+    def test_enrollment_deltas(self):
+        enrollment = Enrollment.objects.create(user=self.user, course=self.python, payment_status='pending')
+        # Pending enrollments count for the mentor, not for sales or revenue
+        self.assertEqual(self.stats(self.python), (0, 1, 0, 0))
+
+        enrollment.payment_status = 'completed'
+        enrollment.save()
+        self.assertEqual(self.stats(self.python), (1, 1, 0, 100))
+        enrollment.completed = True
+        enrollment.save()
+        self.assertEqual(self.stats(self.python), (1, 1, 1, 100))
+
+        # A progress-only save changes nothing
+        loaded = Enrollment.objects.get(id=enrollment.id)
+        with self.assertNumQueries(1):
+            loaded.save(update_fields=['progress'])
+
+        enrollment.course = self.web
+        enrollment.save()
+        self.assertEqual(self.stats(self.python), (0, 0, 0, 0))
+        self.assertEqual(self.stats(self.web), (1, 1, 1, 50))
+
+        enrollment.delete()
+        self.assertEqual(self.stats(self.web), (0, 0, 0, 0))
+
+    def test_missing_row_and_unloaded_instance(self):
+        Enrollment.objects.create(user=self.user, course=self.python, payment_status='completed')
+        CourseStats.objects.filter(course=self.python).delete()
+        other = Enrollment.objects.create(
+            user=User.objects.create(username='budi'), course=self.python, payment_status='completed'
+        )
+        # Rebuilt from the source tables, which already include the new row
+        self.assertEqual(self.stats(self.python), (2, 2, 0, 200))
+
+        # Saved without being loaded: the course is recounted
+        Enrollment(id=other.id, user=other.user, course=self.python, payment_status='pending',
+                   access_key=other.access_key, enrolled_at=other.enrolled_at).save()
+        self.assertEqual(self.stats(self.python), (1, 2, 0, 100))
+
+    def test_mentor_dashboard_counts_pending_enrollments(self):
+        mentor = User.objects.create(username='mentor', role='penulis')
+        Course.objects.filter(id=self.python.id).update(mentor=mentor)
+        Enrollment.objects.create(user=self.user, course=self.python, payment_status='pending', completed=True)
+        Enrollment.objects.create(
+            user=User.objects.create(username='budi'), course=self.python, payment_status='completed'
+        )
+        self.client.force_login(mentor)
+        response = self.client.get(reverse('mentor_dashboard'))
+        self.assertEqual((response.context['total_enrollments'], response.context['completed_enrollments']), (2, 1))
+        self.assertEqual([c.enrollment_count for c in response.context['courses']], [2])
+
+
+class ApiTests(TestCase):
+
+    def setUp(self):
+        self.course = Course.objects.create(title='Python', description='Dasar', price=0)
+        self.modules = [
+            Module.objects.create(course=self.course, title=f'Modul {i}', order=i, content_type='text', content='')
+            for i in range(3)
+        ]
+        self.ani = User.objects.create(username='ani')
+        self.budi = User.objects.create(username='budi')
+        self.mine = Enrollment.objects.create(user=self.ani, course=self.course, payment_status='completed')
+        self.theirs = Enrollment.objects.create(user=self.budi, course=self.course, payment_status='completed')
+        self.mine.mark_completed(self.modules[0])
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(reverse('api_courses'), {'fields[courses]': 'title,module_count'})
+        self.assertEqual(response.json()['data'], [{'id': self.course.id, 'title': 'Python', 'module_count': 3}])
+
+        response = self.client.get(
+            reverse('api_course_outline', args=[self.course.id]),
+            {'fields[courses]': 'title', 'fields[modules]': 'order'}
+        )
+        self.assertEqual(response.json()['data']['modules'], [{'id': m.id, 'order': m.order} for m in self.modules])
+
+        response = self.client.get(reverse('api_courses'), {'fields[courses]': 'title,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+        self.assertEqual(self.client.get(reverse('api_course_outline', args=[0])).status_code, 404)
+
+    def test_etag_and_304(self):
+        url = reverse('api_course_outline', args=[self.course.id])
+        first = self.client.get(url)
+        etag = first['ETag']
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((again.status_code, again.content), (304, b''))
+
+        Course.objects.filter(id=self.course.id).update(title='Python Lanjut')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_progress_requires_the_owner(self):
+        url = reverse('api_enrollment_progress', args=[self.mine.id])
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.client.force_login(self.ani)
+        data = self.client.get(url).json()['data']
+        self.assertEqual((data['completed_count'], data['next_module_id']), (1, self.modules[1].id))
+        self.assertEqual(
+            [(m['completed'], m['locked']) for m in data['modules']], [(True, False), (False, False), (False, True)]
+        )
+        # Someone else's enrollment doesn't exist as far as this user is concerned
+        other = self.client.get(reverse('api_enrollment_progress', args=[self.theirs.id]))
+        self.assertEqual(other.status_code, 404)
+        response = self.client.get(reverse('api_enrollments'), {'fields[enrollments]': 'progress_percent'})
+        self.assertEqual(response.json()['data'], [{'id': self.mine.id, 'progress_percent': 33}])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_progress_batch_limits(self):
+        url = reverse('api_progress_batch')
+        self.assertEqual(self.client.get(url, {'ids': self.mine.id}).status_code, 401)
+
+        self.client.force_login(self.ani)
+        response = self.client.get(url, {'ids': f'{self.mine.id},{self.theirs.id},{self.mine.id}'})
+        body = response.json()
+        self.assertEqual([d['id'] for d in body['data']], [self.mine.id])
+        self.assertEqual(body['meta']['missing'], [self.theirs.id])
+
+        for ids in ('', '1,x', ','.join(str(i) for i in range(1, 52))):
+            self.assertEqual(self.client.get(url, {'ids': ids}).status_code, 400, ids)
+        self.assertEqual(self.client.get(url, {'ids': ','.join(str(i) for i in range(1, 51))}).status_code, 200)
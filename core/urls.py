@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, api
 
 urlpatterns = [
     # Home and catalog
@@ -8,16 +8,30 @@ urlpatterns = [
     path('dashboard/', views.student_dashboard, name='student_dashboard'),
     path('course/<int:course_id>/', views.course_detail, name='course_detail'),
 
+    # Search
+    path('search/', views.search, name='search'),
+    path('course/<int:course_id>/search/', views.course_search, name='course_search'),
+
+    # JSON API
+    path('api/v1/courses/', api.courses, name='api_courses'),
+    path('api/v1/courses/<int:course_id>/', api.course_outline, name='api_course_outline'),
+    path('api/v1/enrollments/', api.enrollments, name='api_enrollments'),
+    path('api/v1/enrollments/<int:enrollment_id>/progress/', api.enrollment_progress, name='api_enrollment_progress'),
+    path('api/v1/enrollments/<int:enrollment_id>/events/', api.progress_events, name='api_progress_events'),
+    path('api/v1/progress/', api.progress_batch, name='api_progress_batch'),
+
     # Enrollment and payment
     path('payment/<int:course_id>/', views.payment, name='payment'),
 
     # Course viewer
     path('course-viewer/<int:enrollment_id>/', views.course_viewer, name='course_viewer'),
+    path('course-viewer/<int:enrollment_id>/module/<int:module_id>/', views.course_viewer_fragment, name='course_viewer_fragment'),
     path('module-complete/<int:enrollment_id>/<int:module_id>/', views.mark_module_complete, name='mark_module_complete'),
     path('module-quiz-save/<int:enrollment_id>/<int:module_id>/', views.save_module_quiz_progress, name='save_module_quiz_progress'),
 
     # Code execution
     path('execute-code/', views.execute_code, name='execute_code'),
+    path('execute-code/<str:job_id>/', views.execute_code_result, name='execute_code_result'),
 
     # Assessment
     path('assessment/<int:enrollment_id>/', views.assessment_view, name='assessment_view'),
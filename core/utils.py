@@ -1,7 +1,3 @@
-import subprocess
-import sys
-import tempfile
-import os
 from django.core.mail import send_mail
 from django.conf import settings
 from reportlab.lib.pagesizes import letter, A4
@@ -13,6 +9,8 @@ from reportlab.lib.enums import TA_CENTER
 from io import BytesIO
 from datetime import datetime
 from docx import Document
+from .code_cache import code_result_cache
+from .runner import RunResult, code_runner, spawn_run
 
 
 def convert_docx_to_html(file_path):
@@ -122,37 +120,30 @@ def execute_python_code(code, inputs="", timeout=5):
     Execute Python code in a sandboxed environment
     Returns tuple: (success, output, error)
     """
-    try:
-        # Create a temporary file to store the code
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-            f.write(code)
-            temp_file = f.name
-
-        try:
-            # Execute the code with timeout
-            result = subprocess.run(
-                [sys.executable, temp_file],
-                capture_output=True,
-                text=True,
-                input=inputs,
-                timeout=timeout,
-                cwd=tempfile.gettempdir()
-            )
-
-            if result.returncode == 0:
-                return True, result.stdout, ""
-            else:
-                return False, "", result.stderr
-
-        finally:
-            # Clean up temp file
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-
-    except subprocess.TimeoutExpired:
-        return False, "", "Code execution timed out (5 seconds limit)"
-    except Exception as e:
-        return False, "", str(e)
+    result = run_python_code(code, inputs, timeout)
+    return result.success, result.output, result.error
+
+
+def run_python_code(code, inputs="", timeout=5):
+    """execute_python_code as a RunResult, which also names the limit that stopped the program"""
+    # Deterministic programs that already ran come from the result cache
+    key, cached = code_result_cache.lookup(code, inputs, timeout)
+    if cached is not None:
+        success, output, error = cached
+        return RunResult(success, output, error, 'ok' if success else 'error', 0.0, None)
+
+    # Warm interpreter from the pool, unless it is switched off
+    if code_runner.size > 0:
+        result = code_runner.run(code, inputs, timeout)
+    else:
+        result = spawn_python_code(code, inputs, timeout)
+    code_result_cache.store_result(key, result)
+    return result
+
+
+def spawn_python_code(code, inputs="", timeout=5):
+    """execute_python_code in a brand-new interpreter, as a RunResult"""
+    return spawn_run(code, inputs, timeout)
 
 
 def generate_certificate_pdf(certificate):
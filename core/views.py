@@ -1,24 +1,42 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from django.db import models
 from django.conf import settings
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
-from .models import Course, Module, Enrollment, Assessment, AssessmentResult, Certificate, User, Commission, CommissionRate
-from .forms import CustomUserCreationForm, ProfileForm, AssessmentSubmissionForm, CourseForm, ModuleForm, AssessmentForm
-from .utils import send_access_key_email, execute_python_code, generate_certificate_pdf, parse_docx_to_modules
+from django.views.decorators.http import require_GET, require_POST, condition
+from django.contrib.auth.views import redirect_to_login
+from .models import Course, Module, Enrollment, Assessment, AssessmentResult, Certificate, User, Commission, CommissionRate, CourseStats
+from .forms import CustomUserCreationForm, ProfileForm, AssessmentSubmissionForm, CourseForm, ModuleForm, AssessmentForm, CatalogFilterForm
+from .utils import send_access_key_email, generate_certificate_pdf, parse_docx_to_modules
+from .caching import attach_course_versions, get_course_version
+from .pagination import keyset_paginate
+from .search import search_courses, search_lessons
+from .rendering import ensure_rendered
+from .outline import get_course_outline
+from .progress import ProgressBitmap
+from .quiz_buffer import quiz_buffer
+from .jobs import QueueFull, code_jobs
+from .recommendations import recommender
+from .stats import top_courses as top_course_stats, total_revenue as stats_total_revenue
+from .conditional import (
+    cache_anonymous_preview, cache_for_anonymous, catalog_etag, catalog_last_modified, course_detail_etag,
+    course_detail_last_modified, course_preview_etag, course_preview_last_modified
+)
 import tempfile
 import os
 from django.core.exceptions import PermissionDenied
 from functools import wraps
 import json
-import markdown
 from decimal import Decimal
 from django.core.files.storage import FileSystemStorage
 from datetime import datetime
+from django.utils import timezone
 
 
 def mentor_required(view_func):
@@ -51,26 +69,86 @@ def owner_required(view_func):
 def home(request):
     """Home page"""
     try:
-        # Get featured courses with modules (limit to 6)
-        courses = Course.objects.all()[:6]
-        # Attach modules to each course
-        for course in courses:
-            course.module_list = course.modules.all()[:5]  # First 5 modules
-            course.total_modules = course.modules.count()
+        # Get featured courses with counts (limit to 6)
+        courses = Course.objects.with_counts()[:6]
     except Exception as e:
         print(f"Database error: {e}")
         courses = []
     return render(request, 'landing/home.html', {'courses': courses})
 
 
+CATALOG_PAGE_SIZE = 12
+
+
+@cache_for_anonymous
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
 def catalog(request):
-    """Course catalog view"""
+    """Course catalog view with filters and keyset pagination"""
+    form = CatalogFilterForm(request.GET or None)
+    filters = form.cleaned_data if form.is_valid() else {}
+    page = None
+
     try:
-        courses = Course.objects.all()
+        courses = form.filter_queryset(Course.objects.with_counts(), request.user)
+        page = keyset_paginate(
+            courses,
+            after=filters.get('after'),
+            before=filters.get('before'),
+            page_size=CATALOG_PAGE_SIZE
+        )
+        courses = attach_course_versions(page)
     except Exception as e:
         print(f"Database error: {e}")
         courses = []
-    return render(request, 'student/catalog.html', {'courses': courses})
+
+    # Filter query string without cursors, for the pagination links
+    filter_params = request.GET.copy()
+    for key in ('after', 'before'):
+        filter_params.pop(key, None)
+
+    context = {
+        'courses': courses,
+        'page': page,
+        'filter_form': form,
+        'filter_query': filter_params.urlencode(),
+        'fragment_timeout': settings.COURSE_FRAGMENT_CACHE_TIMEOUT,
+    }
+    return render(request, 'student/catalog.html', context)
+
+
+def search(request):
+    """Ranked full-text search over courses and their lessons"""
+    query = request.GET.get('q', '').strip()
+    results = search_courses(query, include_inactive=request.user.is_staff) if query else []
+    return render(request, 'student/search.html', {'query': query, 'results': results})
+
+
+@login_required
+def course_search(request, course_id):
+    """Search the lessons of one course, returns JSON for the viewer sidebar"""
+    course = get_object_or_404(Course, id=course_id)
+    has_access = (
+        course.mentor_id == request.user.id or
+        Enrollment.objects.filter(user_id=request.user.id, course_id=course.id, payment_status='completed').exists()
+    )
+    if not has_access:
+        raise PermissionDenied
+
+    query = request.GET.get('q', '').strip()
+    results = search_lessons(course, query) if query else []
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {
+                'module_id': m.id,
+                'title': m.title,
+                'content_type': m.content_type,
+                'snippet': m.snippet,
+                'score': round(m.search_score, 3),
+            }
+            for m in results
+        ]
+    })
 
 
 @login_required
@@ -81,20 +159,30 @@ def student_dashboard(request):
         enrollments = Enrollment.objects.filter(
             user=request.user,
             payment_status='completed'
-        )
+        ).with_course_counts()
 
         # Get all courses for catalog/recommendations
-        all_courses = Course.objects.all()
-
-        # Dummy data for "Best Seller" and "Related" for now
-        best_sellers = all_courses.order_by('-created_at')[:3]
-        related_courses = all_courses.order_by('-created_at')[3:6]  # Different set of courses
+        all_courses = Course.objects.with_counts()
+
+        # Both lists are precomputed by the co-enrollment recommender. Its
+        # snapshot can predate the user's latest enrollments, so owned
+        # courses are filtered out here as well
+        owned_ids = [en.course_id for en in enrollments]
+        related_ids = recommender.recommend(request.user.id, limit=3, exclude=owned_ids)
+        best_seller_ids = recommender.best_sellers(exclude=owned_ids + related_ids, limit=3)
+        courses_by_id = all_courses.in_bulk(related_ids + best_seller_ids)
+        best_sellers = [courses_by_id[cid] for cid in best_seller_ids if cid in courses_by_id]
+        related_courses = [courses_by_id[cid] for cid in related_ids if cid in courses_by_id]
 
         context = {
             'enrollments': enrollments,
             'best_sellers': best_sellers,
             'related_courses': related_courses,
-            'all_courses': all_courses
+            'all_courses': all_courses,
+            'recommendation_sections': [
+                ('Recommended for You', related_courses),
+                ('Best Sellers', best_sellers),
+            ]
         }
     except Exception as e:
         print(f"Dashboard error: {e}")
@@ -108,11 +196,14 @@ def student_dashboard(request):
     return render(request, 'student/dashboard.html', context)
 
 
+@cache_for_anonymous
+@condition(etag_func=course_detail_etag, last_modified_func=course_detail_last_modified)
 def course_detail(request, course_id):
     """Course detail and enrollment page"""
-    course = get_object_or_404(Course, id=course_id)
+    course = get_object_or_404(Course.objects.with_counts().select_related('mentor'), id=course_id)
+    course.cache_version = get_course_version(course.id)
+    # Lazy: only evaluated when the cached outline fragment misses
     modules = course.modules.all()
-    first_module = modules.first()
 
     # Check if user already enrolled (only if logged in)
     enrollment = None
@@ -127,11 +218,7 @@ def course_detail(request, course_id):
         ).first()
 
         if enrollment:
-            # Calculate progress
-            completed_count = len(enrollment.progress.get('completed_modules', []))
-            total_count = modules.count()
-            if total_count > 0:
-                progress_percentage = int((completed_count / total_count) * 100)
+            progress_percentage = enrollment.progress_percent
 
             # Check for certificate
             try:
@@ -142,11 +229,11 @@ def course_detail(request, course_id):
     context = {
         'course': course,
         'modules': modules,
-        'first_module': first_module,
         'enrollment': enrollment,
         'progress_percentage': progress_percentage,
         'certificate': certificate,
-        'already_enrolled': enrollment is not None
+        'already_enrolled': enrollment is not None,
+        'fragment_timeout': settings.COURSE_FRAGMENT_CACHE_TIMEOUT,
     }
     return render(request, 'student/course_detail.html', context)
 
@@ -250,7 +337,9 @@ def payment(request, course_id):
     return render(request, 'student/payment.html', context)
 
 
-@login_required
+@cache_for_anonymous
+@condition(etag_func=course_preview_etag, last_modified_func=course_preview_last_modified)
+@cache_anonymous_preview
 def course_viewer(request, enrollment_id):
     """Interactive course viewer with sequential navigation and Markdown support"""
     is_preview = request.GET.get('preview') == 'true'
@@ -260,132 +349,178 @@ def course_viewer(request, enrollment_id):
         course_id = request.GET.get('course_id')
         course = get_object_or_404(Course, id=course_id)
         enrollment = None
-        modules = course.modules.all()
-        current_module = modules.first()
-        completed = []
+        outline = get_course_outline(course.id)
+        completed = ProgressBitmap()
+        first_incomplete = None
+        current_entry = outline.first
+    elif not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
     else:
         # Normal enrollment mode
-        enrollment = get_object_or_404(Enrollment, id=enrollment_id, user_id=request.user.id)
+        enrollment = get_object_or_404(Enrollment.objects.select_related('course'), id=enrollment_id, user_id=request.user.id)
         course = enrollment.course
-        modules = course.modules.all()
-
-        if not enrollment.progress:
-            enrollment.progress = {'completed_modules': []}
-            enrollment.save()
+        outline = get_course_outline(course.id)
+        completed = enrollment.completion_bitmap
 
-        completed = enrollment.progress.get('completed_modules', [])
-
-        # Find the first incomplete module (the "current" one in sequence)
-        first_incomplete = None
-        for m in modules:
-            if m.id not in completed:
-                first_incomplete = m
-                break
+        # The first incomplete module is the "current" one in sequence
+        first_incomplete = outline.first_incomplete(completed)
+        current_entry = first_incomplete or outline.last
 
         # Handle specific module request
         requested_module_id = request.GET.get('module_id')
         if requested_module_id:
             try:
                 requested_module_id = int(requested_module_id)
+            except (ValueError, TypeError):
+                requested_module_id = None
+
+            if requested_module_id is not None:
+                if requested_module_id not in outline:
+                    raise Http404("Module not found")
                 # Navigation Logic: Allow if completed OR if it's the next incomplete module
-                if requested_module_id in completed or (first_incomplete and requested_module_id == first_incomplete.id):
-                    current_module = get_object_or_404(Module, id=requested_module_id, course_id=course.id)
+                if outline.is_unlocked(requested_module_id, completed, first_incomplete):
+                    current_entry = outline.get(requested_module_id)
                 else:
                     messages.warning(request, "This module is locked. Please complete the previous modules first.")
-                    current_module = first_incomplete or modules.last()
-            except (ValueError, TypeError):
-                current_module = first_incomplete or modules.last()
-        else:
-            # Default to first incomplete
-            current_module = first_incomplete or modules.last()
 
-    if not current_module and not is_preview:
+    if not current_entry and not is_preview:
         messages.error(request, "This course has no modules yet.")
         return redirect('student_dashboard')
 
-    # Annotate modules with status for the template
-    for m in modules:
-        m.is_completed = m.id in completed
-        m.is_current = current_module and m.id == current_module.id
-
-    # Render Markdown content for the current module
-    if current_module and current_module.content:
-        # Convert markdown to HTML
-        current_module.content_html = markdown.markdown(
-            current_module.content,
-            extensions=['extra', 'codehilite', 'toc', 'fenced_code']
-        )
-    else:
-        if current_module:
-            current_module.content_html = ""
+    context = _module_context(enrollment, course, outline, completed, current_entry, is_preview)
+    context['first_incomplete'] = first_incomplete
+    return render(request, 'student/course_viewer.html', context)
 
-    context = {
+
+def _prefetch_manifest(enrollment_id, outline, completed, current_id):
+    """The module after current_id, if it is already unlocked, for the browser to fetch ahead"""
+    next_entry = outline.next_after(current_id) if current_id else None
+    if not enrollment_id or next_entry is None or not outline.is_unlocked(next_entry.id, completed):
+        return {'next': None}
+    return {'next': {
+        'id': next_entry.id,
+        'url': reverse('course_viewer_fragment', args=[enrollment_id, next_entry.id]),
+    }}
+
+
+def _module_context(enrollment, course, outline, completed, current_entry, is_preview):
+    """Template context of one module, shared by the page and its fragments"""
+    # The outline already knows the module count, progress needs no COUNT query
+    course.module_count = len(outline)
+    current_id = current_entry.id if current_entry else None
+
+    # Only the module being shown is loaded with its body
+    current_module = Module.objects.get(id=current_id) if current_entry else None
+
+    # Markdown is rendered on save, this only re-renders stale rows
+    if current_module:
+        ensure_rendered(current_module)
+
+    return {
         'enrollment': enrollment,
         'course': course,
-        'modules': modules,
+        'modules': outline.navigation(completed, current_id, locking=not is_preview),
         'current_module': current_module,
-        'completed_modules': completed,
-        'first_incomplete': first_incomplete,
+        'completed_modules': outline.completed_ids(completed),
+        'next_module': outline.next_after(current_id) if current_entry else None,
         'is_preview': is_preview,
-        'saved_quiz_data': enrollment.progress.get('quiz_data', {}).get(str(current_module.id), {}) if enrollment and current_module else {}
+        'saved_quiz_data': quiz_buffer.quiz_data(enrollment, [current_id]).get(str(current_id), {}) if enrollment and current_module else {},
+        'prefetch': _prefetch_manifest(enrollment and enrollment.id, outline, completed, current_id),
     }
-    return render(request, 'student/course_viewer.html', context)
+
+
+def _module_fragment(request, enrollment, outline, completed, entry):
+    """JSON payload that swaps a module into an open course_viewer page"""
+    context = _module_context(enrollment, enrollment.course, outline, completed, entry, False)
+    module = context['current_module']
+    return {
+        'module': {'id': module.id, 'title': module.title},
+        'url': f"{reverse('course_viewer', args=[enrollment.id])}?module_id={module.id}",
+        'html': render_to_string('student/partials/module_body.html', context, request=request),
+        'sidebar': render_to_string('student/partials/module_list.html', context, request=request),
+        'quiz': {'questions': module.quiz_data or [], 'saved': context['saved_quiz_data']},
+        'completed': context['completed_modules'],
+        'module_count': len(outline),
+        'progress_percent': enrollment.progress_percentage,
+        'prefetch': context['prefetch'],
+    }
+
+
+@login_required
+def course_viewer_fragment(request, enrollment_id, module_id):
+    """Body and quiz of one module for in-page navigation, same lock rules as course_viewer"""
+    enrollment = get_object_or_404(Enrollment.objects.select_related('course'), id=enrollment_id, user_id=request.user.id)
+    outline = get_course_outline(enrollment.course_id)
+    completed = enrollment.completion_bitmap
+
+    if module_id not in outline:
+        raise Http404("Module not found")
+    if not outline.is_unlocked(module_id, completed):
+        return JsonResponse({
+            'success': False,
+            'error': "This module is locked. Please complete the previous modules first."
+        }, status=403)
+
+    response = JsonResponse({'success': True, **_module_fragment(request, enrollment, outline, completed, outline.get(module_id))})
+    # Per-student and stale as soon as progress changes; the page keeps its own prefetch copy
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @login_required
 @require_POST
 def mark_module_complete(request, enrollment_id, module_id):
     """Mark a module as completed"""
-    enrollment = get_object_or_404(Enrollment, id=enrollment_id, user_id=request.user.id)
-    module = get_object_or_404(Module, id=module_id, course=enrollment.course)
+    enrollment = get_object_or_404(Enrollment.objects.select_related('course'), id=enrollment_id, user_id=request.user.id)
+    module = get_object_or_404(Module.objects.only('id', 'course_id', 'progress_bit'), id=module_id, course_id=enrollment.course_id)
 
-    if not enrollment.progress:
-        enrollment.progress = {'completed_modules': []}
+    # Idempotent single-row INSERT: repeated clicks and parallel tabs are harmless
+    enrollment.mark_completed(module)
 
-    completed = enrollment.progress.get('completed_modules', [])
-    if module_id not in completed:
-        completed.append(module_id)
-        enrollment.progress['completed_modules'] = completed
-        enrollment.save()
+    outline = get_course_outline(enrollment.course_id)
+    completed = enrollment.completion_bitmap
+    response = {'success': True, 'completed': outline.completed_ids(completed)}
 
-    return JsonResponse({'success': True, 'completed': completed})
+    # ?fragment=next: also return the module this just unlocked, saving a round trip
+    next_entry = outline.next_after(module.id)
+    if request.GET.get('fragment') == 'next' and next_entry and outline.is_unlocked(next_entry.id, completed):
+        response['next'] = _module_fragment(request, enrollment, outline, completed, next_entry)
+    return JsonResponse(response)
 
 
 @login_required
 @require_POST
 def save_module_quiz_progress(request, enrollment_id, module_id):
     """Save user's progress on a module quiz"""
-    enrollment = get_object_or_404(Enrollment, id=enrollment_id, user_id=request.user.id)
+    enrollment = get_object_or_404(Enrollment.objects.only('id'), id=enrollment_id, user_id=request.user.id)
 
     try:
         data = json.loads(request.body)
         answers = data.get('answers')
         score = data.get('score')
 
-        if not enrollment.progress:
-            enrollment.progress = {'completed_modules': []}
-
-        # Initialize quiz_data if not exists
-        if 'quiz_data' not in enrollment.progress:
-            enrollment.progress['quiz_data'] = {}
-
-        # Save quiz result for this module
-        enrollment.progress['quiz_data'][str(module_id)] = {
+        # Coalesced with the other saves of this quiz when the buffer is on, else written now
+        quiz_buffer.save(enrollment.id, module_id, {
             'answers': answers,
             'score': score,
             'completed_at': str(datetime.now())
-        }
-
-        enrollment.save()
+        })
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+def _job_owner(request):
+    """Who a code job is counted against for fairness and limits"""
+    if request.user.is_authenticated:
+        return f'user:{request.user.id}'
+    return f"addr:{request.META.get('REMOTE_ADDR', '')}"
+
+
 @csrf_exempt
 @require_POST
 def execute_code(request):
-    """Execute Python code from the interactive compiler"""
+    """Queue Python code from the interactive compiler, answered with a job to poll"""
     try:
         data = json.loads(request.body)
         code = data.get('code', '')
@@ -394,18 +529,40 @@ def execute_code(request):
         if not code:
             return JsonResponse({'success': False, 'error': 'No code provided'})
 
-        success, output, error = execute_python_code(code, inputs)
+        try:
+            job_id = code_jobs.submit(_job_owner(request), code, inputs)
+        except QueueFull as e:
+            response = JsonResponse({'success': False, 'error': str(e)}, status=429)
+            response['Retry-After'] = str(e.retry_after)
+            return response
 
         return JsonResponse({
-            'success': success,
-            'output': output,
-            'error': error
-        })
+            'job_id': job_id,
+            'status': 'queued',
+            'result_url': reverse('execute_code_result', args=[job_id]),
+        }, status=202)
 
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+@require_GET
+def execute_code_result(request, job_id):
+    """State of a queued run; ?wait=N long-polls up to N seconds for it to finish"""
+    try:
+        wait = min(max(float(request.GET.get('wait', 0)), 0), settings.CODE_JOBS_LONG_POLL)
+    except ValueError:
+        wait = 0
+
+    job = code_jobs.get(job_id, _job_owner(request), wait)
+    if job is None:
+        return JsonResponse({'success': False, 'error': 'Unknown or expired job'}, status=404)
+
+    response = JsonResponse({'job_id': job_id, 'status': job['status'], **job.get('result', {})})
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
 @login_required
 def assessment_view(request, enrollment_id):
     """Course assessment view"""
@@ -493,7 +650,7 @@ def assessment_view(request, enrollment_id):
             if passed:
                 # Mark enrollment as completed
                 enrollment.completed = True
-                enrollment.save()
+                enrollment.save(update_fields=['completed'])
 
                 # Generate certificate
                 Certificate.objects.get_or_create(
@@ -641,16 +798,23 @@ def logout_view(request):
 @mentor_required
 def mentor_dashboard(request):
     """Mentor dashboard overview"""
-    # Get courses mentored by the user
-    mentor_courses = Course.objects.filter(mentor=request.user)
+    # Get courses mentored by the user, with every enrollment counted as before,
+    # pending payments included, read from the CourseStats projection
+    mentor_courses = Course.objects.filter(mentor=request.user).annotate(
+        enrollment_count=models.functions.Coalesce('stats__all_enrollment_count', 0)
+    )
 
     # Stats
     total_courses = mentor_courses.count()
 
-    # Get enrollments for mentor's courses
-    mentor_enrollments = Enrollment.objects.filter(course__mentor=request.user)
-    total_enrollments = mentor_enrollments.count()
-    completed_enrollments = mentor_enrollments.filter(completed=True).count()
+    # Enrollment totals for mentor's courses, pending payments included, from
+    # the CourseStats projection
+    totals = CourseStats.objects.filter(course__mentor=request.user).aggregate(
+        enrollments=models.Sum('all_enrollment_count'),
+        completed=models.Sum('all_completed_count')
+    )
+    total_enrollments = totals['enrollments'] or 0
+    completed_enrollments = totals['completed'] or 0
 
     # Get total commission from Commission model
     commissions = Commission.objects.filter(user=request.user)
@@ -693,16 +857,9 @@ def admin_dashboard(request):
 def owner_dashboard(request):
     """Owner dashboard overview"""
     # Calculate financial stats from Commission model
-    # Total Revenue = Sum of all completed enrollment course prices
+    # Total Revenue = Sum of all completed enrollment course prices (from CourseStats)
     all_enrollments = Enrollment.objects.filter(payment_status='completed')
-    total_revenue = Decimal('0')
-    for en in all_enrollments:
-        price = en.course.price
-        if hasattr(price, 'to_decimal'):
-            price = price.to_decimal()
-        elif not isinstance(price, Decimal):
-            price = Decimal(str(price))
-        total_revenue += price
+    total_revenue = stats_total_revenue()
 
     # Platform Profit = Sum of 'admin' and 'layanan' commissions
     platform_profit = Commission.objects.filter(
@@ -710,18 +867,16 @@ def owner_dashboard(request):
     ).aggregate(total=models.Sum('amount'))['total'] or Decimal('0')
 
     # Top courses
-    courses = Course.objects.all()
-    course_list = []
-    for c in courses:
-        enrollment_count = Enrollment.objects.filter(course=c, payment_status='completed').count()
-        course_list.append({
-            'title': c.title,
-            'enrollment_count': enrollment_count,
-            'mentor': c.mentor.get_full_name() or c.mentor.username
+    top_courses = []
+    for stats in top_course_stats(5):
+        mentor = stats.course.mentor
+        top_courses.append({
+            'title': stats.course.title,
+            'enrollment_count': stats.enrollment_count,
+            'mentor': (mentor.get_full_name() or mentor.username) if mentor else '-'
         })
 
-    top_courses = sorted(course_list, key=lambda x: x['enrollment_count'], reverse=True)[:5]
-    recent_enrollments = all_enrollments.order_by('-enrolled_at')[:10]
+    recent_enrollments = all_enrollments.select_related('user', 'course').order_by('-enrolled_at')[:10]
 
     context = {
         'total_revenue': total_revenue,
@@ -760,7 +915,7 @@ def progress_view(request):
     enrollments = Enrollment.objects.filter(
         user=request.user,
         payment_status='completed'
-    )
+    ).with_course_counts()
 
     # Calculate stats
     total_enrolled = enrollments.count()
@@ -831,16 +986,8 @@ def mentor_course_detail(request, course_id):
     """Detailed view of a course for the mentor"""
     course = get_object_or_404(Course, id=course_id, mentor=request.user)
     modules = course.modules.all()
-    enrollments = Enrollment.objects.filter(course=course)
-
-    # Calculate progress for each enrollment
-    module_count = modules.count()
-    for enrollment in enrollments:
-        completed_count = len(enrollment.progress.get('completed_modules', []))
-        if module_count > 0:
-            enrollment.calculated_progress = int((completed_count / module_count) * 100)
-        else:
-            enrollment.calculated_progress = 0
+    # progress_percent is stored on each enrollment, no per-row work
+    enrollments = Enrollment.objects.filter(course=course).select_related('user')
 
     context = {
         'course': course,
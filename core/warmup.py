@@ -0,0 +1,159 @@
+"""
+Post-deploy warmup of per-process lazy state.
+
+A fresh worker compiles templates, populates the URL resolver, loads the
+Markdown extensions and Pygments lexers, builds ReportLab font metrics and
+imports docx/openpyxl on the requests that first need them. warm() does all
+of that up front, without touching the database.
+
+Most of this state lives in the process, so workers are warmed by the
+startup hook in wsgi.py/asgi.py (WARMUP_ON_STARTUP; with gunicorn --preload
+it runs once before forking). The warmup command runs the same stages in
+its own process: it fills what is shared (bytecode, the highlight cache)
+and reports how long each stage takes.
+"""
+import importlib
+import logging
+import time
+from io import BytesIO
+from pathlib import Path
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Fonts drawn by generate_certificate_pdf
+CERTIFICATE_FONTS = ('Helvetica', 'Helvetica-Bold', 'Times-Bold', 'Times-Italic')
+
+MARKDOWN_SAMPLE = """# Warmup
+
+Some *text* with `code`, a [link](https://example.com) and a table:
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+```python
+def hello(name):
+    return f"Hello, {name}!"
+```
+
+```javascript
+console.log("hello");
+```
+"""
+
+
+def warm_templates():
+    """Compile every project template into the cached loader"""
+    from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+
+    base_dir = Path(settings.BASE_DIR).resolve()
+    compiled = failed = 0
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory).resolve()
+            # Only our own templates, not those of every installed app
+            if base_dir not in directory.parents:
+                continue
+            for path in sorted(directory.rglob('*.html')):
+                try:
+                    engine.get_template(path.relative_to(directory).as_posix())
+                except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+                    logger.warning("Warmup: could not compile %s: %s", path, e)
+                    failed += 1
+                    continue
+                compiled += 1
+    return f'{compiled} compiled, {failed} failed' if failed else f'{compiled} compiled'
+
+
+def warm_urls():
+    """Import every URLconf and build the reverse lookup tables"""
+    from django.urls import get_resolver, resolve
+
+    resolver = get_resolver()
+    names = len(resolver.reverse_dict)
+    resolve('/')
+    return f'{names} names'
+
+
+def warm_markdown():
+    """Load the Markdown extensions and the lexers of the common languages"""
+    from .rendering import render_markdown
+
+    render_markdown(MARKDOWN_SAMPLE)
+    return 'python, javascript'
+
+
+def warm_reportlab():
+    """Build the certificate font metrics and draw a throwaway page and QR code"""
+    import qrcode
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(BytesIO(), pagesize=landscape(A4))
+    for i, name in enumerate(CERTIFICATE_FONTS):
+        pdfmetrics.getFont(name)
+        c.setFont(name, 12)
+        c.drawString(50, 50 + i * 20, 'Certificate of Appreciation')
+    qr = qrcode.QRCode(box_size=2, border=1)
+    qr.add_data('warmup')
+    qr.make_image(fill_color='black', back_color='white')
+    c.save()
+    return ', '.join(CERTIFICATE_FONTS)
+
+
+def warm_office_imports():
+    """Import python-docx (and parse its default template) and openpyxl"""
+    loaded = []
+    for name in ('docx', 'openpyxl'):
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            logger.info("Warmup: %s is not installed, skipped", name)
+            continue
+        if name == 'docx':
+            module.Document()
+        loaded.append(name)
+    return ', '.join(loaded) or 'none'
+
+
+STAGES = (
+    ('templates', warm_templates),
+    ('url resolvers', warm_urls),
+    ('markdown', warm_markdown),
+    ('reportlab', warm_reportlab),
+    ('docx/openpyxl', warm_office_imports),
+)
+
+
+def warm(stages=None):
+    """
+    Run the warmup stages (all by default) and return one
+    (name, seconds, result, error) tuple per stage. A failing stage is
+    logged and reported, the others still run.
+    """
+    report = []
+    for name, func in STAGES:
+        if stages and name not in stages:
+            continue
+        start = time.perf_counter()
+        try:
+            result, error = func(), None
+        except Exception as e:
+            logger.exception("Warmup stage %s failed", name)
+            result, error = None, e
+        report.append((name, time.perf_counter() - start, result, error))
+    return report
+
+
+def warmup_on_startup():
+    """Called from wsgi.py/asgi.py; does nothing unless WARMUP_ON_STARTUP is set"""
+    if not settings.WARMUP_ON_STARTUP:
+        return
+    report = warm()
+    logger.info(
+        "Warmup finished in %.0f ms (%s)",
+        sum(seconds for _, seconds, _, _ in report) * 1000,
+        ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds, _, _ in report)
+    )